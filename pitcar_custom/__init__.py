@@ -1,3 +1,4 @@
 from . import wizard
 from . import models
+from . import controllers
 # from . import report
\ No newline at end of file
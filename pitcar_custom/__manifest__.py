@@ -21,7 +21,8 @@
     'data': [
         'data/res_partner_data.xml',
         'data/res_partner_car_data.xml',
-        # 'data/cron_jobs.xml',
+        'data/cron_jobs.xml',
+        'data/reminder_template_data.xml',
 
         'report/ir_actions_report_templates.xml',
         'report/ir_actions_report.xml',
@@ -38,11 +39,22 @@
         'views/res_partner_car.xml',
         'views/res_partner.xml',
         'views/sale_order.xml',
+        'views/sale_order_follow_up.xml',
+        'views/pitcar_reminder_template_views.xml',
+        'views/pitcar_partner_duplicate_views.xml',
+        'views/pitcar_car_recompute_views.xml',
+        'views/pitcar_car_catalogue_views.xml',
+        'views/pitcar_work_order_batch_views.xml',
+        'views/pitcar_performance_report_views.xml',
+        'views/pitcar_satisfaction_report_views.xml',
+        'views/pitcar_perf_log_views.xml',
+        'views/pitcar_parts_forecast_views.xml',
         'views/stock_picking.xml',
         'views/product_views.xml',
         'views/product_tag_views.xml',
         'views/crm_tag_views.xml',
         'views/project_task_views.xml',
+        'wizard/car_import_views.xml',
         'views/menu.xml',
         # 'views/product_template_views.xml',
         # 'views/stock_quant_views.xml',
@@ -51,5 +63,5 @@
     'application': True,
     'auto_install': False,
     'license': 'LGPL-3',
-    'version':'16.0.12'
+    'version':'16.0.20'
 }
\ No newline at end of file
@@ -0,0 +1,3 @@
+from . import checkin
+from . import export
+from . import phone_lookup
\ No newline at end of file
@@ -0,0 +1,30 @@
+from odoo import http, fields
+from odoo.http import request
+
+
+class PitcarCheckin(http.Controller):
+    """Compact JSON routes for the reception tablets.
+
+    Each route delegates to a model method that runs a fixed number of
+    queries, independent of the customer's history size.
+    """
+
+    @http.route('/pitcar/checkin/lookup', type='json', auth='user')
+    def lookup(self, plate, limit=8):
+        return request.env['res.partner.car']._checkin_lookup(plate, limit=min(int(limit), 50))
+
+    @http.route('/pitcar/checkin/car/<int:car_id>', type='json', auth='user')
+    def car_summary(self, car_id, visit_limit=5):
+        car = request.env['res.partner.car'].browse(car_id).exists()
+        if not car:
+            return {'error': 'not_found'}
+        return car._checkin_summary(visit_limit=min(int(visit_limit), 20))
+
+    @http.route('/pitcar/checkin/order', type='json', auth='user', methods=['POST'])
+    def create_order(self, car_id, odometer=0.0, service_advisor_ids=None, car_arrival_time=None):
+        return request.env['sale.order']._checkin_create_order(
+            int(car_id),
+            odometer=float(odometer or 0.0),
+            service_advisor_ids=[int(advisor_id) for advisor_id in service_advisor_ids or []],
+            car_arrival_time=fields.Datetime.to_datetime(car_arrival_time) if car_arrival_time else None,
+        )
@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+import odoo
+from odoo import http, api
+from odoo.http import request, content_disposition
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PitcarExport(http.Controller):
+    """Streams orders and invoices as CSV or XLSX.
+
+    The CSV is written to the response batch by batch from its own
+    cursor, so the request does not wait for the full file. XLSX can only
+    be sent once the workbook is closed: it is written to a temporary
+    file in constant-memory mode and then streamed from disk.
+    """
+
+    @http.route('/pitcar/export/<string:export_name>', type='http', auth='user')
+    def export(self, export_name, file_format='csv', date_from=None, date_to=None, batch_size=5000):
+        Export = request.env['pitcar.export']
+        domain = Export._get_export_domain(export_name, date_from, date_to)
+        batch_size = max(min(int(batch_size), 20000), 100)
+        filename = '%s.%s' % (export_name, 'xlsx' if file_format == 'xlsx' else 'csv')
+
+        if file_format == 'xlsx':
+            handle, path = tempfile.mkstemp(suffix='.xlsx')
+            os.close(handle)
+            try:
+                Export._write_xlsx(export_name, domain, path, batch_size=batch_size)
+            except Exception:
+                os.unlink(path)
+                raise
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            body = self._iter_file(path)
+        else:
+            content_type = 'text/csv; charset=utf-8'
+            body = self._iter_csv(request.db, request.env.uid, dict(request.env.context),
+                                  export_name, domain, batch_size)
+
+        return request.make_response(body, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition(filename)),
+            ('X-Accel-Buffering', 'no'),
+        ])
+
+    @staticmethod
+    def _iter_csv(dbname, uid, context, export_name, domain, batch_size):
+        # Cursor request sudah ditutup saat response di-stream, jadi buka cursor sendiri
+        with odoo.registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            yield from env['pitcar.export']._stream_csv(export_name, domain, batch_size=batch_size)
+
+    @staticmethod
+    def _iter_file(path):
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.unlink(path)
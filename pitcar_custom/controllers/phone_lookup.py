@@ -0,0 +1,10 @@
+from odoo import http
+from odoo.http import request
+
+
+class PitcarPhoneLookup(http.Controller):
+    """Caller ID and WhatsApp matching: customers, cars and last orders of a phone number."""
+
+    @http.route('/pitcar/phone/lookup', type='json', auth='user')
+    def lookup(self, phone, limit=5):
+        return request.env['res.partner']._phone_lookup(phone, limit=min(int(limit), 20))
@@ -0,0 +1,24 @@
+# Isi antrian follow up dari order lama yang sudah selesai (date_completed terisi)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        INSERT INTO sale_order_follow_up
+            (sale_order_id, kind, due_date, state, create_uid, create_date, write_uid, write_date)
+        SELECT so.id,
+               k.kind,
+               (so.date_completed + k.days * INTERVAL '1 day')::date,
+               CASE
+                   WHEN k.kind = '3_days' AND so.is_follow_up IS NOT NULL THEN 'done'
+                   WHEN k.kind = '3_months' AND so.reminder_3_months IS NOT NULL THEN 'done'
+                   WHEN k.kind = '6_months' AND so.reminder_6_months IS NOT NULL THEN 'done'
+                   ELSE 'pending'
+               END,
+               1, NOW() AT TIME ZONE 'UTC', 1, NOW() AT TIME ZONE 'UTC'
+          FROM sale_order so
+    CROSS JOIN (VALUES ('3_days', 3), ('3_months', 90), ('6_months', 180)) AS k(kind, days)
+         WHERE so.date_completed IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """)
@@ -0,0 +1,27 @@
+# Normalisasi plat nomor lama sebelum unique constraint number_plate dibuat
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        UPDATE res_partner_car c
+           SET number_plate = upper(regexp_replace(c.number_plate, '\\s+', '', 'g')),
+               name = concat_ws(' ', upper(regexp_replace(c.number_plate, '\\s+', '', 'g')), b.name, t.name)
+          FROM res_partner_car_brand b, res_partner_car_type t
+         WHERE b.id = c.brand
+           AND t.id = c.brand_type
+           AND c.number_plate <> upper(regexp_replace(c.number_plate, '\\s+', '', 'g'))
+    """)
+    _logger.info("Normalized %s number plates", cr.rowcount)
+    cr.execute("""
+        SELECT number_plate, array_agg(id ORDER BY id)
+          FROM res_partner_car
+      GROUP BY number_plate
+        HAVING count(*) > 1
+    """)
+    for number_plate, car_ids in cr.fetchall():
+        _logger.warning("Duplicate number plate %s on cars %s, unique constraint will not be created", number_plate, car_ids)
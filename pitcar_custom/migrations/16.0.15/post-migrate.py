@@ -0,0 +1,88 @@
+# Pindahkan data feedback & reminder dari kolom sale_order ke sale_order_feedback (1:1),
+# lalu hapus kolom lama supaya baris sale_order tetap ramping
+import logging
+
+_logger = logging.getLogger(__name__)
+
+FEEDBACK_COLUMNS = [
+    'is_willing_to_feedback', 'no_feedback_reason', 'customer_rating', 'customer_satisfaction',
+    'customer_feedback', 'review_google', 'follow_instagram', 'complaint_action', 'complaint_status',
+    'show_complaint_action', 'is_follow_up', 'customer_feedback_follow_up', 'follow_up_evidence',
+    'no_follow_up_reason', 'reminder_3_months', 'date_follow_up_3_months', 'is_response_3_months',
+    'feedback_3_months', 'is_booking_3_months', 'booking_date_3_months', 'no_reminder_reason_3_months',
+    'reminder_6_months', 'date_follow_up_6_months', 'is_response_6_months', 'feedback_6_months',
+    'is_booking_6_months', 'booking_date_6_months', 'no_reminder_reason_6_months',
+]
+
+# Kolom lama yang sudah tidak disimpan lagi (tanggal reminder dihitung dari antrian follow up)
+OBSOLETE_COLUMNS = [
+    'notif_follow_up_3_days', 'next_follow_up_3_days', 'notif_follow_up_3_months',
+    'next_follow_up_3_months', 'notif_follow_up_6_months', 'next_follow_up_6_months',
+]
+
+# {relasi lama di sale_order: relasi baru di sale_order_feedback}
+RELATIONS = {
+    'feedback_classification_sale_order_rel': 'sale_order_feedback_classification_rel',
+    'sale_order_feedback_3_months_rel': 'sale_order_feedback_category_3_months_rel',
+    'sale_order_feedback_6_months_rel': 'sale_order_feedback_category_6_months_rel',
+}
+
+
+def _existing_columns(cr, table, columns):
+    cr.execute("""
+        SELECT column_name FROM information_schema.columns
+         WHERE table_name = %s AND column_name IN %s
+    """, [table, tuple(columns)])
+    found = {row[0] for row in cr.fetchall()}
+    return [column for column in columns if column in found]
+
+
+def _existing_tables(cr, tables):
+    cr.execute("SELECT table_name FROM information_schema.tables WHERE table_name IN %s", [tuple(tables)])
+    return {row[0] for row in cr.fetchall()}
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    columns = _existing_columns(cr, 'sale_order', FEEDBACK_COLUMNS)
+    old_relations = _existing_tables(cr, list(RELATIONS))
+
+    conditions = ['num_nonnulls(%s) > 0' % ', '.join('so."%s"' % c for c in columns)] if columns else []
+    conditions += ['EXISTS (SELECT 1 FROM "%s" r WHERE r.sale_order_id = so.id)' % rel for rel in old_relations]
+    if conditions:
+        column_list = ''.join(', "%s"' % c for c in columns)
+        cr.execute("""
+            INSERT INTO sale_order_feedback
+                (sale_order_id{columns}, create_uid, create_date, write_uid, write_date)
+            SELECT so.id{so_columns}, so.write_uid, so.write_date, so.write_uid, so.write_date
+              FROM sale_order so
+             WHERE ({conditions})
+               AND NOT EXISTS (SELECT 1 FROM sale_order_feedback f WHERE f.sale_order_id = so.id)
+        """.format(
+            columns=column_list,
+            so_columns=''.join(', so."%s"' % c for c in columns),
+            conditions=' OR '.join(conditions),
+        ))
+        _logger.info("Moved feedback of %s sale orders to sale_order_feedback", cr.rowcount)
+
+    cr.execute("""
+        UPDATE sale_order so
+           SET feedback_id = f.id
+          FROM sale_order_feedback f
+         WHERE f.sale_order_id = so.id
+           AND so.feedback_id IS DISTINCT FROM f.id
+    """)
+
+    for old_relation in old_relations:
+        cr.execute("""
+            INSERT INTO "{new}" (feedback_id, feedback_classification_id)
+            SELECT f.id, r.feedback_classification_id
+              FROM "{old}" r
+              JOIN sale_order_feedback f ON f.sale_order_id = r.sale_order_id
+            ON CONFLICT DO NOTHING
+        """.format(new=RELATIONS[old_relation], old=old_relation))
+
+    obsolete = _existing_columns(cr, 'sale_order', FEEDBACK_COLUMNS + OBSOLETE_COLUMNS)
+    if obsolete:
+        cr.execute('ALTER TABLE sale_order %s' % ', '.join('DROP COLUMN "%s"' % c for c in obsolete))
@@ -0,0 +1,22 @@
+# Isi riwayat odometer dari order lama: satu bacaan per order yang punya mobil dan odometer
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        INSERT INTO res_partner_car_odometer
+            (car_id, reading_date, odometer, source, sale_order_id, create_uid, create_date, write_uid, write_date)
+        SELECT so.partner_car_id,
+               COALESCE(so.date_completed, so.date_order),
+               so.partner_car_odometer,
+               CASE WHEN so.date_completed IS NOT NULL THEN 'invoice' ELSE 'confirm' END,
+               so.id,
+               1, NOW() AT TIME ZONE 'UTC', 1, NOW() AT TIME ZONE 'UTC'
+          FROM sale_order so
+         WHERE so.partner_car_id IS NOT NULL
+           AND so.partner_car_odometer > 0
+           AND so.state IN ('sale', 'done')
+           AND NOT EXISTS (SELECT 1 FROM res_partner_car_odometer o WHERE o.sale_order_id = so.id)
+    """)
+    cr.execute("ANALYZE res_partner_car_odometer")
@@ -0,0 +1,14 @@
+# Isi phone_normalized dengan SQL sebelum ORM membuat kolomnya,
+# supaya upgrade tidak menghitung ulang semua partner satu per satu di Python
+from odoo.addons.pitcar_custom.models.res_partner import normalize_phone_sql
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE res_partner ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR")
+    cr.execute("""
+        UPDATE res_partner p
+           SET phone_normalized = {normalized}
+         WHERE p.phone IS NOT NULL
+    """.format(normalized=normalize_phone_sql('p.phone')))
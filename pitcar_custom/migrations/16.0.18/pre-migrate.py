@@ -0,0 +1,19 @@
+# Isi mobile_normalized dengan SQL sebelum ORM membuat kolomnya,
+# dan perbaiki phone_normalized yang masih kosong
+from odoo.addons.pitcar_custom.models.res_partner import normalize_phone_sql
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("ALTER TABLE res_partner ADD COLUMN IF NOT EXISTS mobile_normalized VARCHAR")
+    cr.execute("""
+        UPDATE res_partner p
+           SET mobile_normalized = {mobile}
+         WHERE p.mobile IS NOT NULL
+    """.format(mobile=normalize_phone_sql('p.mobile')))
+    cr.execute("""
+        UPDATE res_partner p
+           SET phone_normalized = {phone}
+         WHERE p.phone IS NOT NULL AND p.phone_normalized IS NULL
+    """.format(phone=normalize_phone_sql('p.phone')))
@@ -0,0 +1,18 @@
+# Reminder yang jatuh tempo sebelum upgrade (termasuk hasil backfill 16.0.13) tidak dikirim otomatis,
+# tetap 'pending' supaya masih muncul di filter manual
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        UPDATE sale_order_follow_up
+           SET dispatch_state = 'expired'
+         WHERE state = 'pending'
+           AND due_date < CURRENT_DATE
+           AND (dispatch_state = 'queued' OR dispatch_state IS NULL)
+    """)
+    _logger.info("Marked %s overdue follow ups as expired", cr.rowcount)
@@ -0,0 +1,39 @@
+# Pasangan duplikat disimpan sebagai id + nama biasa, bukan foreign key, supaya merge kontak
+# tidak mengubah atau menghapus riwayat saran
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    cr.execute("""
+        SELECT column_name FROM information_schema.columns
+         WHERE table_name = 'pitcar_partner_duplicate' AND column_name IN ('partner_id', 'duplicate_id')
+    """)
+    if not cr.fetchall():
+        return
+    cr.execute("""
+        ALTER TABLE pitcar_partner_duplicate
+            DROP CONSTRAINT IF EXISTS pitcar_partner_duplicate_partner_id_fkey,
+            DROP CONSTRAINT IF EXISTS pitcar_partner_duplicate_duplicate_id_fkey,
+            DROP CONSTRAINT IF EXISTS pitcar_partner_duplicate_pair_uniq,
+            DROP CONSTRAINT IF EXISTS pitcar_partner_duplicate_pair_check
+    """)
+    cr.execute("DROP INDEX IF EXISTS pitcar_partner_duplicate__partner_id_index")
+    cr.execute("DROP INDEX IF EXISTS pitcar_partner_duplicate__duplicate_id_index")
+    cr.execute("ALTER TABLE pitcar_partner_duplicate RENAME COLUMN partner_id TO partner_res_id")
+    cr.execute("ALTER TABLE pitcar_partner_duplicate RENAME COLUMN duplicate_id TO duplicate_res_id")
+    cr.execute("""
+        ALTER TABLE pitcar_partner_duplicate
+            ADD COLUMN IF NOT EXISTS partner_name VARCHAR,
+            ADD COLUMN IF NOT EXISTS duplicate_name VARCHAR
+    """)
+    cr.execute("""
+        UPDATE pitcar_partner_duplicate d
+           SET partner_name = a.name, duplicate_name = b.name
+          FROM res_partner a, res_partner b
+         WHERE a.id = d.partner_res_id AND b.id = d.duplicate_res_id
+    """)
+    _logger.info("Stored names on %s duplicate suggestions", cr.rowcount)
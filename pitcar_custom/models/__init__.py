@@ -1,11 +1,29 @@
+from . import count_mixin
+from . import car_recompute
+from . import car_catalogue
+from . import mechanic_team_mixin
 from . import res_partner_car
+from . import res_partner_car_odometer
 from . import res_partner
 from . import stock_picking
 from . import account_move
+from . import sale_order_feedback
 from . import sale_order
 from . import product_product
 from . import product_tag
 from . import crm_tag
 from . import service_advisor
 from . import project_task
-from . import feedback_classification
\ No newline at end of file
+from . import feedback_classification
+from . import sale_order_follow_up
+from . import reminder_dispatch
+from . import report_mixin
+from . import pitcar_performance_report
+from . import pitcar_satisfaction_report
+from . import car_service_prediction
+from . import work_order_batch
+from . import pitcar_export
+from . import pitcar_perf_log
+from . import customer_rfm
+from . import partner_duplicate
+from . import parts_forecast
\ No newline at end of file
@@ -1,7 +1,13 @@
 from odoo import models, fields, api, _, exceptions
 
 class AccountMove(models.Model):
-    _inherit = 'account.move'
+    _inherit = ['account.move', 'pitcar.car.details.mixin', 'pitcar.mechanic.team.mixin']
+
+    _car_detail_fields = {
+        'partner_car_brand': 'brand',
+        'partner_car_brand_type': 'brand_type',
+        'partner_car_year': 'year',
+    }
 
     # Field baru untuk Service Advisor yang merujuk ke model 'pitcar.service.advisor'
     service_advisor_id = fields.Many2many(
@@ -18,18 +24,20 @@ class AccountMove(models.Model):
         index=True,
     )
     partner_car_brand = fields.Many2one(
+        'res.partner.car.brand',
         string="Car Brand",
-        related="partner_car_id.brand",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_brand_type = fields.Many2one(
+        'res.partner.car.type',
         string="Car Brand Type",
-        related="partner_car_id.brand_type",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_year = fields.Char(
         string="Car Year",
-        related="partner_car_id.year",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_odometer = fields.Float(
@@ -67,10 +75,9 @@ class AccountMove(models.Model):
         help="Record the time when the car arrived."
     )
     
-    @api.depends('car_mechanic_id_new')
-    def _compute_generated_mechanic_team(self):
-        for account in self:
-            account.generated_mechanic_team = ', '.join(account.car_mechanic_id_new.mapped('name'))
+    @api.depends('partner_car_id')
+    def _compute_partner_car_details(self):
+        super(AccountMove, self)._compute_partner_car_details()
 
     # Method untuk menandai service advisor yang terlibat dalam transaksi
     def action_mark_service_advisor(self):
@@ -0,0 +1,139 @@
+from odoo import models, api, tools, _
+from odoo.tools.cache import STAT
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def normalize_catalogue_name(name):
+    # " toyota  avanza " -> "TOYOTA AVANZA"
+    return ' '.join(str(name or '').split()).upper()
+
+
+class PitcarCarCatalogue(models.AbstractModel):
+    """Process-level lookup of car brands, types and transmissions.
+
+    The catalogue is loaded once per worker with ``ormcache`` and cleared
+    whenever a brand, type or transmission is created, written or
+    deleted. Returned dicts are shared, callers must copy before changing
+    them.
+    """
+    _name = 'pitcar.car.catalogue'
+    _description = 'Car Catalogue Cache'
+
+    @api.model
+    @tools.ormcache()
+    def _get_catalogue(self):
+        for model_name in ('res.partner.car.brand', 'res.partner.car.type', 'res.partner.car.transmission'):
+            self.env[model_name].flush_model()
+        self.env.cr.execute("SELECT id, name FROM res_partner_car_brand")
+        brands = {}
+        brand_names = {}
+        for brand_id, name in self.env.cr.fetchall():
+            brand_names[brand_id] = normalize_catalogue_name(name)
+            brands.setdefault(brand_names[brand_id], brand_id)
+
+        self.env.cr.execute("SELECT id, brand, name FROM res_partner_car_type ORDER BY name, id")
+        types = {}
+        types_by_brand = {}
+        alias_ids = {}
+        for type_id, brand_id, name in self.env.cr.fetchall():
+            name = normalize_catalogue_name(name)
+            types.setdefault((brand_id, name), type_id)
+            types_by_brand.setdefault(brand_id, []).append(type_id)
+            # "AVANZA" dan "TOYOTA AVANZA" sama-sama dikenali
+            for alias in (name, '%s %s' % (brand_names.get(brand_id, ''), name)):
+                alias_ids.setdefault(alias.strip(), set()).add(type_id)
+        # Alias yang dipakai lebih dari satu brand tidak bisa dipakai tanpa brand
+        type_aliases = {alias: ids.pop() for alias, ids in alias_ids.items() if len(ids) == 1}
+
+        self.env.cr.execute("SELECT id, name FROM res_partner_car_transmission")
+        transmissions = {}
+        for transmission_id, name in self.env.cr.fetchall():
+            transmissions.setdefault(normalize_catalogue_name(name), transmission_id)
+
+        return {
+            'brands': brands,
+            'types': types,
+            'type_aliases': type_aliases,
+            'types_by_brand': {brand_id: tuple(ids) for brand_id, ids in types_by_brand.items()},
+            'transmissions': transmissions,
+        }
+
+    @api.model
+    def _lookup_brand(self, name):
+        return self._get_catalogue()['brands'].get(normalize_catalogue_name(name), False)
+
+    @api.model
+    def _lookup_type(self, name, brand_id=None):
+        catalogue = self._get_catalogue()
+        name = normalize_catalogue_name(name)
+        if brand_id:
+            type_id = catalogue['types'].get((brand_id, name))
+            if not type_id:
+                type_id = catalogue['type_aliases'].get(name)
+                if type_id not in catalogue['types_by_brand'].get(brand_id, ()):
+                    type_id = False
+            return type_id or False
+        return catalogue['type_aliases'].get(name, False)
+
+    @api.model
+    def _lookup_transmission(self, name):
+        return self._get_catalogue()['transmissions'].get(normalize_catalogue_name(name), False)
+
+    @api.model
+    def _get_brand_type_ids(self, brand_id):
+        return list(self._get_catalogue()['types_by_brand'].get(brand_id, ()))
+
+    @api.model
+    def _clear_catalogue(self):
+        self.clear_caches()
+
+    @api.model
+    def _get_cache_stats(self):
+        """Hits and misses of the catalogue cache in this worker process."""
+        stats = {'hit': 0, 'miss': 0, 'err': 0}
+        for (dbname, model_name, method), counter in STAT.items():
+            if dbname == self.env.registry.db_name and model_name == self._name \
+                    and getattr(method, '__name__', '') == '_get_catalogue':
+                for key in stats:
+                    stats[key] += getattr(counter, key, 0)
+        total = stats['hit'] + stats['miss']
+        stats['ratio'] = round(100.0 * stats['hit'] / total, 1) if total else 0.0
+        return stats
+
+    @api.model
+    def action_show_cache_stats(self):
+        stats = self._get_cache_stats()
+        _logger.info("Car catalogue cache: %s", stats)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Car Catalogue Cache"),
+                'message': _("Hits: %(hit)s, misses: %(miss)s, hit ratio: %(ratio)s%% (this worker)", **stats),
+                'sticky': False,
+            },
+        }
+
+
+class PitcarCarCatalogueSource(models.AbstractModel):
+    """Clears the car catalogue cache when brands, types or transmissions change."""
+    _name = 'pitcar.car.catalogue.source.mixin'
+    _description = 'Car Catalogue Cache Invalidation'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['pitcar.car.catalogue']._clear_catalogue()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['pitcar.car.catalogue']._clear_catalogue()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['pitcar.car.catalogue']._clear_catalogue()
+        return res
@@ -0,0 +1,171 @@
+from odoo import models, fields, api, tools, _
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PitcarCarDetailsMixin(models.AbstractModel):
+    """Car details copied onto documents that reference ``partner_car_id``.
+
+    The values are recomputed by the ORM only when the document changes
+    car. Edits on the car itself are pushed to the documents in bulk by
+    ``pitcar.car.recompute`` instead of recomputing every historical
+    document inside the user's request.
+    """
+    _name = 'pitcar.car.details.mixin'
+    _description = 'Car Details on Documents'
+
+    # {field on document: field on res.partner.car}
+    _car_detail_fields = {}
+
+    def _compute_partner_car_details(self):
+        for record in self:
+            car = record.partner_car_id
+            for fname, car_fname in self._car_detail_fields.items():
+                record[fname] = car[car_fname]
+
+    @api.model
+    def _refresh_car_details_sql(self, car_ids):
+        if not car_ids or not self._car_detail_fields:
+            return 0
+        assignments = ', '.join(
+            '"%s" = car."%s"' % (fname, car_fname) for fname, car_fname in self._car_detail_fields.items()
+        )
+        # Dokumen yang nilainya sudah sama tidak ditulis ulang
+        doc_columns = ', '.join('doc."%s"' % fname for fname in self._car_detail_fields)
+        car_columns = ', '.join('car."%s"' % car_fname for car_fname in self._car_detail_fields.values())
+        self.env.cr.execute("""
+            UPDATE "{table}" AS doc
+               SET {assignments}
+              FROM res_partner_car AS car
+             WHERE doc.partner_car_id = car.id
+               AND car.id IN %s
+               AND ({doc_columns}) IS DISTINCT FROM ({car_columns})
+        """.format(
+            table=self._table, assignments=assignments,
+            doc_columns=doc_columns, car_columns=car_columns,
+        ), [tuple(car_ids)])
+        updated = self.env.cr.rowcount
+        self.invalidate_model(list(self._car_detail_fields))
+        return updated
+
+
+class PitcarCarRecompute(models.Model):
+    _name = 'pitcar.car.recompute'
+    _description = 'Car Master Data Recompute Queue'
+    _order = 'id desc'
+    _rec_name = 'res_model'
+
+    res_model = fields.Selection([
+        ('res.partner.car.type', 'Car Type'),
+        ('res.partner.car', 'Car'),
+    ], string="Model", required=True, readonly=True)
+    res_id = fields.Integer(string="Record ID", required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    ], string="Status", required=True, default='pending', readonly=True)
+    done_date = fields.Datetime(string="Processed On", readonly=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'pitcar_car_recompute_state_model_index',
+                           self._table, ['state', 'res_model', 'res_id'])
+
+    @api.model
+    def _is_deferred(self):
+        if self.env.context.get('pitcar_recompute_now'):
+            return False
+        mode = self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.car_recompute_mode', 'deferred')
+        return mode != 'immediate'
+
+    @api.model
+    def _enqueue(self, res_model, res_ids):
+        """Queue records whose stored car names or document copies are stale."""
+        res_ids = list(set(res_ids))
+        if not res_ids:
+            return
+        if not self._is_deferred():
+            self._recompute(res_model, res_ids)
+            return
+        self.env.cr.execute("""
+            INSERT INTO pitcar_car_recompute (res_model, res_id, state, create_uid, create_date, write_uid, write_date)
+            SELECT %(model)s, ids.id, 'pending', %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(ids)s) AS ids(id)
+             WHERE NOT EXISTS (
+                   SELECT 1 FROM pitcar_car_recompute q
+                    WHERE q.state = 'pending' AND q.res_model = %(model)s AND q.res_id = ids.id)
+        """, {'model': res_model, 'ids': res_ids, 'uid': self.env.uid})
+        cron = self.env.ref('pitcar_custom.ir_cron_car_recompute', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _recompute(self, res_model, res_ids):
+        self.env.flush_all()
+        if res_model == 'res.partner.car.type':
+            # Format sama dengan ResPartnerCarType._compute_formatted_name
+            self.env.cr.execute("""
+                UPDATE res_partner_car_type t
+                   SET formatted_name = concat_ws(' ', b.name, t.name)
+                  FROM res_partner_car_brand b
+                 WHERE b.id = t.brand
+                   AND t.id IN %s
+                   AND t.formatted_name IS DISTINCT FROM concat_ws(' ', b.name, t.name)
+            """, [tuple(res_ids)])
+            self.env['res.partner.car.type'].invalidate_model(['formatted_name'])
+        elif res_model == 'res.partner.car':
+            # Format sama dengan ResPartnerCar._compute_name
+            self.env.cr.execute("""
+                UPDATE res_partner_car c
+                   SET name = concat_ws(' ', c.number_plate, b.name, t.name)
+                  FROM res_partner_car_brand b, res_partner_car_type t
+                 WHERE b.id = c.brand
+                   AND t.id = c.brand_type
+                   AND c.id IN %s
+                   AND c.name IS DISTINCT FROM concat_ws(' ', c.number_plate, b.name, t.name)
+            """, [tuple(res_ids)])
+            self.env['res.partner.car'].invalidate_model(['name'])
+            self.env['sale.order']._refresh_car_details_sql(res_ids)
+            self.env['account.move']._refresh_car_details_sql(res_ids)
+
+    @api.model
+    def _cron_process_queue(self, chunk_size=5000, max_chunks=20):
+        for _i in range(max_chunks):
+            self.env.cr.execute("""
+                SELECT id, res_model, res_id
+                  FROM pitcar_car_recompute
+                 WHERE state = 'pending'
+              ORDER BY res_model DESC, id
+                 LIMIT %s
+            """, [chunk_size])
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            # Type diproses sebelum mobil, nama mobil tidak bergantung pada formatted_name
+            by_model = {}
+            for _queue_id, res_model, res_id in rows:
+                by_model.setdefault(res_model, set()).add(res_id)
+            for res_model, res_ids in by_model.items():
+                self._recompute(res_model, list(res_ids))
+            self.env.cr.execute("""
+                UPDATE pitcar_car_recompute
+                   SET state = 'done', done_date = NOW() AT TIME ZONE 'UTC'
+                 WHERE id IN %s
+            """, [tuple(row[0] for row in rows)])
+            _logger.info("Car master data recompute: processed %s queued records", len(rows))
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        else:
+            # Masih ada antrian, jadwalkan cron lagi tanpa menunggu interval
+            self.env.ref('pitcar_custom.ir_cron_car_recompute')._trigger()
+
+        self.env.cr.execute("""
+            DELETE FROM pitcar_car_recompute
+             WHERE state = 'done' AND done_date < %s
+        """, [fields.Datetime.now() - timedelta(days=7)])
+        self.invalidate_model()
+
+    def action_process_now(self):
+        self._cron_process_queue()
+        return True
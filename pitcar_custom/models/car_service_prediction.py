@@ -0,0 +1,127 @@
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Minimal histori supaya laju km/hari mobil dipakai, selain itu pakai median tipe mobil
+MIN_READINGS = 2
+MIN_SPAN_DAYS = 14
+
+
+class ResPartnerCar(models.Model):
+    _inherit = 'res.partner.car'
+
+    km_per_day = fields.Float(string="KM per Day", readonly=True, digits=(16, 1))
+    km_per_day_source = fields.Selection([
+        ('history', 'Car History'),
+        ('type_median', 'Car Type Median'),
+        ('fleet_median', 'Fleet Median'),
+        ('default', 'Default'),
+    ], string="KM per Day Based On", readonly=True)
+    predicted_service_km = fields.Float(string="Next Service (KM)", readonly=True)
+    predicted_service_date = fields.Date(string="Next Service Date", readonly=True, index=True)
+
+    @api.model
+    def _get_service_prediction_params(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return {
+            'interval_km': float(get_param('pitcar_custom.service_interval_km', 5000)),
+            'interval_days': int(get_param('pitcar_custom.service_interval_days', 180)),
+            'default_rate': float(get_param('pitcar_custom.service_default_km_per_day', 30)),
+            'min_readings': MIN_READINGS,
+            'min_span_days': MIN_SPAN_DAYS,
+        }
+
+    @api.model
+    def _cron_predict_service(self):
+        """Predict every car's next service from its odometer history.
+
+        One set-based pass: a least-squares km/day slope per car
+        (``regr_slope``), the brand-type median for cars with too little
+        history, then the next service is the earlier of the km interval
+        reached at that rate and the day interval after the last service.
+        Only rows whose prediction changed are written.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            WITH fit AS (
+                SELECT car_id,
+                       regr_slope(odometer, EXTRACT(EPOCH FROM reading_date) / 86400.0) AS rate,
+                       COUNT(*) AS readings,
+                       EXTRACT(EPOCH FROM MAX(reading_date) - MIN(reading_date)) / 86400.0 AS span_days
+                  FROM res_partner_car_odometer
+              GROUP BY car_id
+            ),
+            last_reading AS (
+                SELECT DISTINCT ON (car_id) car_id, reading_date, odometer
+                  FROM res_partner_car_odometer
+              ORDER BY car_id, reading_date DESC, id DESC
+            ),
+            last_service AS (
+                SELECT partner_car_id AS car_id, MAX(date_completed) AS service_date
+                  FROM sale_order
+                 WHERE partner_car_id IS NOT NULL AND date_completed IS NOT NULL
+              GROUP BY partner_car_id
+            ),
+            car_rates AS (
+                SELECT c.id, c.brand_type,
+                       CASE WHEN f.readings >= %(min_readings)s
+                             AND f.span_days >= %(min_span_days)s
+                             AND f.rate > 0
+                            THEN f.rate END AS own_rate
+                  FROM res_partner_car c
+             LEFT JOIN fit f ON f.car_id = c.id
+            ),
+            type_medians AS (
+                SELECT brand_type, percentile_cont(0.5) WITHIN GROUP (ORDER BY own_rate) AS rate
+                  FROM car_rates
+                 WHERE own_rate IS NOT NULL
+              GROUP BY brand_type
+            ),
+            fleet_median AS (
+                SELECT percentile_cont(0.5) WITHIN GROUP (ORDER BY own_rate) AS rate
+                  FROM car_rates
+                 WHERE own_rate IS NOT NULL
+            ),
+            prediction AS (
+                SELECT cr.id,
+                       COALESCE(cr.own_rate, tm.rate, fm.rate, %(default_rate)s) AS rate,
+                       CASE WHEN cr.own_rate IS NOT NULL THEN 'history'
+                            WHEN tm.rate IS NOT NULL THEN 'type_median'
+                            WHEN fm.rate IS NOT NULL THEN 'fleet_median'
+                            ELSE 'default' END AS source,
+                       lr.reading_date,
+                       lr.odometer,
+                       ls.service_date
+                  FROM car_rates cr
+             LEFT JOIN type_medians tm ON tm.brand_type = cr.brand_type
+            CROSS JOIN fleet_median fm
+             LEFT JOIN last_reading lr ON lr.car_id = cr.id
+             LEFT JOIN last_service ls ON ls.car_id = cr.id
+            ),
+            result AS (
+                SELECT id,
+                       round(rate::numeric, 1)::float AS rate,
+                       source,
+                       odometer + %(interval_km)s AS next_km,
+                       -- LEAST mengabaikan NULL: mobil tanpa bacaan odometer hanya pakai interval hari
+                       LEAST(
+                           service_date::date + %(interval_days)s,
+                           reading_date::date + CEIL(%(interval_km)s / NULLIF(rate, 0))::int
+                       ) AS next_date
+                  FROM prediction
+            )
+            UPDATE res_partner_car c
+               SET km_per_day = r.rate,
+                   km_per_day_source = r.source,
+                   predicted_service_km = r.next_km,
+                   predicted_service_date = r.next_date
+              FROM result r
+             WHERE c.id = r.id
+               AND (c.km_per_day, c.km_per_day_source, c.predicted_service_km, c.predicted_service_date)
+                   IS DISTINCT FROM (r.rate, r.source, r.next_km, r.next_date)
+        """, self._get_service_prediction_params())
+        updated = self.env.cr.rowcount
+        self.invalidate_model(['km_per_day', 'km_per_day_source', 'predicted_service_km', 'predicted_service_date'])
+        _logger.info("Service prediction: %s cars updated", updated)
+        return updated
@@ -0,0 +1,90 @@
+from odoo import models, api
+from odoo.osv import expression
+from .pitcar_perf_log import profiled
+import time
+
+# Cache hitungan per proses:
+# {(dbname, comodel, group_field, domain, uid, su, companies, active_test): (expire_at, {id: count})}
+_COUNT_CACHE = {}
+
+
+def invalidate_count_cache(env, model_name):
+    if not _COUNT_CACHE:
+        return
+    for key in [key for key in _COUNT_CACHE if key[0] == env.cr.dbname and key[1] == model_name]:
+        _COUNT_CACHE.pop(key, None)
+
+
+class PitcarCountMixin(models.AbstractModel):
+    _name = 'pitcar.count.mixin'
+    _description = 'Grouped Relation Counter'
+
+    @profiled
+    def _count_related(self, comodel_name, group_field, domain=None, use_cache=True):
+        """Return ``{id: count}`` of ``comodel_name`` records linked to ``self``.
+
+        The whole recordset is counted with one grouped query on
+        ``group_field`` (many2one or many2many on the comodel). When the
+        ``pitcar_custom.count_cache_ttl`` parameter is set, results are
+        kept for that many seconds or until the comodel is written, per
+        user and allowed companies since record rules apply.
+        """
+        ids = [record_id for record_id in self._origin.ids if record_id]
+        if not ids:
+            return {}
+
+        ttl = use_cache and self._get_count_cache_ttl()
+        # _read_group menerapkan record rule, jadi hasil hanya berlaku untuk user dan company yang sama
+        key = (
+            self.env.cr.dbname, comodel_name, group_field, repr(domain or []),
+            self.env.uid, self.env.su, tuple(self.env.companies.ids),
+            self.env.context.get('active_test', True),
+        )
+        now = time.monotonic()
+        cached = _COUNT_CACHE.get(key) if ttl else None
+        if cached and cached[0] > now and all(record_id in cached[1] for record_id in ids):
+            return cached[1]
+
+        counts = dict.fromkeys(ids, 0)
+        groups = self.env[comodel_name]._read_group(
+            expression.AND([[(group_field, 'in', ids)], domain or []]),
+            [group_field], [group_field], lazy=False,
+        )
+        for group in groups:
+            value = group[group_field]
+            record_id = value[0] if isinstance(value, tuple) else value
+            if record_id in counts:
+                counts[record_id] = group['__count']
+
+        if ttl:
+            if cached and cached[0] > now:
+                counts = {**cached[1], **counts}
+            _COUNT_CACHE[key] = (now + ttl, counts)
+        return counts
+
+    @api.model
+    def _get_count_cache_ttl(self):
+        ttl = self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.count_cache_ttl', 0)
+        try:
+            return max(int(ttl), 0)
+        except (TypeError, ValueError):
+            return 0
+
+
+class PitcarCountSourceMixin(models.AbstractModel):
+    """Clears cached counts when a counted model is created, written or deleted."""
+    _name = 'pitcar.count.source.mixin'
+    _description = 'Counted Model Cache Invalidation'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        invalidate_count_cache(self.env, self._name)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        invalidate_count_cache(self.env, self._name)
+        return super().write(vals)
+
+    def unlink(self):
+        invalidate_count_cache(self.env, self._name)
+        return super().unlink()
@@ -1,7 +1,11 @@
 from odoo import models, fields, api, _, exceptions
 
+class CrmLead(models.Model):
+	_inherit = ['crm.lead', 'pitcar.count.source.mixin']
+
+
 class CrmTag(models.Model):
-	_inherit = 'crm.tag'
+	_inherit = ['crm.tag', 'pitcar.count.mixin']
 
 	crm_lead_ids = fields.Many2many('crm.lead', 'crm_tag_rel', 'tag_id', 'lead_id', string='Leads')
 	sale_order_ids = fields.Many2many('sale.order', 'sale_order_tag_rel', 'tag_id', 'order_id', string='Sales Orders')
@@ -9,5 +13,7 @@ class CrmTag(models.Model):
 
 	@api.depends('crm_lead_ids', 'sale_order_ids')
 	def _compute_crm_lead_ids_count(self):
+		lead_counts = self._count_related('crm.lead', 'tag_ids')
+		order_counts = self._count_related('sale.order', 'tag_ids')
 		for tag in self:
-			tag.crm_lead_ids_count = len(tag.crm_lead_ids) + len(tag.sale_order_ids)
\ No newline at end of file
+			tag.crm_lead_ids_count = lead_counts.get(tag._origin.id, 0) + order_counts.get(tag._origin.id, 0)
\ No newline at end of file
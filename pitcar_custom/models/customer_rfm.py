@@ -0,0 +1,232 @@
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+LAST_RUN_PARAM = 'pitcar_custom.rfm_last_run'
+
+RFM_SEGMENTS = [
+    ('champion', 'Champion'),
+    ('loyal', 'Loyal'),
+    ('new', 'New'),
+    ('potential', 'Potential'),
+    ('at_risk', 'At Risk'),
+    ('hibernating', 'Hibernating'),
+    ('lost', 'Lost'),
+]
+
+# Order yang dihitung: sudah selesai (diinvoice) dan tidak dibatalkan
+COMPLETED_ORDER = "so.date_completed IS NOT NULL AND so.state IN ('sale', 'done')"
+
+
+class PitcarRfmMixin(models.AbstractModel):
+    """Recency, frequency, monetary scores and lifetime value from completed orders.
+
+    The columns are filled by ``_refresh_rfm`` in SQL: totals are
+    recomputed for the given records only, then scores (1-5, by quintile
+    over all scored records) are rewritten where they changed.
+    """
+    _name = 'pitcar.rfm.mixin'
+    _description = 'RFM Scoring'
+
+    # Kolom sale_order yang menunjuk ke record ini
+    _rfm_order_column = None
+
+    rfm_first_order_date = fields.Date(string="First Service", readonly=True)
+    rfm_last_order_date = fields.Date(string="Last Service", readonly=True, index='btree_not_null')
+    rfm_frequency = fields.Integer(string="Completed Orders", readonly=True)
+    rfm_monetary = fields.Float(string="Total Spent", readonly=True, digits='Account')
+    rfm_recency_score = fields.Integer(string="Recency Score", readonly=True, group_operator="avg")
+    rfm_frequency_score = fields.Integer(string="Frequency Score", readonly=True, group_operator="avg")
+    rfm_monetary_score = fields.Integer(string="Monetary Score", readonly=True, group_operator="avg")
+    rfm_segment = fields.Selection(RFM_SEGMENTS, string="Segment", readonly=True, index='btree_not_null')
+    lifetime_value = fields.Float(string="Lifetime Value", readonly=True, digits='Account', index='btree_not_null')
+
+    @api.model
+    def _refresh_rfm(self, ids=None):
+        """Recompute totals of ``ids`` (all records when None), then rescore everyone."""
+        self.env.flush_all()
+        table = self._table
+        column = self._rfm_order_column
+        if ids is None:
+            target = """
+                SELECT id FROM {table} WHERE rfm_frequency > 0
+                 UNION
+                SELECT DISTINCT so.{column} FROM sale_order so WHERE so.{column} IS NOT NULL AND {completed}
+            """.format(table=table, column=column, completed=COMPLETED_ORDER)
+        else:
+            target = "SELECT unnest(%(ids)s::int[]) AS id"
+        ltv_years = float(self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.rfm_ltv_years', 3))
+
+        # 1. Total per record, hanya untuk target
+        updated = 0
+        if ids is None or ids:
+            self.env.cr.execute("""
+                WITH target AS ({target}),
+                totals AS (
+                    SELECT t.id,
+                           MIN(so.date_completed)::date AS first_date,
+                           MAX(so.date_completed)::date AS last_date,
+                           COUNT(so.id) AS frequency,
+                           COALESCE(SUM(so.amount_total), 0) AS monetary
+                      FROM target t
+                 LEFT JOIN sale_order so ON so.{column} = t.id AND {completed}
+                  GROUP BY t.id
+                )
+                UPDATE {table} r
+                   SET rfm_first_order_date = t.first_date,
+                       rfm_last_order_date = t.last_date,
+                       rfm_frequency = t.frequency,
+                       rfm_monetary = t.monetary,
+                       -- Belanja per tahun (minimal satu tahun masa pelanggan) x perkiraan lama jadi pelanggan
+                       lifetime_value = ROUND((t.monetary / GREATEST((t.last_date - t.first_date) / 365.0, 1)
+                                               * %(ltv_years)s)::numeric, 2),
+                       rfm_recency_score = CASE WHEN t.frequency > 0 THEN r.rfm_recency_score END,
+                       rfm_frequency_score = CASE WHEN t.frequency > 0 THEN r.rfm_frequency_score END,
+                       rfm_monetary_score = CASE WHEN t.frequency > 0 THEN r.rfm_monetary_score END,
+                       rfm_segment = CASE WHEN t.frequency > 0 THEN r.rfm_segment END
+                  FROM totals t
+                 WHERE r.id = t.id
+                   AND (r.rfm_first_order_date, r.rfm_last_order_date, r.rfm_frequency, r.rfm_monetary)
+                       IS DISTINCT FROM (t.first_date, t.last_date, t.frequency::int, t.monetary::float)
+            """.format(target=target, table=table, column=column, completed=COMPLETED_ORDER),
+                {'ids': list(ids or []), 'ltv_years': ltv_years})
+            updated = self.env.cr.rowcount
+
+        # 2. Skor kuintil; recency ikut bergeser setiap hari, jadi dihitung untuk semua
+        # record yang punya order tapi hanya ditulis jika skornya berubah
+        self.env.cr.execute("""
+            WITH base AS (
+                SELECT id, %(today)s::date - rfm_last_order_date AS recency_days,
+                       rfm_frequency, rfm_monetary
+                  FROM {table}
+                 WHERE rfm_frequency > 0
+            ),
+            quintiles AS (
+                SELECT percentile_cont(ARRAY[0.2, 0.4, 0.6, 0.8]) WITHIN GROUP (ORDER BY recency_days) AS r,
+                       percentile_cont(ARRAY[0.2, 0.4, 0.6, 0.8]) WITHIN GROUP (ORDER BY rfm_frequency) AS f,
+                       percentile_cont(ARRAY[0.2, 0.4, 0.6, 0.8]) WITHIN GROUP (ORDER BY rfm_monetary) AS m
+                  FROM base
+            ),
+            scores AS (
+                SELECT b.id,
+                       1 + (b.recency_days < q.r[1])::int + (b.recency_days < q.r[2])::int
+                         + (b.recency_days < q.r[3])::int + (b.recency_days < q.r[4])::int AS r_score,
+                       1 + (b.rfm_frequency > q.f[1])::int + (b.rfm_frequency > q.f[2])::int
+                         + (b.rfm_frequency > q.f[3])::int + (b.rfm_frequency > q.f[4])::int AS f_score,
+                       1 + (b.rfm_monetary > q.m[1])::int + (b.rfm_monetary > q.m[2])::int
+                         + (b.rfm_monetary > q.m[3])::int + (b.rfm_monetary > q.m[4])::int AS m_score
+                  FROM base b
+            CROSS JOIN quintiles q
+            ),
+            segments AS (
+                SELECT id, r_score, f_score, m_score,
+                       CASE WHEN r_score >= 4 AND f_score >= 4 THEN 'champion'
+                            WHEN r_score >= 3 AND f_score >= 3 THEN 'loyal'
+                            WHEN r_score >= 4 AND f_score = 1 THEN 'new'
+                            WHEN r_score >= 3 THEN 'potential'
+                            WHEN f_score >= 3 THEN 'at_risk'
+                            WHEN r_score = 2 THEN 'hibernating'
+                            ELSE 'lost' END AS segment
+                  FROM scores
+            )
+            UPDATE {table} r
+               SET rfm_recency_score = s.r_score,
+                   rfm_frequency_score = s.f_score,
+                   rfm_monetary_score = s.m_score,
+                   rfm_segment = s.segment
+              FROM segments s
+             WHERE r.id = s.id
+               AND (r.rfm_recency_score, r.rfm_frequency_score, r.rfm_monetary_score, r.rfm_segment)
+                   IS DISTINCT FROM (s.r_score, s.f_score, s.m_score, s.segment)
+        """.format(table=table), {'today': fields.Date.context_today(self)})
+        rescored = self.env.cr.rowcount
+        self.invalidate_model([fname for fname in self._fields if fname.startswith('rfm_')] + ['lifetime_value'])
+        _logger.info("RFM %s: %s totals updated, %s rescored", self._name, updated, rescored)
+        return updated
+
+
+class PitcarRfmChange(models.Model):
+    """Previous owners of orders moved to another customer or car.
+
+    ``write_date`` of the order only points the nightly RFM run to the
+    new owner, the old one is queued here and drained by the cron.
+    """
+    _name = 'pitcar.rfm.change'
+    _description = 'RFM Refresh Queue'
+    _rec_name = 'res_model'
+
+    res_model = fields.Selection([
+        ('res.partner', 'Customer'),
+        ('res.partner.car', 'Car'),
+    ], string="Model", required=True, readonly=True)
+    res_id = fields.Integer(string="Record ID", required=True, readonly=True)
+
+    _sql_constraints = [
+        ('model_res_uniq', 'unique (res_model, res_id)', "Record already queued for RFM refresh !"),
+    ]
+
+    @api.model
+    def _enqueue(self, res_model, res_ids):
+        res_ids = list(set(res_ids))
+        if not res_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO pitcar_rfm_change (res_model, res_id, create_uid, create_date, write_uid, write_date)
+            SELECT %(model)s, ids.id, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(ids)s::int[]) AS ids(id)
+            ON CONFLICT (res_model, res_id) DO NOTHING
+        """, {'model': res_model, 'ids': res_ids, 'uid': self.env.uid})
+
+    @api.model
+    def _enqueue_order_owners(self, orders):
+        """Queue the current customer and car of ``orders`` before they change."""
+        self._enqueue('res.partner', orders.partner_id.ids)
+        self._enqueue('res.partner.car', orders.partner_car_id.ids)
+
+    @api.model
+    def _drain(self):
+        """Remove and return the queued ids as ``{res_model: [ids]}``."""
+        self.env.cr.execute("DELETE FROM pitcar_rfm_change RETURNING res_model, res_id")
+        queued = {'res.partner': [], 'res.partner.car': []}
+        for res_model, res_id in self.env.cr.fetchall():
+            queued[res_model].append(res_id)
+        return queued
+
+
+class ResPartner(models.Model):
+    _inherit = ['res.partner', 'pitcar.rfm.mixin']
+    _rfm_order_column = 'partner_id'
+
+    @api.model
+    def _cron_compute_rfm(self):
+        """Score customers and cars, recomputing totals only where orders changed.
+
+        Previous owners queued in ``pitcar.rfm.change`` are refreshed too.
+        """
+        started = fields.Datetime.now()
+        Param = self.env['ir.config_parameter'].sudo()
+        last_run = Param.get_param(LAST_RUN_PARAM)
+        Car = self.env['res.partner.car']
+        queued = self.env['pitcar.rfm.change']._drain()
+        if not last_run:
+            self._refresh_rfm()
+            Car._refresh_rfm()
+        else:
+            self.env.flush_all()
+            self.env.cr.execute("""
+                SELECT ARRAY_AGG(DISTINCT partner_id) FILTER (WHERE partner_id IS NOT NULL),
+                       ARRAY_AGG(DISTINCT partner_car_id) FILTER (WHERE partner_car_id IS NOT NULL)
+                  FROM sale_order
+                 WHERE write_date >= %s
+            """, [last_run])
+            partner_ids, car_ids = self.env.cr.fetchone()
+            # Dipanggil juga tanpa order baru supaya skor recency tetap mengikuti tanggal
+            self._refresh_rfm(list(set(partner_ids or []) | set(queued['res.partner'])))
+            Car._refresh_rfm(list(set(car_ids or []) | set(queued['res.partner.car'])))
+        Param.set_param(LAST_RUN_PARAM, fields.Datetime.to_string(started))
+
+
+class ResPartnerCar(models.Model):
+    _inherit = ['res.partner.car', 'pitcar.rfm.mixin']
+    _rfm_order_column = 'partner_car_id'
\ No newline at end of file
@@ -0,0 +1,86 @@
+from odoo import models, api
+from odoo.tools import split_every
+from .pitcar_perf_log import profiled
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PitcarMechanicTeamMixin(models.AbstractModel):
+    """Shared ``generated_mechanic_team`` for documents with ``car_mechanic_id_new``.
+
+    The team string is built for the whole recordset with one
+    ``string_agg`` over the many2many relation table, in the same order
+    as the mechanics' ``_order`` (name).
+    """
+    _name = 'pitcar.mechanic.team.mixin'
+    _description = 'Mechanic Team Name'
+
+    def _mechanic_team_relation(self):
+        field = self._fields['car_mechanic_id_new']
+        return field.relation, field.column1, field.column2
+
+    @profiled
+    @api.depends('car_mechanic_id_new')
+    def _compute_generated_mechanic_team(self):
+        stored = self.filtered(lambda record: isinstance(record.id, int))
+        teams = {}
+        if stored:
+            relation, column1, column2 = self._mechanic_team_relation()
+            stored.flush_recordset(['car_mechanic_id_new'])
+            self.env['pitcar.mechanic.new'].flush_model(['name'])
+            self.env.cr.execute("""
+                SELECT rel."{column1}", string_agg(m.name, ', ' ORDER BY m.name, m.id)
+                  FROM "{relation}" rel
+                  JOIN pitcar_mechanic_new m ON m.id = rel."{column2}"
+                 WHERE rel."{column1}" IN %s
+              GROUP BY rel."{column1}"
+            """.format(relation=relation, column1=column1, column2=column2), [tuple(stored.ids)])
+            teams = dict(self.env.cr.fetchall())
+        for record in self:
+            if isinstance(record.id, int):
+                record.generated_mechanic_team = teams.get(record.id) or False
+            else:
+                # Record baru di form (onchange) belum ada di tabel relasi
+                record.generated_mechanic_team = ', '.join(record.car_mechanic_id_new.mapped('name')) or False
+
+    @api.model
+    def _recompute_mechanic_team_sql(self, mechanic_ids=None, chunk_size=10000, commit=False):
+        """Rebuild the stored team string in chunks of ``chunk_size`` documents.
+
+        Limited to documents of ``mechanic_ids`` when given, otherwise every
+        document of the model is refreshed.
+        """
+        relation, column1, column2 = self._mechanic_team_relation()
+        self.env.flush_all()
+        if mechanic_ids:
+            self.env.cr.execute("""
+                SELECT DISTINCT "{column1}" FROM "{relation}" WHERE "{column2}" IN %s ORDER BY 1
+            """.format(relation=relation, column1=column1, column2=column2), [tuple(mechanic_ids)])
+        else:
+            self.env.cr.execute('SELECT id FROM "{table}" ORDER BY id'.format(table=self._table))
+        doc_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        updated = 0
+        for chunk in split_every(chunk_size, doc_ids):
+            self.env.cr.execute("""
+                UPDATE "{table}" doc
+                   SET generated_mechanic_team = agg.team
+                  FROM (SELECT d.id, string_agg(m.name, ', ' ORDER BY m.name, m.id) AS team
+                          FROM unnest(%s) AS d(id)
+                     LEFT JOIN "{relation}" rel ON rel."{column1}" = d.id
+                     LEFT JOIN pitcar_mechanic_new m ON m.id = rel."{column2}"
+                      GROUP BY d.id) agg
+                 WHERE doc.id = agg.id
+                   AND doc.generated_mechanic_team IS DISTINCT FROM agg.team
+            """.format(table=self._table, relation=relation, column1=column1, column2=column2), [list(chunk)])
+            updated += self.env.cr.rowcount
+            if commit and not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        self.invalidate_model(['generated_mechanic_team'])
+        _logger.info("%s: refreshed mechanic team on %s documents", self._name, updated)
+        return updated
+
+    @api.model
+    def _get_mechanic_team_models(self):
+        return list(self.env.registry[self._name]._inherit_children)
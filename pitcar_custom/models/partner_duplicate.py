@@ -0,0 +1,229 @@
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Dokumen yang berpindah customer saat merge, field turunan partner_id dihitung ulang
+MERGE_RECOMPUTE_MODELS = ('res.partner.car', 'sale.order', 'account.move', 'stock.picking')
+
+
+class PitcarPartnerDuplicate(models.Model):
+    """Merge suggestion for two customer records.
+
+    Candidates are blocked on the normalized phone, on cars serviced under
+    another customer than their owner, and on trigram name similarity, so
+    only pairs sharing one of those are ever scored. ``partner_id`` is the
+    record that is kept.
+
+    The pair is stored as plain ids and names, not foreign keys, so the
+    contact merge neither re-points nor deletes the suggestions and
+    merged or dismissed pairs stay as history.
+    """
+    _name = 'pitcar.partner.duplicate'
+    _description = 'Duplicate Customer Suggestion'
+    _order = 'state, score desc, id'
+
+    partner_res_id = fields.Integer(string="Keep ID", required=True, readonly=True, index=True)
+    duplicate_res_id = fields.Integer(string="Duplicate ID", required=True, readonly=True, index=True)
+    partner_name = fields.Char(string="Keep (Name)", readonly=True)
+    duplicate_name = fields.Char(string="Duplicate (Name)", readonly=True)
+    # Kosong setelah customer dihapus (mis. duplikat yang sudah di-merge)
+    partner_id = fields.Many2one('res.partner', string="Keep", compute='_compute_partners')
+    duplicate_id = fields.Many2one('res.partner', string="Duplicate", compute='_compute_partners')
+    partner_phone = fields.Char(related='partner_id.phone', string="Phone (Keep)")
+    duplicate_phone = fields.Char(related='duplicate_id.phone', string="Phone (Duplicate)")
+    score = fields.Float(string="Score", readonly=True, digits=(16, 2))
+    same_phone = fields.Boolean(string="Same Phone", readonly=True)
+    shared_car = fields.Boolean(string="Shared Car", readonly=True,
+                                help="A car of one customer was serviced under the other customer.")
+    name_similarity = fields.Float(string="Name Similarity", readonly=True, digits=(16, 2))
+    state = fields.Selection([
+        ('pending', 'To Review'),
+        ('merged', 'Merged'),
+        ('dismissed', 'Dismissed'),
+    ], string="Status", default='pending', required=True, index=True)
+
+    _sql_constraints = [
+        ('pair_uniq', 'unique (partner_res_id, duplicate_res_id)', "This pair is already suggested !"),
+        ('pair_check', 'CHECK (partner_res_id != duplicate_res_id)', "A customer cannot duplicate itself !"),
+    ]
+
+    @api.depends('partner_res_id', 'duplicate_res_id')
+    def _compute_partners(self):
+        existing = self.env['res.partner'].browse(
+            list(set(self.mapped('partner_res_id')) | set(self.mapped('duplicate_res_id')))).exists()
+        for suggestion in self:
+            suggestion.partner_id = existing.browse(suggestion.partner_res_id) & existing
+            suggestion.duplicate_id = existing.browse(suggestion.duplicate_res_id) & existing
+
+    @api.model
+    def _get_detection_params(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return {
+            'batch_size': int(get_param('pitcar_custom.duplicate_batch_size', 5000)),
+            'name_threshold': float(get_param('pitcar_custom.duplicate_name_threshold', 0.8)),
+            'min_score': float(get_param('pitcar_custom.duplicate_min_score', 0.45)),
+            'weight_phone': 0.5,
+            'weight_car': 0.5,
+            'weight_name': 0.5,
+        }
+
+    @api.model
+    def _cron_detect_duplicates(self):
+        """Score candidate pairs in id batches and upsert the suggestions.
+
+        Pairs are stored as (lower id, higher id); a pair that was merged,
+        dismissed or swapped is never suggested again.
+        """
+        params = self._get_detection_params()
+        has_trigram = self.env.registry.has_trigram
+        self.env.flush_all()
+        self.env.cr.execute("SELECT MIN(id), MAX(id) FROM res_partner WHERE active")
+        min_id, max_id = self.env.cr.fetchone()
+        if not min_id:
+            return 0
+        name_block = """
+            UNION ALL
+            SELECT a.id, b.id, FALSE, FALSE
+              FROM res_partner a
+              JOIN res_partner b ON b.name %% a.name AND b.id > a.id AND b.active
+             WHERE a.id BETWEEN %(start)s AND %(stop)s AND a.active
+        """ if has_trigram else ""
+        similarity = "similarity(a.name, b.name)" if has_trigram else "CASE WHEN lower(a.name) = lower(b.name) THEN 1.0 ELSE 0.0 END"
+
+        suggested = 0
+        for start in range(min_id, max_id + 1, params['batch_size']):
+            if has_trigram:
+                # Berlaku sampai akhir transaksi (commit per batch)
+                self.env.cr.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                                    [str(params['name_threshold'])])
+            self.env.cr.execute("""
+                WITH candidates (low_id, high_id, same_phone, shared_car) AS (
+                    SELECT a.id, b.id, TRUE, FALSE
+                      FROM res_partner a
+                      JOIN res_partner b ON b.phone_normalized = a.phone_normalized AND b.id > a.id AND b.active
+                     WHERE a.id BETWEEN %(start)s AND %(stop)s AND a.active
+                    UNION ALL
+                    -- Mobil milik customer A diservis atas nama customer B
+                    SELECT DISTINCT LEAST(so.partner_id, car.partner_id), GREATEST(so.partner_id, car.partner_id),
+                           FALSE, TRUE
+                      FROM sale_order so
+                      JOIN res_partner_car car ON car.id = so.partner_car_id
+                     WHERE so.partner_id != car.partner_id
+                       AND LEAST(so.partner_id, car.partner_id) BETWEEN %(start)s AND %(stop)s
+                    {name_block}
+                ),
+                pairs AS (
+                    SELECT low_id, high_id, bool_or(same_phone) AS same_phone, bool_or(shared_car) AS shared_car
+                      FROM candidates
+                  GROUP BY low_id, high_id
+                ),
+                scored AS (
+                    SELECT p.low_id, p.high_id, a.name AS low_name, b.name AS high_name,
+                           p.same_phone, p.shared_car,
+                           {similarity} AS name_similarity
+                      FROM pairs p
+                      JOIN res_partner a ON a.id = p.low_id
+                      JOIN res_partner b ON b.id = p.high_id
+                     -- Kontak di bawah perusahaan yang sama memang boleh berbagi nomor
+                     WHERE a.commercial_partner_id != b.commercial_partner_id
+                       AND a.active AND b.active
+                )
+                INSERT INTO pitcar_partner_duplicate
+                    (partner_res_id, duplicate_res_id, partner_name, duplicate_name,
+                     score, same_phone, shared_car, name_similarity, state,
+                     create_uid, create_date, write_uid, write_date)
+                SELECT low_id, high_id, low_name, high_name,
+                       LEAST(same_phone::int * %(weight_phone)s + shared_car::int * %(weight_car)s
+                             + name_similarity * %(weight_name)s, 1.0),
+                       same_phone, shared_car, name_similarity, 'pending',
+                       %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+                  FROM scored s
+                 WHERE same_phone::int * %(weight_phone)s + shared_car::int * %(weight_car)s
+                       + name_similarity * %(weight_name)s >= %(min_score)s
+                   AND NOT EXISTS (
+                        SELECT 1 FROM pitcar_partner_duplicate d
+                         WHERE d.partner_res_id = s.high_id AND d.duplicate_res_id = s.low_id)
+                ON CONFLICT (partner_res_id, duplicate_res_id) DO UPDATE
+                   SET partner_name = EXCLUDED.partner_name,
+                       duplicate_name = EXCLUDED.duplicate_name,
+                       score = EXCLUDED.score,
+                       same_phone = EXCLUDED.same_phone,
+                       shared_car = EXCLUDED.shared_car,
+                       name_similarity = EXCLUDED.name_similarity,
+                       write_date = EXCLUDED.write_date
+                 WHERE pitcar_partner_duplicate.state = 'pending'
+            """.format(name_block=name_block, similarity=similarity), dict(
+                params, start=start, stop=start + params['batch_size'] - 1, uid=self.env.uid))
+            suggested += self.env.cr.rowcount
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        self.invalidate_model()
+        _logger.info("Duplicate detection: %s suggestions created or updated", suggested)
+        return suggested
+
+    def action_merge(self):
+        """Merge the duplicates into the kept partners with the standard contact merge.
+
+        ``base.partner.merge.automatic.wizard`` re-points every foreign key
+        and deletes the duplicate; fields computed from ``partner_id`` on
+        the moved documents and the kept partners' RFM are refreshed after.
+        Only administrators skip the wizard's journal items and email checks.
+        """
+        self.check_access_rights('write')
+        pending = self.filtered(lambda d: d.state == 'pending')
+        # Customer yang sudah dihapus di luar merge tidak bisa di-merge lagi
+        gone = pending.filtered(lambda d: not d.partner_id or not d.duplicate_id)
+        gone.write({'state': 'dismissed'})
+        pending -= gone
+        # Rantai A <- B <- C diselesaikan ke A, pasangan yang saling merge dilewati
+        targets = {}
+        for suggestion in pending.sorted('score', reverse=True):
+            duplicate_id, keep_id = suggestion.duplicate_res_id, suggestion.partner_res_id
+            if duplicate_id in targets:
+                continue
+            while keep_id in targets:
+                keep_id = targets[keep_id]
+            if keep_id != duplicate_id:
+                targets[duplicate_id] = keep_id
+        if not targets:
+            return True
+        for duplicate_id, keep_id in targets.items():
+            while keep_id in targets:
+                keep_id = targets[keep_id]
+            targets[duplicate_id] = keep_id
+
+        merged = pending.filtered(lambda d: d.duplicate_res_id in targets)
+        merged.write({'state': 'merged'})
+        (pending - merged).write({'state': 'dismissed'})
+
+        moved = [
+            self.env[model_name].sudo().with_context(active_test=False).search([('partner_id', 'in', list(targets))])
+            for model_name in MERGE_RECOMPUTE_MODELS
+            if model_name in self.env
+        ]
+        extra_checks = not self.env.is_admin()
+        Partner = self.env['res.partner'].sudo()
+        Wizard = self.env['base.partner.merge.automatic.wizard'].sudo()
+        for duplicate_id, keep_id in targets.items():
+            Wizard._merge([keep_id, duplicate_id], Partner.browse(keep_id), extra_checks=extra_checks)
+
+        for records in moved:
+            records.exists().modified(['partner_id'])
+        self.env.flush_all()
+        Partner._refresh_rfm(sorted(set(targets.values())))
+        return True
+
+    def action_dismiss(self):
+        self.filtered(lambda d: d.state == 'pending').write({'state': 'dismissed'})
+        return True
+
+    def action_swap(self):
+        for suggestion in self.filtered(lambda d: d.state == 'pending'):
+            suggestion.write({
+                'partner_res_id': suggestion.duplicate_res_id,
+                'duplicate_res_id': suggestion.partner_res_id,
+                'partner_name': suggestion.duplicate_name,
+                'duplicate_name': suggestion.partner_name,
+            })
+        return True
\ No newline at end of file
@@ -0,0 +1,289 @@
+from odoo import models, fields, api, _, exceptions
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# {parameter: (default, minimum, maximum)}
+FORECAST_PARAMS = {
+    'history_weeks': (26, 4, 156),
+    'horizon_weeks': (4, 1, 26),
+    'lead_time_weeks': (2, 0, 26),
+    'decay': (0.85, 0.5, 0.99),
+    'safety_z': (1.65, 0.0, 4.0),
+    'min_factor': (0.5, 0.0, 1.0),
+    'max_factor': (2.0, 1.0, 10.0),
+}
+
+
+class PitcarPartsForecast(models.Model):
+    """Weekly parts demand per product, car brand type and company.
+
+    Rebuilt by ``_cron_compute_forecast`` in one SQL statement from the
+    completed order lines of the last ``history_weeks`` weeks. Weeks
+    without sales count as zero, the level is an exponentially weighted
+    average (newest week weighs most) and the trend is the least squares
+    slope, both from closed-form sums over the sold weeks only. Cars of
+    the brand type due for service in the horizon scale the projection
+    against the usual number of services of that type; types without
+    predicted cars keep a factor of 1.
+    """
+    _name = 'pitcar.parts.forecast'
+    _description = 'Parts Demand Forecast'
+    _order = 'forecast_qty desc, id'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one('product.product', string="Product", readonly=True, index=True)
+    categ_id = fields.Many2one('product.category', string="Product Category", readonly=True)
+    brand_type_id = fields.Many2one('res.partner.car.type', string="Car Type", readonly=True)
+    brand_id = fields.Many2one('res.partner.car.brand', string="Car Brand", readonly=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+    history_qty = fields.Float(string="Sold (History)", readonly=True, digits='Product Unit of Measure')
+    weeks_sold = fields.Integer(string="Weeks with Sales", readonly=True)
+    weekly_avg = fields.Float(string="Weekly Average", readonly=True, digits='Product Unit of Measure', group_operator='sum')
+    weekly_trend = fields.Float(string="Trend per Week", readonly=True, digits='Product Unit of Measure', group_operator='sum')
+    weekly_stddev = fields.Float(string="Weekly Std. Dev.", readonly=True, digits='Product Unit of Measure', group_operator='max')
+    due_cars = fields.Integer(string="Cars Due", readonly=True, group_operator='max')
+    demand_factor = fields.Float(string="Due Cars Factor", readonly=True, digits=(16, 2), group_operator='avg')
+    forecast_qty = fields.Float(string="Forecast (Horizon)", readonly=True, digits='Product Unit of Measure')
+
+    @api.model
+    def _get_forecast_params(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        params = {}
+        for name, (default, minimum, maximum) in FORECAST_PARAMS.items():
+            try:
+                value = type(default)(get_param('pitcar_custom.parts_forecast_%s' % name, default))
+            except (TypeError, ValueError):
+                value = default
+            params[name] = min(max(value, minimum), maximum)
+        return params
+
+    @api.model
+    def _cron_compute_forecast(self, apply_orderpoints=None):
+        """Rebuild the forecast; also update reordering rules when
+        ``pitcar_custom.parts_forecast_apply_orderpoints`` is set."""
+        inserted = self._compute_forecast()
+        if apply_orderpoints is None:
+            apply_orderpoints = self.env['ir.config_parameter'].sudo().get_param(
+                'pitcar_custom.parts_forecast_apply_orderpoints', 'False').lower() in ('1', 'true', 'yes')
+        if apply_orderpoints:
+            self._apply_orderpoints()
+        return inserted
+
+    @api.model
+    def _compute_forecast(self):
+        self.env.flush_all()
+        params = self._get_forecast_params()
+        params.update({
+            'today': fields.Date.context_today(self),
+            'uid': self.env.uid,
+        })
+        self.env.cr.execute("TRUNCATE pitcar_parts_forecast")
+        # x = minggu ke- (0 = paling lama, n-1 = minggu ini), y = qty minggu itu
+        # Sum x dan sum x^2 untuk n minggu: n(n-1)/2 dan (n-1)n(2n-1)/6
+        self.env.cr.execute("""
+            WITH lines AS (
+                SELECT sol.product_id,
+                       pt.categ_id,
+                       so.partner_car_brand_type AS brand_type_id,
+                       so.company_id,
+                       (%(today)s::date - so.date_completed::date) / 7 AS age,
+                       sol.product_uom_qty / line_uom.factor * product_uom.factor AS qty
+                  FROM sale_order_line sol
+                  JOIN sale_order so ON so.id = sol.order_id
+                  JOIN product_product pp ON pp.id = sol.product_id
+                  JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                  JOIN uom_uom line_uom ON line_uom.id = sol.product_uom
+                  JOIN uom_uom product_uom ON product_uom.id = pt.uom_id
+                 WHERE so.state IN ('sale', 'done')
+                   AND so.date_completed >= %(today)s::date - 7 * %(history_weeks)s + 1
+                   AND so.date_completed < %(today)s::date + 1
+                   AND sol.display_type IS NULL
+                   AND sol.product_uom_qty > 0
+                   AND pt.type = 'product'
+            ),
+            weekly AS (
+                SELECT product_id, categ_id, brand_type_id, company_id,
+                       %(history_weeks)s - 1 - age AS x, SUM(qty) AS y
+                  FROM lines
+              GROUP BY product_id, categ_id, brand_type_id, company_id, age
+            ),
+            sums AS (
+                SELECT product_id, categ_id, brand_type_id, company_id,
+                       COUNT(*) AS weeks_sold,
+                       SUM(y) AS sum_y,
+                       SUM(y * y) AS sum_yy,
+                       SUM(x * y) AS sum_xy,
+                       SUM(y * power(%(decay)s, %(history_weeks)s - 1 - x)) AS sum_wy,
+                       %(history_weeks)s::float AS n
+                  FROM weekly
+              GROUP BY product_id, categ_id, brand_type_id, company_id
+            ),
+            stats AS (
+                SELECT s.*,
+                       s.sum_wy * (1 - %(decay)s) / (1 - power(%(decay)s, s.n)) AS level,
+                       (s.n * s.sum_xy - s.n * (s.n - 1) / 2 * s.sum_y)
+                           / (s.n * (s.n - 1) * s.n * (2 * s.n - 1) / 6 - power(s.n * (s.n - 1) / 2, 2)) AS trend,
+                       sqrt(GREATEST(s.sum_yy - s.sum_y * s.sum_y / s.n, 0) / (s.n - 1)) AS stddev
+                  FROM sums s
+            ),
+            services AS (
+                SELECT so.partner_car_brand_type AS brand_type_id,
+                       COUNT(*)::float / %(history_weeks)s * %(horizon_weeks)s AS expected
+                  FROM sale_order so
+                 WHERE so.state IN ('sale', 'done')
+                   AND so.partner_car_brand_type IS NOT NULL
+                   AND so.date_completed >= %(today)s::date - 7 * %(history_weeks)s + 1
+                   AND so.date_completed < %(today)s::date + 1
+              GROUP BY so.partner_car_brand_type
+            ),
+            due AS (
+                SELECT car.brand_type AS brand_type_id, COUNT(*) AS due_cars
+                  FROM res_partner_car car
+                 WHERE car.predicted_service_date >= %(today)s::date
+                   AND car.predicted_service_date < %(today)s::date + 7 * %(horizon_weeks)s
+              GROUP BY car.brand_type
+            )
+            INSERT INTO pitcar_parts_forecast
+                (product_id, categ_id, brand_type_id, brand_id, company_id,
+                 history_qty, weeks_sold, weekly_avg, weekly_trend, weekly_stddev,
+                 due_cars, demand_factor, forecast_qty,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT st.product_id, st.categ_id, st.brand_type_id, btype.brand, st.company_id,
+                   st.sum_y, st.weeks_sold, st.level, st.trend, st.stddev,
+                   COALESCE(due.due_cars, 0), f.factor,
+                   -- Rata-rata proyeksi level + trend di minggu 1..horizon
+                   GREATEST(st.level + st.trend * (%(horizon_weeks)s + 1) / 2.0, 0)
+                       * %(horizon_weeks)s * f.factor,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM stats st
+         LEFT JOIN res_partner_car_type btype ON btype.id = st.brand_type_id
+         LEFT JOIN services ON services.brand_type_id = st.brand_type_id
+         LEFT JOIN due ON due.brand_type_id = st.brand_type_id
+             CROSS JOIN LATERAL (
+                SELECT CASE WHEN due.due_cars > 0 AND services.expected > 0
+                            THEN LEAST(GREATEST(due.due_cars / services.expected, %(min_factor)s), %(max_factor)s)
+                            ELSE 1.0
+                       END AS factor
+             ) f
+        """, params)
+        inserted = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("Parts forecast: %s product/car type rows computed", inserted)
+        return inserted
+
+    @api.model
+    def _get_orderpoint_suggestions(self):
+        """Suggested min/max per product and company from the stored forecast.
+
+        Demand of the car types of a product is summed, their weekly
+        deviations are combined as independent, and the main warehouse of
+        the company receives the rule: min covers the lead time plus
+        safety stock, max adds one horizon of demand.
+        """
+        self.flush_model()
+        params = self._get_forecast_params()
+        self.env.cr.execute("""
+            WITH demand AS (
+                SELECT company_id, product_id,
+                       SUM(forecast_qty) AS forecast_qty,
+                       sqrt(SUM(weekly_stddev * weekly_stddev)) AS stddev
+                  FROM pitcar_parts_forecast
+              GROUP BY company_id, product_id
+                HAVING SUM(forecast_qty) > 0
+            )
+            SELECT d.company_id, d.product_id, wh.id, wh.lot_stock_id,
+                   min_qty.value, min_qty.value + CEIL(d.forecast_qty)
+              FROM demand d
+              JOIN LATERAL (
+                    SELECT w.id, w.lot_stock_id
+                      FROM stock_warehouse w
+                     WHERE w.company_id = d.company_id AND w.active
+                  ORDER BY w.sequence, w.id
+                     LIMIT 1
+              ) wh ON TRUE
+             CROSS JOIN LATERAL (
+                SELECT CEIL(d.forecast_qty / %(horizon_weeks)s * %(lead_time_weeks)s
+                            + %(safety_z)s * d.stddev * sqrt(%(lead_time_weeks)s)) AS value
+             ) min_qty
+        """, params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _apply_orderpoints(self):
+        """Write suggestions to reordering rules: one UPDATE for existing
+        rules, one batched create for products without a rule."""
+        Orderpoint = self.env['stock.warehouse.orderpoint']
+        suggestions = self._get_orderpoint_suggestions()
+        if not suggestions:
+            return 0, 0
+        Orderpoint.flush_model()
+        columns = ('company_id', 'product_id', 'warehouse_id', 'location_id', 'min_qty', 'max_qty')
+        params = dict(zip(columns, (list(column) for column in zip(*suggestions))), uid=self.env.uid)
+        suggestion_cte = """
+            WITH s AS (
+                SELECT *
+                  FROM unnest(%(company_id)s::int[], %(product_id)s::int[], %(warehouse_id)s::int[],
+                              %(location_id)s::int[], %(min_qty)s::numeric[], %(max_qty)s::numeric[])
+                    AS s(company_id, product_id, warehouse_id, location_id, min_qty, max_qty)
+            )
+        """
+        self.env.cr.execute(suggestion_cte + """
+            UPDATE stock_warehouse_orderpoint op
+               SET product_min_qty = s.min_qty,
+                   product_max_qty = s.max_qty,
+                   write_uid = %(uid)s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM s
+             WHERE op.product_id = s.product_id
+               AND op.location_id = s.location_id
+               AND op.company_id = s.company_id
+               AND op.active
+               AND (op.product_min_qty, op.product_max_qty) IS DISTINCT FROM (s.min_qty, s.max_qty)
+         RETURNING op.id
+        """, params)
+        orderpoints = Orderpoint.browse([row[0] for row in self.env.cr.fetchall()])
+        updated = len(orderpoints)
+        Orderpoint.invalidate_model(['product_min_qty', 'product_max_qty', 'write_uid', 'write_date'])
+        # qty_to_order disimpan dan bergantung pada min/max, dihitung ulang lewat ORM
+        orderpoints.modified(['product_min_qty', 'product_max_qty'])
+        Orderpoint.flush_model()
+
+        # Rule yang diarsipkan dianggap sengaja dimatikan, tidak dibuat ulang
+        self.env.cr.execute(suggestion_cte + """
+            SELECT s.company_id, s.product_id, s.warehouse_id, s.location_id, s.min_qty, s.max_qty
+              FROM s
+             WHERE NOT EXISTS (
+                    SELECT 1 FROM stock_warehouse_orderpoint op
+                     WHERE op.product_id = s.product_id
+                       AND op.location_id = s.location_id
+                       AND op.company_id = s.company_id
+             )
+        """, params)
+        vals_list = [{
+            'company_id': company_id,
+            'product_id': product_id,
+            'warehouse_id': warehouse_id,
+            'location_id': location_id,
+            'product_min_qty': float(min_qty),
+            'product_max_qty': float(max_qty),
+            'trigger': 'auto',
+        } for company_id, product_id, warehouse_id, location_id, min_qty, max_qty in self.env.cr.fetchall()]
+        if vals_list:
+            Orderpoint.create(vals_list)
+        _logger.info("Parts forecast: %s reordering rules updated, %s created", updated, len(vals_list))
+        return updated, len(vals_list)
+
+    def action_refresh(self):
+        if not self.env.user.has_group('stock.group_stock_manager'):
+            raise exceptions.AccessError(_("Only inventory managers can rebuild the parts forecast."))
+        self._compute_forecast()
+        return True
+
+    def action_apply_orderpoints(self):
+        if not self.env.user.has_group('stock.group_stock_manager'):
+            raise exceptions.AccessError(_("Only inventory managers can apply the parts forecast."))
+        self.env['stock.warehouse.orderpoint'].check_access_rights('write')
+        self.env['stock.warehouse.orderpoint'].check_access_rights('create')
+        self._apply_orderpoints()
+        return self.env['ir.actions.act_window']._for_xml_id('stock.action_orderpoint')
\ No newline at end of file
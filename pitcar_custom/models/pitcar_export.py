@@ -0,0 +1,188 @@
+from odoo import models, api, _, exceptions
+import csv
+import io
+import logging
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+_logger = logging.getLogger(__name__)
+
+# {export: (model, date field, [(header, SQL expression)])}
+# Alias tabel: doc (dokumen), p (customer), car, brand, btype, f (feedback);
+# advisors/classifications berasal dari LATERAL join many2many
+EXPORTS = {
+    'sale_order': ('sale.order', 'date_order', [
+        ('Order', 'doc.name'),
+        ('Order Date', 'doc.date_order'),
+        ('Completed Date', 'doc.date_completed'),
+        ('Status', 'doc.state'),
+        ('Customer', 'p.name'),
+        ('Phone', 'p.phone'),
+        ('Number Plate', 'car.number_plate'),
+        ('Car Brand', 'brand.name'),
+        ('Car Type', 'btype.name'),
+        ('Car Year', 'doc.partner_car_year'),
+        ('Odometer', 'doc.partner_car_odometer'),
+        ('Mechanic', 'doc.generated_mechanic_team'),
+        ('Service Advisors', 'advisors.names'),
+        ('Untaxed Amount', 'doc.amount_untaxed'),
+        ('Total', 'doc.amount_total'),
+        ('Customer Rating', 'f.customer_rating'),
+        ('Customer Satisfaction', 'f.customer_satisfaction'),
+        ('Feedback Classification', 'classifications.names'),
+        ('Complaint Status', 'f.complaint_status'),
+        ('Review Google', 'f.review_google'),
+        ('Follow Instagram', 'f.follow_instagram'),
+    ]),
+    'account_move': ('account.move', 'invoice_date', [
+        ('Number', 'doc.name'),
+        ('Invoice Date', 'doc.invoice_date'),
+        ('Type', 'doc.move_type'),
+        ('Status', 'doc.state'),
+        ('Customer', 'p.name'),
+        ('Number Plate', 'car.number_plate'),
+        ('Car Brand', 'brand.name'),
+        ('Car Type', 'btype.name'),
+        ('Car Year', 'doc.partner_car_year'),
+        ('Odometer', 'doc.partner_car_odometer'),
+        ('Mechanic', 'doc.generated_mechanic_team'),
+        ('Service Advisors', 'advisors.names'),
+        ('Sale Completed Date', 'doc.date_sale_completed'),
+        ('Untaxed Amount', 'doc.amount_untaxed'),
+        ('Total', 'doc.amount_total'),
+    ]),
+}
+
+
+class PitcarExport(models.AbstractModel):
+    """Server-side export of orders and invoices with their car context.
+
+    Rows are read in keyset batches (``id > last id``) through the
+    model's ``_search`` so record rules apply, with many2many advisors
+    and classifications aggregated in SQL. Only one batch is held in
+    memory at a time.
+    """
+    _name = 'pitcar.export'
+    _description = 'Pitcar Streaming Export'
+
+    @api.model
+    def _get_export(self, export_name):
+        if export_name not in EXPORTS:
+            raise exceptions.UserError(_("Unknown export %s", export_name))
+        model_name, date_field, columns = EXPORTS[export_name]
+        self.env[model_name].check_access_rights('read')
+        return model_name, date_field, columns
+
+    @api.model
+    def _get_export_domain(self, export_name, date_from=None, date_to=None):
+        _model_name, date_field, _columns = self._get_export(export_name)
+        domain = []
+        if date_from:
+            domain.append((date_field, '>=', date_from))
+        if date_to:
+            domain.append((date_field, '<=', date_to))
+        return domain
+
+    @api.model
+    def _get_export_headers(self, export_name):
+        return [header for header, _expression in self._get_export(export_name)[2]]
+
+    @api.model
+    def _iter_batches(self, export_name, domain, batch_size=5000):
+        model_name, _date_field, columns = self._get_export(export_name)
+        Model = self.env[model_name]
+        advisor_field = Model._fields['service_advisor_id']
+        joins = ''
+        if model_name == 'sale.order':
+            classification_field = self.env['sale.order.feedback']._fields['feedback_classification_ids']
+            joins = """
+                LEFT JOIN sale_order_feedback f ON f.id = doc.feedback_id
+                LEFT JOIN LATERAL (
+                    SELECT string_agg(fc.name, ', ' ORDER BY fc.name) AS names
+                      FROM "{class_rel}" rel
+                      JOIN feedback_classification fc ON fc.id = rel."{class_member}"
+                     WHERE rel."{class_feedback}" = f.id
+                ) classifications ON TRUE
+            """.format(
+                class_rel=classification_field.relation,
+                class_feedback=classification_field.column1,
+                class_member=classification_field.column2,
+            )
+        select = """
+            SELECT doc.id, {columns}
+              FROM "{table}" doc
+         LEFT JOIN res_partner p ON p.id = doc.partner_id
+         LEFT JOIN res_partner_car car ON car.id = doc.partner_car_id
+         LEFT JOIN res_partner_car_brand brand ON brand.id = doc.partner_car_brand
+         LEFT JOIN res_partner_car_type btype ON btype.id = doc.partner_car_brand_type
+         LEFT JOIN LATERAL (
+                SELECT string_agg(a.name, ', ' ORDER BY a.name) AS names
+                  FROM "{advisor_rel}" rel
+                  JOIN pitcar_service_advisor a ON a.id = rel."{advisor_member}"
+                 WHERE rel."{advisor_doc}" = doc.id
+            ) advisors ON TRUE
+            {joins}
+             WHERE doc.id IN ({{ids}})
+          ORDER BY doc.id
+        """.format(
+            columns=', '.join(expression for _header, expression in columns),
+            table=Model._table,
+            advisor_rel=advisor_field.relation,
+            advisor_doc=advisor_field.column1,
+            advisor_member=advisor_field.column2,
+            joins=joins,
+        )
+
+        Model.flush_model()
+        last_id = 0
+        exported = 0
+        while True:
+            ids_query = Model._search(domain + [('id', '>', last_id)], order='id', limit=batch_size)
+            query_str, params = ids_query.select('"%s"."id"' % Model._table)
+            self.env.cr.execute(select.format(ids=query_str), params)
+            rows = self.env.cr.fetchall()
+            if not rows:
+                _logger.info("Export %s: %s rows", export_name, exported)
+                return
+            last_id = rows[-1][0]
+            exported += len(rows)
+            yield [row[1:] for row in rows]
+
+    @api.model
+    def _stream_csv(self, export_name, domain, batch_size=5000):
+        """Yield the CSV file as encoded chunks, one per batch."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self._get_export_headers(export_name))
+        for rows in self._iter_batches(export_name, domain, batch_size=batch_size):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        tail = buffer.getvalue()
+        if tail:
+            yield tail.encode('utf-8')
+
+    @api.model
+    def _write_xlsx(self, export_name, domain, fileobj, batch_size=5000):
+        """Write the XLSX file to ``fileobj``; rows are flushed to disk as they are written."""
+        if xlsxwriter is None:
+            raise exceptions.UserError(_("XLSX export requires the xlsxwriter library."))
+        workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'remove_timezone': True})
+        sheet = workbook.add_worksheet()
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+        sheet.write_row(0, 0, self._get_export_headers(export_name))
+        row_index = 1
+        for rows in self._iter_batches(export_name, domain, batch_size=batch_size):
+            for row in rows:
+                for col_index, value in enumerate(row):
+                    if hasattr(value, 'year'):
+                        sheet.write_datetime(row_index, col_index, value, date_format)
+                    else:
+                        sheet.write(row_index, col_index, value)
+                row_index += 1
+        workbook.close()
+        return row_index - 1
\ No newline at end of file
@@ -0,0 +1,117 @@
+from odoo import models, fields, api, tools
+from odoo.tools import str2bool
+import functools
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+def profiled(method):
+    """Log calls slower than the configured threshold to ``pitcar.perf.log``.
+
+    Apply above the ``api`` decorators. When the
+    ``pitcar_custom.perf_log_enabled`` parameter is off the only cost is
+    one cached lookup per call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        PerfLog = self.env['pitcar.perf.log']
+        enabled, threshold_ms = PerfLog._get_settings()
+        if not enabled:
+            return method(self, *args, **kwargs)
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if elapsed_ms >= threshold_ms:
+            records = len(self)
+            if not records and isinstance(result, models.BaseModel):
+                records = len(result)
+            PerfLog._log_call('%s.%s' % (self._name, method.__name__), elapsed_ms,
+                              cr.sql_log_count - query_count, records)
+        return result
+    return wrapper
+
+
+class PitcarPerfLog(models.Model):
+    """Slow calls of the module's overrides and computes, one row per method and day.
+
+    Rows are upserted from a separate cursor so that they survive a
+    rolled back transaction and never hold locks of the caller.
+    """
+    _name = 'pitcar.perf.log'
+    _inherit = 'pitcar.report.mixin'
+    _description = 'Pitcar Slow Operation Log'
+    _order = 'date desc, total_ms desc'
+    _rec_name = 'method'
+    _weighted_averages = {
+        'avg_ms': ('total_ms', 'call_count'),
+        'avg_queries': ('total_queries', 'call_count'),
+        'avg_records': ('total_records', 'call_count'),
+    }
+
+    date = fields.Date(string="Date", readonly=True, index=True)
+    method = fields.Char(string="Method", readonly=True, index=True)
+    call_count = fields.Integer(string="Slow Calls", readonly=True)
+    total_ms = fields.Float(string="Total Time (ms)", readonly=True, digits=(16, 1))
+    max_ms = fields.Float(string="Max Time (ms)", readonly=True, digits=(16, 1), group_operator="max")
+    avg_ms = fields.Float(string="Avg Time (ms)", readonly=True, digits=(16, 1), group_operator="avg")
+    total_queries = fields.Integer(string="Total Queries", readonly=True)
+    max_queries = fields.Integer(string="Max Queries", readonly=True, group_operator="max")
+    avg_queries = fields.Float(string="Avg Queries", readonly=True, digits=(16, 1), group_operator="avg")
+    total_records = fields.Integer(string="Total Records", readonly=True)
+    avg_records = fields.Float(string="Avg Records", readonly=True, digits=(16, 1), group_operator="avg")
+
+    _sql_constraints = [
+        ('date_method_uniq', 'unique (date, method)', "One log line per method and day."),
+    ]
+
+    @api.model
+    @tools.ormcache()
+    def _get_settings(self):
+        # Cache dibersihkan otomatis saat ir.config_parameter diubah
+        ICP = self.env['ir.config_parameter'].sudo()
+        enabled = str2bool(ICP.get_param('pitcar_custom.perf_log_enabled', 'False'), False)
+        try:
+            threshold_ms = float(ICP.get_param('pitcar_custom.perf_log_threshold_ms', 500))
+        except (TypeError, ValueError):
+            threshold_ms = 500.0
+        return enabled, threshold_ms
+
+    @api.model
+    def _log_call(self, method, elapsed_ms, query_count, records):
+        try:
+            with self.pool.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO pitcar_perf_log
+                        (date, method, call_count, total_ms, max_ms, avg_ms, total_queries, max_queries,
+                         avg_queries, total_records, avg_records, create_uid, create_date, write_uid, write_date)
+                    VALUES (%(date)s, %(method)s, 1, %(ms)s, %(ms)s, %(ms)s, %(queries)s, %(queries)s,
+                            %(queries)s, %(records)s, %(records)s, %(uid)s, NOW() AT TIME ZONE 'UTC',
+                            %(uid)s, NOW() AT TIME ZONE 'UTC')
+                    ON CONFLICT (date, method) DO UPDATE
+                       SET call_count = pitcar_perf_log.call_count + 1,
+                           total_ms = pitcar_perf_log.total_ms + EXCLUDED.total_ms,
+                           max_ms = GREATEST(pitcar_perf_log.max_ms, EXCLUDED.max_ms),
+                           avg_ms = (pitcar_perf_log.total_ms + EXCLUDED.total_ms) / (pitcar_perf_log.call_count + 1),
+                           total_queries = pitcar_perf_log.total_queries + EXCLUDED.total_queries,
+                           max_queries = GREATEST(pitcar_perf_log.max_queries, EXCLUDED.max_queries),
+                           avg_queries = (pitcar_perf_log.total_queries + EXCLUDED.total_queries)::float
+                                         / (pitcar_perf_log.call_count + 1),
+                           total_records = pitcar_perf_log.total_records + EXCLUDED.total_records,
+                           avg_records = (pitcar_perf_log.total_records + EXCLUDED.total_records)::float
+                                         / (pitcar_perf_log.call_count + 1),
+                           write_date = EXCLUDED.write_date
+                """, {
+                    'date': fields.Date.today(),
+                    'method': method,
+                    'ms': elapsed_ms,
+                    'queries': query_count,
+                    'records': records,
+                    'uid': self.env.uid,
+                })
+        except Exception:
+            # Logging tidak boleh menggagalkan operasi yang diukur
+            _logger.warning("Could not log slow call of %s (%.1f ms)", method, elapsed_ms, exc_info=True)
\ No newline at end of file
@@ -0,0 +1,136 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PitcarPerformanceReport(models.Model):
+    """Daily mechanic and service advisor performance.
+
+    Filled from confirmed orders with ``date_completed`` by
+    ``_cron_refresh``; dashboards read this table only, never sale_order.
+    Revenue of an order is split equally between the members of its
+    mechanic team (or its advisors), turnaround and rating are not split.
+    Days are cut in the user or company timezone (``_get_report_tz``).
+    """
+    _name = 'pitcar.performance.report'
+    _inherit = ['pitcar.report.mixin']
+    _description = 'Mechanic and Service Advisor Performance'
+    _order = 'date desc, id'
+    _rec_name = 'date'
+
+    _weighted_averages = {
+        'avg_turnaround_hours': ('turnaround_hours_total', 'turnaround_count'),
+        'avg_rating': ('rating_total', 'rating_count'),
+    }
+
+    date = fields.Date(string="Date", readonly=True, index=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+    role = fields.Selection([
+        ('mechanic', 'Mechanic'),
+        ('advisor', 'Service Advisor'),
+    ], string="Role", readonly=True)
+    mechanic_id = fields.Many2one('pitcar.mechanic.new', string="Mechanic", readonly=True, index=True)
+    service_advisor_id = fields.Many2one('pitcar.service.advisor', string="Service Advisor", readonly=True, index=True)
+    order_count = fields.Integer(string="Orders Handled", readonly=True)
+    revenue = fields.Float(string="Revenue (Share)", readonly=True)
+    turnaround_hours_total = fields.Float(string="Turnaround Total (Hours)", readonly=True)
+    turnaround_count = fields.Integer(string="Orders with Turnaround", readonly=True)
+    avg_turnaround_hours = fields.Float(string="Avg. Turnaround (Hours)", readonly=True, group_operator='avg')
+    rating_total = fields.Integer(string="Rating Total", readonly=True)
+    rating_count = fields.Integer(string="Rated Orders", readonly=True)
+    avg_rating = fields.Float(string="Avg. Rating", readonly=True, group_operator='avg')
+
+    @api.model
+    def _cron_refresh(self, days=None):
+        """Rebuild the last ``days`` days (parameter ``pitcar_custom.performance_report_days``).
+
+        An empty table is rebuilt from the first completed order.
+        """
+        self.env.cr.execute("SELECT EXISTS (SELECT 1 FROM pitcar_performance_report)")
+        if not self.env.cr.fetchone()[0]:
+            date_from = None
+        else:
+            days = days or self._get_refresh_days('pitcar_custom.performance_report_days', 7)
+            today = fields.Date.context_today(self.with_context(tz=self._get_report_tz()))
+            date_from = today - timedelta(days=days)
+        return self._refresh(date_from)
+
+    @api.model
+    def _refresh(self, date_from=None):
+        self.env.flush_all()
+        tz = self._get_report_tz()
+        SaleOrder = self.env['sale.order']
+        mechanic_field = SaleOrder._fields['car_mechanic_id_new']
+        advisor_field = SaleOrder._fields['service_advisor_id']
+
+        if date_from:
+            self.env.cr.execute("DELETE FROM pitcar_performance_report WHERE date >= %s", [date_from])
+        else:
+            self.env.cr.execute("TRUNCATE pitcar_performance_report")
+
+        member_query = """
+            SELECT o.*, rel."{member}" AS member_id,
+                   COUNT(*) OVER (PARTITION BY o.id) AS team_size
+              FROM orders o
+              JOIN "{relation}" rel ON rel."{order}" = o.id
+        """
+        aggregate = """
+            SELECT date, company_id, '{role}', {mechanic}, {advisor},
+                   COUNT(*),
+                   SUM(revenue / team_size),
+                   COALESCE(SUM(turnaround), 0), COUNT(turnaround),
+                   COALESCE(SUM(turnaround), 0) / NULLIF(COUNT(turnaround), 0),
+                   COALESCE(SUM(rating), 0), COUNT(rating),
+                   SUM(rating)::float / NULLIF(COUNT(rating), 0),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM {members}
+          GROUP BY date, company_id, member_id
+        """
+        self.env.cr.execute("""
+            WITH orders AS (
+                SELECT so.id,
+                       so.company_id,
+                       (so.date_completed AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date AS date,
+                       so.amount_untaxed / COALESCE(NULLIF(so.currency_rate, 0), 1.0) AS revenue,
+                       CASE WHEN so.car_arrival_time <= so.date_completed
+                            THEN EXTRACT(EPOCH FROM so.date_completed - so.car_arrival_time) / 3600.0
+                       END AS turnaround,
+                       f.customer_rating::int AS rating
+                  FROM sale_order so
+             LEFT JOIN sale_order_feedback f ON f.id = so.feedback_id
+                 WHERE so.state IN ('sale', 'done')
+                   AND so.date_completed IS NOT NULL
+                   -- Hari laporan dipotong di zona waktu bengkel, bukan UTC
+                   AND (%(date_from)s::date IS NULL
+                        OR so.date_completed >= %(date_from)s::timestamp AT TIME ZONE %(tz)s AT TIME ZONE 'UTC')
+            ),
+            mechanics AS ({mechanics}),
+            advisors AS ({advisors})
+            INSERT INTO pitcar_performance_report
+                (date, company_id, role, mechanic_id, service_advisor_id,
+                 order_count, revenue, turnaround_hours_total, turnaround_count, avg_turnaround_hours,
+                 rating_total, rating_count, avg_rating,
+                 create_uid, create_date, write_uid, write_date)
+            {mechanic_rows}
+            UNION ALL
+            {advisor_rows}
+        """.format(
+            mechanics=member_query.format(
+                relation=mechanic_field.relation, order=mechanic_field.column1, member=mechanic_field.column2),
+            advisors=member_query.format(
+                relation=advisor_field.relation, order=advisor_field.column1, member=advisor_field.column2),
+            mechanic_rows=aggregate.format(
+                role='mechanic', mechanic='member_id', advisor='NULL::int', members='mechanics'),
+            advisor_rows=aggregate.format(
+                role='advisor', mechanic='NULL::int', advisor='member_id', members='advisors'),
+        ), {'date_from': date_from, 'tz': tz, 'uid': self.env.uid})
+        inserted = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("Performance report: %s rows refreshed since %s", inserted, date_from or 'the beginning')
+        return inserted
+
+    def action_refresh(self):
+        self._cron_refresh()
+        return True
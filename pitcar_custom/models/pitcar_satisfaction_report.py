@@ -0,0 +1,214 @@
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+LAST_RUN_PARAM = 'pitcar_custom.satisfaction_report_last_run'
+
+# Bulan tempat sebuah order dihitung
+ORDER_MONTH = "date_trunc('month', COALESCE(so.date_completed, so.date_order))::date"
+
+
+class PitcarSatisfactionReport(models.Model):
+    """Monthly customer satisfaction cube.
+
+    One row per month, company, car brand, service advisor and feedback
+    classification. An order with several advisors or classifications is
+    counted once under each of them, so totals are meant to be read per
+    advisor or per classification, not summed across them.
+    """
+    _name = 'pitcar.satisfaction.report'
+    _inherit = ['pitcar.report.mixin']
+    _description = 'Customer Satisfaction Analysis'
+    _order = 'month desc, id'
+    _rec_name = 'month'
+
+    _weighted_averages = {
+        'avg_rating': ('rating_total', 'rating_count'),
+        'nps_score': ('nps_points', 'rating_count', 100),
+        'complaint_resolution_rate': ('complaint_solved_count', 'complaint_count', 100),
+    }
+
+    month = fields.Date(string="Month", readonly=True, index=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+    brand_id = fields.Many2one('res.partner.car.brand', string="Car Brand", readonly=True)
+    service_advisor_id = fields.Many2one('pitcar.service.advisor', string="Service Advisor", readonly=True)
+    feedback_classification_id = fields.Many2one('feedback.classification', string="Feedback Classification", readonly=True)
+
+    order_count = fields.Integer(string="Orders", readonly=True)
+    rating_count = fields.Integer(string="Rated Orders", readonly=True)
+    rating_total = fields.Integer(string="Rating Total", readonly=True)
+    rating_1 = fields.Integer(string="Rating 1", readonly=True)
+    rating_2 = fields.Integer(string="Rating 2", readonly=True)
+    rating_3 = fields.Integer(string="Rating 3", readonly=True)
+    rating_4 = fields.Integer(string="Rating 4", readonly=True)
+    rating_5 = fields.Integer(string="Rating 5", readonly=True)
+    avg_rating = fields.Float(string="Avg. Rating", readonly=True, group_operator='avg')
+    # Promotor = rating 5, detraktor = rating 1-3
+    nps_points = fields.Integer(string="Promoters - Detractors", readonly=True)
+    nps_score = fields.Float(string="NPS", readonly=True, group_operator='avg')
+    complaint_count = fields.Integer(string="Complaints", readonly=True)
+    complaint_solved_count = fields.Integer(string="Complaints Solved", readonly=True)
+    complaint_resolution_rate = fields.Float(string="Complaint Resolution (%)", readonly=True, group_operator='avg')
+    review_google_count = fields.Integer(string="Google Reviews", readonly=True)
+    follow_instagram_count = fields.Integer(string="Instagram Follows", readonly=True)
+
+    def init(self):
+        # Refresh inkremental mencari order/feedback berdasarkan write_date
+        tools.create_index(self._cr, 'sale_order_write_date_index', 'sale_order', ['write_date'])
+        tools.create_index(self._cr, 'sale_order_feedback_write_date_index', 'sale_order_feedback', ['write_date'])
+
+    @api.model
+    def _cron_refresh(self):
+        """Rebuild the months touched by orders or feedback written since the last run.
+
+        Both the current slice of a changed order and the slice it was
+        counted in at the previous refresh are rebuilt, so an order whose
+        completion date or company changed leaves its old month.
+        """
+        started = fields.Datetime.now()
+        Param = self.env['ir.config_parameter'].sudo()
+        last_run = Param.get_param(LAST_RUN_PARAM)
+        self.env.cr.execute("""
+            SELECT EXISTS (SELECT 1 FROM pitcar_satisfaction_report)
+               AND EXISTS (SELECT 1 FROM pitcar_satisfaction_report_order)
+        """)
+        if not last_run or not self.env.cr.fetchone()[0]:
+            refreshed = self._refresh()
+        else:
+            self.env.flush_all()
+            # Satu select per index write_date, OR di atas join tidak bisa memakai keduanya
+            self.env.cr.execute("""
+                SELECT {slice}, so.company_id
+                  FROM sale_order so
+                  JOIN sale_order_feedback f ON f.id = so.feedback_id
+                 WHERE so.write_date >= %(last_run)s
+                 UNION
+                SELECT {slice}, so.company_id
+                  FROM sale_order_feedback f
+                  JOIN sale_order so ON so.id = f.sale_order_id
+                 WHERE f.write_date >= %(last_run)s
+                 UNION
+                SELECT m.month, m.company_id
+                  FROM sale_order so
+                  JOIN pitcar_satisfaction_report_order m ON m.order_id = so.id
+                 WHERE so.write_date >= %(last_run)s
+            """.format(slice=ORDER_MONTH), {'last_run': last_run})
+            slices = self.env.cr.fetchall()
+            refreshed = self._refresh(slices) if slices else 0
+        Param.set_param(LAST_RUN_PARAM, fields.Datetime.to_string(started))
+        return refreshed
+
+    @api.model
+    def _refresh(self, slices=None):
+        """Rebuild the given ``[(month, company_id)]`` slices, or the whole cube."""
+        self.env.flush_all()
+        advisor_field = self.env['sale.order']._fields['service_advisor_id']
+        classification_field = self.env['sale.order.feedback']._fields['feedback_classification_ids']
+        params = {'uid': self.env.uid, 'months': None, 'companies': None}
+        if slices:
+            params['months'] = [month for month, _company_id in slices]
+            params['companies'] = [company_id for _month, company_id in slices]
+            for table in ('pitcar_satisfaction_report', 'pitcar_satisfaction_report_order'):
+                self.env.cr.execute("""
+                    DELETE FROM {table} r
+                     USING unnest(%(months)s::date[], %(companies)s::int[]) AS s(month, company_id)
+                     WHERE r.month = s.month AND r.company_id = s.company_id
+                """.format(table=table), params)
+        else:
+            self.env.cr.execute("TRUNCATE pitcar_satisfaction_report, pitcar_satisfaction_report_order")
+
+        orders_query = """
+              FROM sale_order so
+              JOIN sale_order_feedback f ON f.id = so.feedback_id
+             WHERE so.state IN ('sale', 'done')
+               AND (%(months)s::date[] IS NULL
+                    OR ({slice}, so.company_id) IN (
+                        SELECT * FROM unnest(%(months)s::date[], %(companies)s::int[])))
+        """.format(slice=ORDER_MONTH)
+        self.env.cr.execute("""
+            INSERT INTO pitcar_satisfaction_report_order (order_id, month, company_id)
+            SELECT so.id, {slice}, so.company_id
+            {orders}
+        """.format(slice=ORDER_MONTH, orders=orders_query), params)
+
+        self.env.cr.execute("""
+            WITH orders AS (
+                SELECT so.id,
+                       {slice} AS month,
+                       so.company_id,
+                       so.partner_car_brand AS brand_id,
+                       f.id AS feedback_id,
+                       f.customer_rating::int AS rating,
+                       f.complaint_status,
+                       f.review_google,
+                       f.follow_instagram
+                {orders}
+            ),
+            facts AS (
+                SELECT o.*, adv."{advisor_member}" AS service_advisor_id, cls."{class_member}" AS feedback_classification_id
+                  FROM orders o
+             LEFT JOIN "{advisor_rel}" adv ON adv."{advisor_order}" = o.id
+             LEFT JOIN "{class_rel}" cls ON cls."{class_feedback}" = o.feedback_id
+            )
+            INSERT INTO pitcar_satisfaction_report
+                (month, company_id, brand_id, service_advisor_id, feedback_classification_id,
+                 order_count, rating_count, rating_total, rating_1, rating_2, rating_3, rating_4, rating_5,
+                 avg_rating, nps_points, nps_score, complaint_count, complaint_solved_count,
+                 complaint_resolution_rate, review_google_count, follow_instagram_count,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT month, company_id, brand_id, service_advisor_id, feedback_classification_id,
+                   COUNT(*),
+                   COUNT(rating),
+                   COALESCE(SUM(rating), 0),
+                   COUNT(*) FILTER (WHERE rating = 1),
+                   COUNT(*) FILTER (WHERE rating = 2),
+                   COUNT(*) FILTER (WHERE rating = 3),
+                   COUNT(*) FILTER (WHERE rating = 4),
+                   COUNT(*) FILTER (WHERE rating = 5),
+                   SUM(rating)::float / NULLIF(COUNT(rating), 0),
+                   COUNT(*) FILTER (WHERE rating = 5) - COUNT(*) FILTER (WHERE rating <= 3),
+                   100.0 * (COUNT(*) FILTER (WHERE rating = 5) - COUNT(*) FILTER (WHERE rating <= 3))
+                       / NULLIF(COUNT(rating), 0),
+                   COUNT(*) FILTER (WHERE rating <= 2),
+                   COUNT(*) FILTER (WHERE rating <= 2 AND complaint_status = 'solved'),
+                   100.0 * COUNT(*) FILTER (WHERE rating <= 2 AND complaint_status = 'solved')
+                       / NULLIF(COUNT(*) FILTER (WHERE rating <= 2), 0),
+                   COUNT(*) FILTER (WHERE review_google = 'yes'),
+                   COUNT(*) FILTER (WHERE follow_instagram = 'yes'),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM facts
+          GROUP BY month, company_id, brand_id, service_advisor_id, feedback_classification_id
+        """.format(
+            slice=ORDER_MONTH,
+            orders=orders_query,
+            advisor_rel=advisor_field.relation,
+            advisor_order=advisor_field.column1,
+            advisor_member=advisor_field.column2,
+            class_rel=classification_field.relation,
+            class_feedback=classification_field.column1,
+            class_member=classification_field.column2,
+        ), params)
+        inserted = self.env.cr.rowcount
+        self.invalidate_model()
+        _logger.info("Satisfaction report: %s rows refreshed for %s", inserted, slices or 'all months')
+        return inserted
+
+    def action_refresh(self):
+        self._cron_refresh()
+        return True
+
+
+class PitcarSatisfactionReportOrder(models.Model):
+    """Month and company each order was counted in at the last refresh."""
+    _name = 'pitcar.satisfaction.report.order'
+    _description = 'Customer Satisfaction Report Membership'
+    _log_access = False
+
+    order_id = fields.Many2one('sale.order', string="Sale Order", readonly=True, index=True, ondelete='cascade')
+    month = fields.Date(string="Month", readonly=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'pitcar_satisfaction_report_order_slice_index',
+                           self._table, ['month', 'company_id'])
@@ -1,7 +1,11 @@
 from odoo import models, fields, api, _
 
+class ProductTemplate(models.Model):
+    _inherit = ['product.template', 'pitcar.count.source.mixin']
+
+
 class ProductProduct(models.Model):
-    _inherit = 'product.product'
+    _inherit = ['product.product', 'pitcar.count.source.mixin']
 
     # category_id will be used as a filter in the product list view by connecting it to the product.template model
     template_categ_id = fields.Many2one(
@@ -1,11 +1,13 @@
 from odoo import models, fields, api, _, exceptions
 
 class ProductTag(models.Model):
-	_inherit = 'product.tag'
+	_inherit = ['product.tag', 'pitcar.count.mixin']
 
 	product_ids_count = fields.Integer(string="Product Count", compute='_compute_product_ids_count')
 
 	@api.depends('product_template_ids', 'product_product_ids')
 	def _compute_product_ids_count(self):
+		template_counts = self._count_related('product.template', 'product_tag_ids')
+		variant_counts = self._count_related('product.product', 'additional_product_tag_ids')
 		for tag in self:
-			tag.product_ids_count = len(tag.product_template_ids) + len(tag.product_product_ids)
\ No newline at end of file
+			tag.product_ids_count = template_counts.get(tag._origin.id, 0) + variant_counts.get(tag._origin.id, 0)
\ No newline at end of file
@@ -1,5 +1,26 @@
-from odoo import models, fields, api
-from datetime import date
+from odoo import models, fields, api, tools
+from .pitcar_perf_log import profiled
+
+# Batas "Due Soon" dalam hari, sama dengan warna info di kanban
+DEADLINE_SOON_DAYS = 3
+
+DEADLINE_STATUSES = [
+    ('overdue', 'Overdue'),
+    ('today', 'Due Today'),
+    ('soon', 'Due Soon'),
+    ('on_track', 'On Track'),
+]
+
+
+def _deadline_status(days):
+    if days < 0:
+        return 'overdue'
+    if days == 0:
+        return 'today'
+    if days <= DEADLINE_SOON_DAYS:
+        return 'soon'
+    return 'on_track'
+
 
 class ProjectTask(models.Model):
     _inherit = 'project.task'
@@ -14,42 +35,96 @@ class ProjectTask(models.Model):
         readonly=False,  # Explicitly set readonly to False
         states={'done': [('readonly', True)]},  # Only readonly when task is done
     )
-    # Add the missing order_total field
+    # Perubahan amount_total order disinkronkan sekali per transaksi, lihat _sync_order_totals
     order_total = fields.Monetary(string='Order Total', compute='_compute_order_total', store=True)
 
     currency_id = fields.Many2one('res.currency', related='company_id.currency_id')
     color = fields.Integer(string='Color Index')
-    days_until_deadline = fields.Integer(string='Days Until Deadline', compute='_compute_days_until_deadline')
-    deadline_status = fields.Char(string='Deadline Status', compute='_compute_days_until_deadline')
+    # Relatif terhadap hari ini, diperbarui harian oleh _cron_refresh_deadlines
+    days_until_deadline = fields.Integer(
+        string='Days Until Deadline', compute='_compute_days_until_deadline', store=True, index='btree_not_null')
+    deadline_status = fields.Selection(
+        DEADLINE_STATUSES, string='Deadline Status', compute='_compute_days_until_deadline', store=True)
 
     state = fields.Selection([
         ('draft', 'Draft'),
         ('in_progress', 'In Progress'),
         ('done', 'Done')
     ], string='Status', default='draft', tracking=True)
-    
-    @api.depends('sale_order_id', 'sale_order_id.amount_total')
+
+    def init(self):
+        super().init()
+        # Grouping kanban per project dan status deadline
+        tools.create_index(self._cr, 'project_task_project_deadline_status_index',
+                           self._table, ['project_id', 'deadline_status', 'days_until_deadline'])
+
+    @profiled
+    @api.depends('sale_order_id')
     def _compute_order_total(self):
         for task in self:
-            try:
-                if task.sale_order_id and task.sale_order_id.amount_total:
-                    task.order_total = task.sale_order_id.amount_total
-                else:
-                    task.order_total = 0
-            except Exception as e:
-                task.order_total = 0
-                _logger.error(f"Error computing order_total for task {task.id}: {str(e)}")
-
-    @api.depends('entry_date', 'date_deadline')
+            task.order_total = task.sale_order_id.amount_total or 0
+
+    @api.model
+    def _sync_order_totals(self, order_ids):
+        """Copy ``amount_total`` of the given orders to their tasks in one query."""
+        if not order_ids:
+            return
+        self.env['sale.order'].flush_model(['amount_total'])
+        self.flush_model(['sale_order_id', 'order_total'])
+        self.env.cr.execute("""
+            UPDATE project_task t
+               SET order_total = COALESCE(so.amount_total, 0)
+              FROM sale_order so
+             WHERE t.sale_order_id = so.id
+               AND so.id IN %s
+               AND t.order_total IS DISTINCT FROM COALESCE(so.amount_total, 0)
+         RETURNING t.id
+        """, [tuple(order_ids)])
+        task_ids = [row[0] for row in self.env.cr.fetchall()]
+        if task_ids:
+            self.browse(task_ids).invalidate_recordset(['order_total'])
+
+    @profiled
+    @api.depends('date_deadline')
     def _compute_days_until_deadline(self):
+        today = fields.Date.context_today(self)
         for task in self:
-            if task.entry_date and task.date_deadline:
-                duration = (task.date_deadline - task.entry_date).days
-                task.days_until_deadline = duration
-                task.deadline_status = f"Task duration: {duration} days"
+            if task.date_deadline:
+                task.days_until_deadline = (task.date_deadline - today).days
+                task.deadline_status = _deadline_status(task.days_until_deadline)
             else:
                 task.days_until_deadline = 0
-                task.deadline_status = ""
+                task.deadline_status = False
+
+    @api.model
+    def _cron_refresh_deadlines(self):
+        """Shift the stored deadline fields of open tasks to today's date.
+
+        Done tasks keep the values they had when they were closed.
+        """
+        self.flush_model(['date_deadline', 'state', 'days_until_deadline', 'deadline_status'])
+        self.env.cr.execute("""
+            WITH due AS (
+                SELECT id, date_deadline - %(today)s::date AS days
+                  FROM project_task
+                 WHERE date_deadline IS NOT NULL
+                   AND (state IS NULL OR state != 'done')
+            )
+            UPDATE project_task t
+               SET days_until_deadline = due.days,
+                   deadline_status = CASE
+                        WHEN due.days < 0 THEN 'overdue'
+                        WHEN due.days = 0 THEN 'today'
+                        WHEN due.days <= %(soon)s THEN 'soon'
+                        ELSE 'on_track'
+                   END
+              FROM due
+             WHERE t.id = due.id
+               AND t.days_until_deadline IS DISTINCT FROM due.days
+        """, {'today': fields.Date.context_today(self), 'soon': DEADLINE_SOON_DAYS})
+        updated = self.env.cr.rowcount
+        self.invalidate_model(['days_until_deadline', 'deadline_status'])
+        return updated
 
     @api.onchange('partner_id')
     def onchange_partner_id(self):
@@ -0,0 +1,87 @@
+from odoo import models, fields, api, tools, _, exceptions
+import json
+import logging
+import os
+
+_logger = logging.getLogger(__name__)
+
+
+class _TemplateValues(dict):
+    # Placeholder yang tidak dikenal dibiarkan kosong, bukan KeyError
+    def __missing__(self, key):
+        return ''
+
+
+class PitcarReminderTemplate(models.Model):
+    _name = 'pitcar.reminder.template'
+    _description = 'Reminder Message Template'
+    _order = 'kind, sequence, id'
+
+    name = fields.Char(string="Name", required=True)
+    sequence = fields.Integer(string="Sequence", default=10)
+    active = fields.Boolean(default=True)
+    kind = fields.Selection([
+        ('3_days', '3 Days'),
+        ('3_months', '3 Months'),
+        ('6_months', '6 Months'),
+    ], string="Reminder", required=True)
+    body = fields.Text(
+        string="Message",
+        required=True,
+        help="Placeholders: {customer}, {plate}, {brand}, {brand_type}, {car}, {order}, "
+             "{last_service}, {next_service}, {company}",
+    )
+
+    @api.model
+    def _get_bodies(self):
+        """``{kind: body}`` of the first active template of every kind."""
+        bodies = {}
+        for template in self.search([]):
+            bodies.setdefault(template.kind, template.body)
+        return bodies
+
+    @api.model
+    def _render(self, body, values):
+        return body.format_map(_TemplateValues(values))
+
+
+class PitcarReminderGateway(models.AbstractModel):
+    """Sends reminder messages in batches.
+
+    The gateway is chosen by the ``pitcar_custom.reminder_gateway``
+    parameter and resolved to ``_send_<gateway>``; a WhatsApp or SMS
+    module adds its own ``_send_<name>`` method. Every message carries an
+    idempotency key that stays the same across retries, so a gateway must
+    not deliver a key twice.
+
+    ``_send_<gateway>(messages)`` receives dicts with ``key``, ``phone``
+    and ``body`` and returns ``{key: (success, message id or error)}``.
+    """
+    _name = 'pitcar.reminder.gateway'
+    _description = 'Reminder Gateway'
+
+    @api.model
+    def _send(self, messages):
+        gateway = self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.reminder_gateway', 'log')
+        method = getattr(self, '_send_%s' % gateway, None)
+        if method is None:
+            raise exceptions.UserError(_("Unknown reminder gateway %s", gateway))
+        return method(messages)
+
+    @api.model
+    def _send_log(self, messages):
+        # Stand-in lokal: tulis ke file JSON lines, kunci yang sudah ada di file tidak ditulis ulang
+        directory = os.path.join(tools.config['data_dir'], 'pitcar_reminders')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '%s.jsonl' % self.env.cr.dbname)
+        sent_keys = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                sent_keys = {json.loads(line)['key'] for line in f if line.strip()}
+        with open(path, 'a') as f:
+            for message in messages:
+                if message['key'] not in sent_keys:
+                    f.write(json.dumps(message) + '\n')
+                    sent_keys.add(message['key'])
+        _logger.info("Reminder log gateway: %s messages written to %s", len(messages), path)
+        return {message['key']: (True, message['key']) for message in messages}
\ No newline at end of file
@@ -0,0 +1,48 @@
+from odoo import models, fields, api
+
+
+class PitcarReportMixin(models.AbstractModel):
+    """Pre-aggregated report tables refreshed by cron.
+
+    Rows hold sums and counts so that averages stay correct when the
+    pivot or graph view groups several rows together: ``read_group``
+    recomputes every field of ``_weighted_averages`` from its totals
+    instead of averaging the per-row averages.
+    """
+    _name = 'pitcar.report.mixin'
+    _description = 'Pre-aggregated Report'
+
+    # {average field: (total field, count field)} or (total, count, factor) for percentages
+    _weighted_averages = {}
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        fields = list(fields or [])
+        requested = {spec.split(':')[0] for spec in fields}
+        averages = [fname for fname in self._weighted_averages if not fields or fname in requested]
+        extra = [
+            fname for average in averages for fname in self._weighted_averages[average][:2]
+            if fields and fname not in requested
+        ]
+        result = super().read_group(domain, fields + extra, groupby, offset=offset, limit=limit,
+                                    orderby=orderby, lazy=lazy)
+        for group in result:
+            for average in averages:
+                total_fname, count_fname, *factor = self._weighted_averages[average]
+                count = group.get(count_fname) or 0
+                total = (group.get(total_fname) or 0.0) * (factor[0] if factor else 1)
+                group[average] = total / count if count else 0.0
+        return result
+
+    @api.model
+    def _get_refresh_days(self, param, default):
+        days = self.env['ir.config_parameter'].sudo().get_param(param, default)
+        try:
+            return max(int(days), 1)
+        except (TypeError, ValueError):
+            return default
+
+    @api.model
+    def _get_report_tz(self):
+        """Timezone the report days are cut in: user, then company, then UTC."""
+        return self.env.context.get('tz') or self.env.user.tz or self.env.company.partner_id.tz or 'UTC'
@@ -1,15 +1,47 @@
-from odoo import models, fields, api, _, exceptions
+from odoo import models, fields, api, tools, _, exceptions
 from random import randint
+import re
+
+
+def normalize_phone(phone, country_code='62'):
+    # "0812-3456-789", "62 812 3456 789", "+62812..." -> "+628123456789" (E.164)
+    digits = re.sub(r'\D', '', phone or '')
+    if not digits:
+        return ''
+    if digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif digits.startswith('8'):
+        digits = country_code + digits
+    return '+' + digits
+
+
+# Versi SQL dari normalize_phone, untuk backfill dan pencarian massal
+NORMALIZE_PHONE_SQL = """
+    (SELECT CASE WHEN d = '' THEN NULL
+                 WHEN d LIKE '00%%' THEN '+' || substr(d, 3)
+                 WHEN d LIKE '0%%' THEN '+{country_code}' || substr(d, 2)
+                 WHEN d LIKE '8%%' THEN '+{country_code}' || d
+                 ELSE '+' || d END
+       FROM (SELECT regexp_replace(COALESCE({column}, ''), '\\D', '', 'g') AS d) AS digits)
+"""
+
+
+def normalize_phone_sql(column, country_code='62'):
+    return NORMALIZE_PHONE_SQL.format(column=column, country_code=country_code)
+
 
 class PartnerCategory(models.Model):
-    _inherit = 'res.partner.category'
+    _inherit = ['res.partner.category', 'pitcar.count.mixin']
 
     partner_count = fields.Integer(string="Partner Count", compute='_compute_partner_count')
 
     @api.depends('partner_ids')
     def _compute_partner_count(self):
+        counts = self._count_related('res.partner', 'category_id')
         for category in self:
-            category.partner_count = len(category.partner_ids)
+            category.partner_count = counts.get(category._origin.id, 0)
 
 
 class ResPartnerSource(models.Model):
@@ -20,7 +52,7 @@ class ResPartnerSource(models.Model):
     name = fields.Char(string="Name", required=True)
 
 class ResPartner(models.Model):
-    _inherit = ['res.partner']
+    _inherit = ['res.partner', 'pitcar.count.source.mixin']
 
     gender = fields.Selection(
         [('male', 'Male'), 
@@ -33,6 +65,98 @@ class ResPartner(models.Model):
     category_id = fields.Many2many('res.partner.category', column1='partner_id',
                                     column2='category_id', string='Tags', required=True)
     phone = fields.Char(unaccent=False, required=True)
+    # Nomor dalam format E.164, dipakai untuk mencari customer dan duplikat
+    phone_normalized = fields.Char(
+        string="Normalized Phone", compute='_compute_phone_normalized', store=True, index=True)
+    mobile_normalized = fields.Char(
+        string="Normalized Mobile", compute='_compute_phone_normalized', store=True, index=True)
+    phone_search = fields.Char(
+        string="Phone (Exact)", compute='_compute_phone_search', search='_search_phone_search',
+        help="Matches phone or mobile in any format, e.g. 0812 3456 789 or +62 812-3456-789.")
+
+    def init(self):
+        super().init()
+        # Blok nama mirip di deteksi duplikat (operator % pg_trgm)
+        if self.env.registry.has_trigram:
+            tools.create_index(self._cr, 'res_partner_name_trgm_index', self._table,
+                               ['name gin_trgm_ops'], method='gin')
+
+    @api.depends('phone', 'mobile')
+    def _compute_phone_normalized(self):
+        for partner in self:
+            partner.phone_normalized = normalize_phone(partner.phone) or False
+            partner.mobile_normalized = normalize_phone(partner.mobile) or False
+
+    def _compute_phone_search(self):
+        for partner in self:
+            partner.phone_search = partner.phone_normalized
+
+    def _search_phone_search(self, operator, value):
+        if operator not in ('=', 'ilike') or not isinstance(value, str):
+            raise exceptions.UserError(_("Unsupported search on phone: %s", operator))
+        phone = normalize_phone(value)
+        if not phone:
+            return [('id', '=', 0)]
+        return ['|', ('phone_normalized', '=', phone), ('mobile_normalized', '=', phone)]
+
+    @api.model
+    def _phone_lookup(self, phone, limit=5, order_limit=3):
+        """Customers with this phone or mobile, their cars and last orders.
+
+        Index lookups only: the normalized phone columns, the cars of the
+        matched partners and their latest orders through the
+        (partner_id, date_order) index, whatever the size of the history.
+        """
+        phone = normalize_phone(phone)
+        if not phone:
+            return []
+        partner_ids = list(self._search(
+            ['|', ('phone_normalized', '=', phone), ('mobile_normalized', '=', phone)], limit=limit, order='id'))
+        if not partner_ids:
+            return []
+        Car = self.env['res.partner.car']
+        car_ids = list(Car._search([('partner_id', 'in', partner_ids)], order='id'))
+        cars_by_partner = {}
+        for car in Car._checkin_car_data(car_ids):
+            cars_by_partner.setdefault(car['customer']['id'], []).append(car)
+
+        SaleOrder = self.env['sale.order']
+        SaleOrder.check_access_rights('read')
+        SaleOrder.flush_model(['partner_id', 'name', 'state', 'date_order', 'partner_car_id', 'amount_total'])
+        self.env.cr.execute("""
+            SELECT so.id, so.partner_id, so.name, so.state, so.date_order, car.number_plate, so.amount_total
+              FROM unnest(%s::int[]) AS p(id)
+        CROSS JOIN LATERAL (
+                SELECT * FROM sale_order
+                 WHERE partner_id = p.id
+              ORDER BY date_order DESC, id DESC
+                 LIMIT %s
+            ) so
+         LEFT JOIN res_partner_car car ON car.id = so.partner_car_id
+          ORDER BY so.date_order DESC, so.id DESC
+        """, [partner_ids, order_limit])
+        rows = self.env.cr.fetchall()
+        allowed = set(SaleOrder.browse([row[0] for row in rows])._filter_access_rules('read').ids)
+        orders_by_partner = {}
+        for row in rows:
+            if row[0] in allowed:
+                orders_by_partner.setdefault(row[1], []).append({
+                    'id': row[0],
+                    'name': row[2],
+                    'state': row[3],
+                    'date_order': fields.Datetime.to_string(row[4]) if row[4] else False,
+                    'number_plate': row[5] or False,
+                    'amount_total': row[6],
+                })
+
+        return [{
+            'id': partner['id'],
+            'name': partner['name'],
+            'phone': partner['phone'],
+            'mobile': partner['mobile'],
+            'cars': cars_by_partner.get(partner['id'], []),
+            'last_orders': orders_by_partner.get(partner['id'], []),
+        } for partner in self.browse(partner_ids).read(['name', 'phone', 'mobile'])]
 
 class PitcarMechanic(models.Model):
     _name = 'pitcar.mechanic'
@@ -56,3 +180,16 @@ class PitcarMechanicNew(models.Model):
         ('name_uniq', 'unique (name)', "Mechanic name already exists !"),
     ]
 
+    def write(self, vals):
+        res = super(PitcarMechanicNew, self).write(vals)
+        if 'name' in vals:
+            # Nama tim mekanik yang tersimpan di order, picking dan invoice ikut diperbarui
+            for model_name in self.env['pitcar.mechanic.team.mixin']._get_mechanic_team_models():
+                self.env[model_name]._recompute_mechanic_team_sql(mechanic_ids=self.ids)
+        return res
+
+    @api.model
+    def _cron_rebuild_mechanic_team(self):
+        for model_name in self.env['pitcar.mechanic.team.mixin']._get_mechanic_team_models():
+            self.env[model_name]._recompute_mechanic_team_sql(commit=True)
+
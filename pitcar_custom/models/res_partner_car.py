@@ -1,9 +1,32 @@
 from datetime import date
 from odoo import models, fields, api, _, exceptions
+from odoo.osv import expression
+from .pitcar_perf_log import profiled
 import re
 
+
+ENGINE_TYPES = [
+    ('petrol', 'Petrol'),
+    ('diesel', 'Diesel'),
+    ('electric', 'Electric'),
+    ('hybrid', 'Hybrid'),
+    ('gas', 'Gas'),
+    ('other', 'Other'),
+]
+
+# Field mobil yang disalin ke sale order / invoice, perubahannya diantrikan ke pitcar.car.recompute
+CAR_DETAIL_FIELDS = ('brand', 'brand_type', 'year', 'transmission', 'engine_type',
+                     'engine_number', 'frame_number', 'color')
+
+
+def normalize_number_plate(number_plate):
+    # "b 1234 xyz" -> "B1234XYZ", format yang disimpan di database
+    return re.sub(r'\s+', '', number_plate or '').upper()
+
+
 class ResPartnerCarTransmission(models.Model):
     _name='res.partner.car.transmission'
+    _inherit = ['pitcar.car.catalogue.source.mixin']
     _description = 'Transmission of car'
     _order = 'name'
 
@@ -12,6 +35,7 @@ class ResPartnerCarTransmission(models.Model):
 
 class ResPartnerCarBrand(models.Model):
     _name='res.partner.car.brand'
+    _inherit = ['pitcar.count.mixin', 'pitcar.car.catalogue.source.mixin']
     _description = 'Brand of car'
     _order = 'name'
 
@@ -27,8 +51,9 @@ class ResPartnerCarBrand(models.Model):
 
     @api.depends('car_ids')
     def _compute_count(self):
+        counts = self._count_related('res.partner.car', 'brand')
         for rec in self:
-            rec.car_count = len(rec.car_ids)
+            rec.car_count = counts.get(rec._origin.id, 0)
 
     @api.depends('car_count')
     def _compute_count_string(self):
@@ -37,17 +62,30 @@ class ResPartnerCarBrand(models.Model):
 
     @api.depends('brand_type_ids')
     def _compute_brand_type_count(self):
+        counts = self._count_related('res.partner.car.type', 'brand')
         for rec in self:
-            rec.brand_type_count = len(rec.brand_type_ids)
+            rec.brand_type_count = counts.get(rec._origin.id, 0)
 
     @api.depends('brand_type_count')
     def _compute_brand_type_count_string(self):
         for rec in self:
             rec.brand_type_count_string = f"{rec.brand_type_count} Type{'s' if rec.brand_type_count != 1 else ''}"
 
+    def write(self, vals):
+        res = super(ResPartnerCarBrand, self).write(vals)
+        if 'name' in vals and self.ids:
+            # Nama type & mobil menyimpan nama brand, dihitung ulang lewat antrian
+            Recompute = self.env['pitcar.car.recompute']
+            self.env.cr.execute("SELECT id FROM res_partner_car_type WHERE brand IN %s", [tuple(self.ids)])
+            Recompute._enqueue('res.partner.car.type', [row[0] for row in self.env.cr.fetchall()])
+            self.env.cr.execute("SELECT id FROM res_partner_car WHERE brand IN %s", [tuple(self.ids)])
+            Recompute._enqueue('res.partner.car', [row[0] for row in self.env.cr.fetchall()])
+        return res
+
 
 class ResPartnerCarType(models.Model):
     _name='res.partner.car.type'
+    _inherit = ['pitcar.count.mixin', 'pitcar.count.source.mixin', 'pitcar.car.catalogue.source.mixin']
     _description = 'Type of car'
     _order = 'name'
 
@@ -61,8 +99,10 @@ class ResPartnerCarType(models.Model):
     
     @api.depends('car_ids')
     def _compute_count(self):
+        # Field ini disimpan, jadi selalu dihitung langsung tanpa cache
+        counts = self._count_related('res.partner.car', 'brand_type', use_cache=False)
         for rec in self:
-            rec.car_count = len(rec.car_ids)
+            rec.car_count = counts.get(rec._origin.id, 0)
     
     @api.depends('car_count')
     def _compute_count_string(self):
@@ -74,9 +114,17 @@ class ResPartnerCarType(models.Model):
         for rec in self:
             rec.formatted_name = '{brand} {name}'.format(brand=rec.brand.name, name=rec.name)
 
+    def write(self, vals):
+        res = super(ResPartnerCarType, self).write(vals)
+        if ('name' in vals or 'brand' in vals) and self.ids:
+            self.env.cr.execute("SELECT id FROM res_partner_car WHERE brand_type IN %s", [tuple(self.ids)])
+            self.env['pitcar.car.recompute']._enqueue('res.partner.car', [row[0] for row in self.env.cr.fetchall()])
+        return res
+
 
 class ResPartnerCar(models.Model):
     _name='res.partner.car'
+    _inherit = ['pitcar.count.source.mixin']
     _description = 'Cars of partner'
     _order = 'name asc'
 
@@ -92,20 +140,192 @@ class ResPartnerCar(models.Model):
     image = fields.Binary(string="Image")
     comment = fields.Html(string='Notes')
     partner_id = fields.Many2one('res.partner', string="Customer", required=True, index=True)
-    engine_type = fields.Selection([
-        ('petrol', 'Petrol'),
-        ('diesel', 'Diesel'),
-        ('electric', 'Electric'),
-        ('hybrid', 'Hybrid'),
-        ('gas', 'Gas'),
-        ('other', 'Other'),
-    ], string='Engine Type', required=True)
+    engine_type = fields.Selection(ENGINE_TYPES, string='Engine Type', required=True)
+
+    odometer_ids = fields.One2many('res.partner.car.odometer', 'car_id', string="Odometer History")
+    last_odometer = fields.Float(string="Last Odometer (KM)", compute='_compute_last_odometer')
+    last_odometer_date = fields.Datetime(string="Last Odometer Reading", compute='_compute_last_odometer')
+    odometer_count = fields.Integer(string="Odometer Readings", compute='_compute_last_odometer')
+
+    # Plat nomor selalu disimpan dalam bentuk normal, jadi unique index ini
+    # juga menahan dua worker yang menyimpan plat sama di waktu bersamaan
+    _sql_constraints = [
+        ('number_plate_uniq', 'unique (number_plate)', "Number Plate must be unique!"),
+    ]
+
+    def init(self):
+        # Index untuk pencarian awalan plat ("B1234%"), unique index tidak bisa dipakai untuk LIKE
+        self._cr.execute("""
+            CREATE INDEX IF NOT EXISTS res_partner_car_number_plate_prefix_index
+                ON res_partner_car (number_plate text_pattern_ops)
+        """)
+
+    @api.model
+    def _name_search(self, name, args=None, operator='ilike', limit=100, name_get_uid=None):
+        # Jalur cepat check-in: cari berdasarkan plat dulu sebelum ilike ke nama mobil
+        if name and operator in ('ilike', 'like', '=', '=like', '=ilike'):
+            # Operator "=" hanya mencari plat yang persis sama, tanpa prefix/trigram
+            car_ids = self._search_number_plate(
+                name, args, limit=limit, access_rights_uid=name_get_uid,
+                exact_only=operator not in ('ilike', 'like'),
+            )
+            if car_ids:
+                return car_ids
+        return super(ResPartnerCar, self)._name_search(name, args=args, operator=operator, limit=limit, name_get_uid=name_get_uid)
+
+    @api.model
+    def _search_number_plate(self, number_plate, domain=None, limit=None, access_rights_uid=None, exact_only=False):
+        """Return car ids for a typed plate, cheapest lookup first.
+
+        Exact match on the unique index, then prefix match on the
+        text_pattern_ops index, then the trigram ``ilike``. With
+        ``exact_only`` only the exact match is tried.
+        """
+        plate = normalize_number_plate(number_plate)
+        if not plate:
+            return []
+        domain = domain or []
+        escaped = re.sub(r'([%_\\])', r'\\\1', plate)
+        plate_domains = [[('number_plate', '=', plate)]]
+        if not exact_only:
+            plate_domains += [
+                [('number_plate', '=like', escaped + '%')],
+                [('number_plate', 'ilike', plate)],
+            ]
+        for plate_domain in plate_domains:
+            car_ids = list(self._search(
+                expression.AND([plate_domain, domain]),
+                limit=limit, order='number_plate', access_rights_uid=access_rights_uid,
+            ))
+            if car_ids:
+                return car_ids
+        return []
+
+    @api.model
+    def _lookup_by_plate(self, number_plate, limit=8):
+        # Mobil dikembalikan dengan customer, brand dan type sudah di-prefetch
+        cars = self.browse(self._search_number_plate(number_plate, limit=limit))
+        cars.mapped('partner_id.name')
+        cars.mapped('brand.name')
+        cars.mapped('brand_type.name')
+        return cars
+
+    @api.model
+    def _checkin_lookup(self, number_plate, limit=8):
+        """Cars matching a typed plate as compact dicts for the check-in tablets."""
+        return self._checkin_car_data(self._search_number_plate(number_plate, limit=limit))
+
+    @api.model
+    def _checkin_car_data(self, car_ids):
+        # Satu query join, bukan read() + name_get per many2one
+        if not car_ids:
+            return []
+        self.flush_model()
+        self.env['res.partner'].flush_model(['name', 'phone'])
+        self.env.cr.execute("""
+            SELECT c.id, c.number_plate, c.year, c.color, c.predicted_service_date,
+                   p.id, p.name, p.phone, b.id, b.name, t.id, t.name
+              FROM res_partner_car c
+              JOIN res_partner p ON p.id = c.partner_id
+              JOIN res_partner_car_brand b ON b.id = c.brand
+              JOIN res_partner_car_type t ON t.id = c.brand_type
+             WHERE c.id IN %s
+        """, [tuple(car_ids)])
+        rows = {row[0]: row for row in self.env.cr.fetchall()}
+        return [{
+            'id': row[0],
+            'number_plate': row[1],
+            'year': row[2],
+            'color': row[3],
+            'predicted_service_date': fields.Date.to_string(row[4]) if row[4] else False,
+            'customer': {'id': row[5], 'name': row[6], 'phone': row[7]},
+            'brand': {'id': row[8], 'name': row[9]},
+            'brand_type': {'id': row[10], 'name': row[11]},
+        } for row in (rows[car_id] for car_id in car_ids if car_id in rows)]
+
+    def _checkin_summary(self, visit_limit=5):
+        """Car, customer and last visits in three queries."""
+        self.ensure_one()
+        self.check_access_rights('read')
+        self.check_access_rule('read')
+        car = self._checkin_car_data([self.id])[0]
+        visits_query = self.env['sale.order']._search(
+            [('partner_car_id', '=', self.id)], order='date_order desc, id desc', limit=visit_limit)
+        query_str, params = visits_query.select('"sale_order"."id"')
+        self.env['sale.order'].flush_model([
+            'name', 'state', 'date_order', 'date_completed', 'partner_car_odometer', 'amount_total',
+        ])
+        self.env.cr.execute("""
+            SELECT id, name, state, date_order, date_completed, partner_car_odometer, amount_total
+              FROM sale_order
+             WHERE id IN ({query})
+          ORDER BY date_order DESC, id DESC
+        """.format(query=query_str), params)
+        car['last_visits'] = [{
+            'id': row[0],
+            'name': row[1],
+            'state': row[2],
+            'date_order': fields.Datetime.to_string(row[3]) if row[3] else False,
+            'date_completed': fields.Datetime.to_string(row[4]) if row[4] else False,
+            'odometer': row[5],
+            'amount_total': row[6],
+        } for row in self.env.cr.fetchall()]
+        return car
+
+    @profiled
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('number_plate'):
+                vals['number_plate'] = normalize_number_plate(vals['number_plate'])
+        self._check_number_plate_available([vals.get('number_plate') for vals in vals_list])
+        return super(ResPartnerCar, self).create(vals_list)
+
+    @profiled
+    def write(self, vals):
+        if vals.get('number_plate'):
+            vals['number_plate'] = normalize_number_plate(vals['number_plate'])
+            self._check_number_plate_available([vals['number_plate']] * len(self), exclude_ids=self.ids)
+        if 'partner_id' in vals:
+            # Pemilik lama juga perlu dihitung ulang RFM-nya
+            self.env['pitcar.rfm.change']._enqueue('res.partner', self.partner_id.ids)
+        res = super(ResPartnerCar, self).write(vals)
+        if any(fname in vals for fname in CAR_DETAIL_FIELDS):
+            # Order & invoice lama diperbarui di belakang layar, bukan di request ini
+            self.env['pitcar.car.recompute']._enqueue('res.partner.car', self.ids)
+        return res
+
+    @api.model
+    def _check_number_plate_available(self, number_plates, exclude_ids=None):
+        """Check a batch of normalized plates with a single query.
+
+        Every plate that is repeated inside the batch or already used by
+        another car is reported in one error.
+        """
+        number_plates = [plate for plate in number_plates if plate]
+        if not number_plates:
+            return
+        seen = set()
+        duplicates = set()
+        for plate in number_plates:
+            if plate in seen:
+                duplicates.add(plate)
+            seen.add(plate)
+        domain = [('number_plate', 'in', list(seen))]
+        if exclude_ids:
+            domain.append(('id', 'not in', exclude_ids))
+        duplicates.update(car['number_plate'] for car in self.search_read(domain, ['number_plate']))
+        if duplicates:
+            raise exceptions.ValidationError(
+                _("Number Plate must be unique! Already used: %s", ', '.join(sorted(duplicates)))
+            )
 
     # if brand changed, type will be reset
     @api.onchange('brand')
     def _onchange_brand(self):
         self.brand_type = False
-        return {'domain': {'brand_type': [('brand','=',self.brand.id)]}}
+        type_ids = self.env['pitcar.car.catalogue']._get_brand_type_ids(self.brand.id)
+        return {'domain': {'brand_type': [('id', 'in', type_ids)]}}
 
     # Name Computation from Brand and Type
     @api.depends('brand','brand_type','number_plate')
@@ -117,19 +337,38 @@ class ResPartnerCar(models.Model):
                 number_plate=rec.number_plate
             ) 
 
-    # Number Plate Validation for Unique
-    @api.constrains('number_plate')
-    def _check_number_plate(self):
-        for rec in self:
-            if rec.number_plate:
-                if self.env['res.partner.car'].search_count([('number_plate','=',rec.number_plate)]) > 1:
-                    raise exceptions.ValidationError(_("Number Plate must be unique!"))
+    @profiled
+    def _compute_last_odometer(self):
+        car_ids = [car_id for car_id in self._origin.ids if car_id]
+        readings = {}
+        if car_ids:
+            self.env['res.partner.car.odometer'].flush_model()
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (car_id) car_id, odometer, reading_date,
+                       COUNT(*) OVER (PARTITION BY car_id)
+                  FROM res_partner_car_odometer
+                 WHERE car_id IN %s
+              ORDER BY car_id, reading_date DESC, id DESC
+            """, [tuple(car_ids)])
+            readings = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for car in self:
+            odometer, reading_date, count = readings.get(car._origin.id, (0.0, False, 0))
+            car.last_odometer = odometer
+            car.last_odometer_date = reading_date
+            car.odometer_count = count
+
+    def action_view_odometer(self):
+        self.ensure_one()
+        action = self.env['ir.actions.act_window']._for_xml_id('pitcar_custom.action_res_partner_car_odometer')
+        action['domain'] = [('car_id', '=', self.id)]
+        action['context'] = {'default_car_id': self.id}
+        return action
 
-    # Number Plate Remove space in create and update
+    # Number Plate Remove space in form, create and write normalize it as well
     @api.onchange('number_plate')
     def _onchange_number_plate(self):
         if self.number_plate:
-            self.number_plate = self.number_plate.replace(" ", "").upper()
+            self.number_plate = normalize_number_plate(self.number_plate)
 
     # Year Validation
     @api.constrains('year')
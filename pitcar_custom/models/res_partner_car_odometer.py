@@ -0,0 +1,55 @@
+from odoo import models, fields, api, tools, _, exceptions
+
+
+class ResPartnerCarOdometer(models.Model):
+    """Append-only odometer readings of a car.
+
+    Readings are recorded when an order is confirmed and when it is
+    invoiced. The (car, reading date) index serves the car's whole
+    history with one range scan.
+    """
+    _name = 'res.partner.car.odometer'
+    _description = 'Car Odometer Reading'
+    _order = 'reading_date desc, id desc'
+    _rec_name = 'odometer'
+
+    car_id = fields.Many2one('res.partner.car', string="Car", required=True, ondelete='cascade')
+    reading_date = fields.Datetime(string="Reading Date", required=True, default=fields.Datetime.now)
+    odometer = fields.Float(string="Odometer (KM)", required=True, group_operator="max")
+    source = fields.Selection([
+        ('confirm', 'Order Confirmed'),
+        ('invoice', 'Order Invoiced'),
+        ('manual', 'Manual'),
+    ], string="Source", required=True, default='manual', readonly=True)
+    sale_order_id = fields.Many2one('sale.order', string="Sale Order", ondelete='set null', readonly=True, index='btree_not_null')
+
+    def init(self):
+        tools.create_index(self._cr, 'res_partner_car_odometer_car_date_index',
+                           self._table, ['car_id', 'reading_date'])
+
+    def write(self, vals):
+        raise exceptions.UserError(_("Odometer readings cannot be modified, record a new reading instead."))
+
+    @api.model
+    def _record_from_orders(self, orders, source):
+        """Append one reading per order with a car and an odometer value.
+
+        An order that already has a reading with the same value is skipped,
+        so confirming then invoicing an unchanged order stores one row.
+        """
+        orders = orders.filtered(lambda order: order.partner_car_id and order.partner_car_odometer > 0)
+        if not orders:
+            return self.browse()
+        existing = {
+            (reading.sale_order_id.id, reading.odometer)
+            for reading in self.sudo().search([('sale_order_id', 'in', orders.ids)])
+        }
+        now = fields.Datetime.now()
+        vals_list = [{
+            'car_id': order.partner_car_id.id,
+            'reading_date': (order.date_completed if source == 'invoice' else None) or now,
+            'odometer': order.partner_car_odometer,
+            'source': source,
+            'sale_order_id': order.id,
+        } for order in orders if (order.id, order.partner_car_odometer) not in existing]
+        return self.sudo().create(vals_list)
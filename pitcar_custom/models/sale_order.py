@@ -1,4 +1,9 @@
-from odoo import models, fields, api, _, exceptions
+from odoo import models, fields, api, _, exceptions, Command
+from odoo.tools import split_every, create_index
+from .res_partner_car import ENGINE_TYPES
+from .sale_order_feedback import FEEDBACK_FIELDS, RATING_TO_SATISFACTION
+from .pitcar_perf_log import profiled
+from collections import defaultdict
 from datetime import timedelta, date, datetime
 import logging
 
@@ -10,7 +15,18 @@ READONLY_FIELD_STATES = {
 }
 
 class SaleOrder(models.Model):
-    _inherit = 'sale.order'
+    _inherit = ['sale.order', 'pitcar.count.source.mixin', 'pitcar.car.details.mixin', 'pitcar.mechanic.team.mixin']
+
+    _car_detail_fields = {
+        'partner_car_brand': 'brand',
+        'partner_car_brand_type': 'brand_type',
+        'partner_car_year': 'year',
+        'partner_car_transmission': 'transmission',
+        'partner_car_engine_type': 'engine_type',
+        'partner_car_engine_number': 'engine_number',
+        'partner_car_frame_number': 'frame_number',
+        'partner_car_color': 'color',
+    }
 
     campaign = fields.Selection(
         [
@@ -41,48 +57,51 @@ class SaleOrder(models.Model):
         states=READONLY_FIELD_STATES,
     )
     partner_car_brand = fields.Many2one(
+        'res.partner.car.brand',
         string="Car Brand",
-        related="partner_car_id.brand",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_brand_type = fields.Many2one(
+        'res.partner.car.type',
         string="Car Brand Type",
-        related="partner_car_id.brand_type",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_year = fields.Char(
         string="Car Year",
-        related="partner_car_id.year",
+        compute="_compute_partner_car_details",
         store=True,
     )
+    # Riwayat odometer disimpan di res.partner.car.odometer, bukan lewat tracking
     partner_car_odometer = fields.Float(
         string="Odometer",
-        tracking=True,
     )
     partner_car_transmission = fields.Many2one(
         'res.partner.car.transmission',
         string="Transmission",
-        related="partner_car_id.transmission",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_engine_type = fields.Selection(
+        ENGINE_TYPES,
         string="Engine Type",
-        related="partner_car_id.engine_type",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_engine_number = fields.Char(
         string="Engine Number",
-        related="partner_car_id.engine_number",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_frame_number = fields.Char(
         string="Frame Number",
-        related="partner_car_id.frame_number",
+        compute="_compute_partner_car_details",
         store=True,
     )
     partner_car_color = fields.Char(
         string="Color",
-        related="partner_car_id.color",
+        compute="_compute_partner_car_details",
         store=True,
     )
     car_mechanic_id = fields.Many2one(
@@ -115,93 +134,90 @@ class SaleOrder(models.Model):
         tracking=True,   # Jika ingin melacak perubahan field ini
     )
 
-    is_willing_to_feedback = fields.Selection([
-        ('yes', 'Yes'),
-        ('no', 'No')
-    ], string='Willing to Give Feedback?', help='Apakah customer bersedia memberikan feedback?')
-
-    no_feedback_reason = fields.Text(string='Reason for not giving feedback', help='Alasan customer tidak bersedia memberikan feedback')
-
-    customer_rating = fields.Selection([
-        ('1', '1'),
-        ('2', '2'),
-        ('3', '3'),
-        ('4', '4'),
-        ('5', '5')
-    ], string='Customer Rating',
-    help='Rating yang diberikan oleh customer terhadap layanan yang diberikan oleh Pitcar. Rating ini berdasarkan skala 1-5. 1 adalah rating terendah dan 5 adalah rating tertinggi.'
-    ) 
-    
-    customer_satisfaction = fields.Selection([
-        ('very_dissatisfied', 'Very Dissatisfied (Sangat Tidak Puas / Komplain)'),
-        ('dissatisfied', 'Dissatisfied (Tidak Puas / Komplain)'),
-        ('neutral', 'Neutral (Cukup Puas)'),
-        ('satisfied', 'Satisfied (Puas)'),
-        ('very_satisfied', 'Very Satisfied (Sangat Puas)')
-    ], string='Customer Satisfaction', readonly=True)
-
-    customer_feedback = fields.Text(string='Customer Feedback')
-
-    feedback_classification_ids = fields.Many2many(
-        'feedback.classification', 
-        string='Feedback Classification',
-        help='Ini digunakan untuk mengklasifikasikan feedback yang diberikan oleh customer. Misalnya, feedback yang diberikan oleh customer adalah tentang kualitas produk, maka kita bisa mengklasifikasikan feedback tersebut ke dalam kategori "Kualitas Produk"'
-    )
-
-    review_google = fields.Selection([
-        ('yes', 'Yes'),
-        ('no', 'No')
-    ], 
-    string='Review Google',
-    help='Apakah customer bersedia memberikan review di Google?'
-    )
-
-    follow_instagram = fields.Selection([
-        ('yes', 'Yes'),
-        ('no', 'No')
-    ], 
-    string='Follow Instagram',
-    help='Apakah customer bersedia mengikuti akun Instagram Pitcar?'
-    )
-
-    complaint_action = fields.Text(
-        string='Action Taken for Complaint', 
-        help='Tindakan yang diambil oleh Pitcar untuk menyelesaikan komplain yang diberikan oleh customer'
-    )
-    
-    complaint_status = fields.Selection([
-        ('solved', 'Solved'),
-        ('not_solved', 'Not Solved')
-    ], 
-    string='Complaint Status',
-    help='Status Komplain dari customer apakah berhasil ditangani atau tidak.'
-    )
-
-    # New fields for follow-up
-    is_follow_up = fields.Selection([
-        ('yes', 'Yes'),
-        ('no', 'No')
-    ], string='Follow Up?', help='Apakah customer sudah di-follow up?')
-
-    customer_feedback_follow_up = fields.Text(string='Customer Feedback (Follow Up)')
+    # Feedback & reminder disimpan di sale.order.feedback (1:1, dibuat saat pertama kali diisi)
+    # supaya update feedback tidak menulis ulang baris sale_order yang lebar
+    feedback_id = fields.Many2one('sale.order.feedback', string="Feedback", copy=False, readonly=True, index='btree_not_null')
+
+    is_willing_to_feedback = fields.Selection(related='feedback_id.is_willing_to_feedback', readonly=False)
+    no_feedback_reason = fields.Text(related='feedback_id.no_feedback_reason', readonly=False)
+    customer_rating = fields.Selection(related='feedback_id.customer_rating', readonly=False)
+    customer_satisfaction = fields.Selection(related='feedback_id.customer_satisfaction')
+    customer_feedback = fields.Text(related='feedback_id.customer_feedback', readonly=False)
+    feedback_classification_ids = fields.Many2many(related='feedback_id.feedback_classification_ids', readonly=False)
+    review_google = fields.Selection(related='feedback_id.review_google', readonly=False)
+    follow_instagram = fields.Selection(related='feedback_id.follow_instagram', readonly=False)
+    complaint_action = fields.Text(related='feedback_id.complaint_action', readonly=False)
+    complaint_status = fields.Selection(related='feedback_id.complaint_status', readonly=False)
+    show_complaint_action = fields.Boolean(related='feedback_id.show_complaint_action')
+
+    # Follow up 3 hari
+    is_follow_up = fields.Selection(related='feedback_id.is_follow_up', readonly=False)
+    customer_feedback_follow_up = fields.Text(related='feedback_id.customer_feedback_follow_up', readonly=False)
+    follow_up_evidence = fields.Text(related='feedback_id.follow_up_evidence', readonly=False)
+    no_follow_up_reason = fields.Text(related='feedback_id.no_follow_up_reason', readonly=False)
+
+    # Reminder 3 bulan
+    reminder_3_months = fields.Selection(related='feedback_id.reminder_3_months', readonly=False)
+    date_follow_up_3_months = fields.Date(related='feedback_id.date_follow_up_3_months', readonly=False)
+    category_3_months = fields.Many2many(related='feedback_id.category_3_months', readonly=False)
+    is_response_3_months = fields.Selection(related='feedback_id.is_response_3_months', readonly=False)
+    feedback_3_months = fields.Text(related='feedback_id.feedback_3_months', readonly=False)
+    is_booking_3_months = fields.Selection(related='feedback_id.is_booking_3_months', readonly=False)
+    booking_date_3_months = fields.Date(related='feedback_id.booking_date_3_months', readonly=False)
+    no_reminder_reason_3_months = fields.Text(related='feedback_id.no_reminder_reason_3_months', readonly=False)
+
+    # Reminder 6 bulan
+    reminder_6_months = fields.Selection(related='feedback_id.reminder_6_months', readonly=False)
+    date_follow_up_6_months = fields.Date(related='feedback_id.date_follow_up_6_months', readonly=False)
+    category_6_months = fields.Many2many(related='feedback_id.category_6_months', readonly=False)
+    is_response_6_months = fields.Selection(related='feedback_id.is_response_6_months', readonly=False)
+    feedback_6_months = fields.Text(related='feedback_id.feedback_6_months', readonly=False)
+    is_booking_6_months = fields.Selection(related='feedback_id.is_booking_6_months', readonly=False)
+    booking_date_6_months = fields.Date(related='feedback_id.booking_date_6_months', readonly=False)
+    no_reminder_reason_6_months = fields.Text(related='feedback_id.no_reminder_reason_6_months', readonly=False)
 
     notif_follow_up_3_days = fields.Char(
         string="Notif Follow Up (3 Hari)", 
         compute='_compute_notif_follow_up_3_days',
-        store=True
     )
     next_follow_up_3_days = fields.Date(
         string="Next Follow Up (3 Days)", 
         compute='_compute_next_follow_up_3_days', 
-        store=True
+        search='_search_next_follow_up_3_days',
+    )
+    notif_follow_up_3_months = fields.Char(
+        string="Notif Follow Up (3 Bulan)", 
+        compute='_compute_notif_follow_up_3_months',
+    )
+    next_follow_up_3_months = fields.Date(
+        string="Next Reminder (3 Months)", 
+        compute='_compute_next_follow_up_3_months', 
+        search='_search_next_follow_up_3_months',
+    )
+    notif_follow_up_6_months = fields.Char(
+        string="Notif Follow Up (6 Bulan)", 
+        compute='_compute_notif_follow_up_6_months',
+    )
+    next_follow_up_6_months = fields.Date(
+        string="Next Reminder (6 Months)", 
+        compute='_compute_next_follow_up_6_months', 
+        search='_search_next_follow_up_6_months',
     )
 
-    follow_up_evidence = fields.Text(string='Description')
-
-    no_follow_up_reason = fields.Text(string='Reason for No Follow Up')
+    # Antrian reminder, filter reminder di list view membaca dari sini
+    follow_up_ids = fields.One2many('sale.order.follow.up', 'sale_order_id', string="Follow Up Queue")
+    follow_up_due_date = fields.Date(
+        string="Next Pending Follow Up",
+        compute='_compute_follow_up_due_date',
+        search='_search_follow_up_due_date',
+    )
 
-    show_complaint_action = fields.Boolean(compute='_compute_show_complaint_action', store=True)
-    complaint_action = fields.Text(string="Complaint Action")
+    # Prediksi servis berikutnya hanya di order selesai terakhir dari mobil tersebut
+    car_next_service_date = fields.Date(
+        string="Car Next Service",
+        compute='_compute_car_next_service_date',
+        search='_search_car_next_service_date',
+    )
 
     @api.onchange('is_willing_to_feedback')
     def _onchange_is_willing_to_feedback(self):
@@ -215,113 +231,71 @@ class SaleOrder(models.Model):
         else:
             self.no_feedback_reason = False
 
-    @api.depends('customer_satisfaction')
-    def _compute_show_complaint_action(self):
-        for task in self:
-            task.show_complaint_action = task.customer_satisfaction in ['very_dissatisfied', 'dissatisfied']
-
-    @api.depends('customer_rating')
-    def _compute_show_complaint_action(self):
-        for order in self:
-            order.show_complaint_action = order.customer_rating in ['1', '2']
-
     @api.onchange('customer_rating')
     def _onchange_customer_rating(self):
-        rating_to_satisfaction = {
-            '1': 'very_dissatisfied',
-            '2': 'dissatisfied',
-            '3': 'neutral',
-            '4': 'satisfied',
-            '5': 'very_satisfied'
-        }
         if self.customer_rating:
-            self.customer_satisfaction = rating_to_satisfaction.get(self.customer_rating)
+            self.customer_satisfaction = RATING_TO_SATISFACTION.get(self.customer_rating)
             self.show_complaint_action = self.customer_rating in ['1', '2']
 
+    def init(self):
+        super().init()
+        # Order terakhir per customer (lookup telepon) tanpa membaca seluruh riwayat
+        create_index(self._cr, 'sale_order_partner_date_order_index',
+                     self._table, ['partner_id', 'date_order DESC', 'id DESC'])
+
+    @api.model
+    def _split_feedback_vals(self, vals):
+        feedback_vals = {fname: vals.pop(fname) for fname in FEEDBACK_FIELDS if fname in vals}
+        # Field readonly, selalu diturunkan dari rating di sale.order.feedback
+        feedback_vals.pop('show_complaint_action', None)
+        return feedback_vals
+
+    def _write_feedback(self, feedback_vals):
+        if not feedback_vals:
+            return
+        missing = self.filtered(lambda order: not order.feedback_id)
+        if missing:
+            self.env['sale.order.feedback'].sudo().create([
+                {'sale_order_id': order.id} for order in missing
+            ])
+            # Pasang feedback_id tanpa write ORM per order (tanpa tracking/recompute)
+            self.env.cr.execute("""
+                UPDATE sale_order so
+                   SET feedback_id = f.id
+                  FROM sale_order_feedback f
+                 WHERE f.sale_order_id = so.id
+                   AND so.id IN %s
+            """, [tuple(missing.ids)])
+            missing.invalidate_recordset(['feedback_id'])
+        self.feedback_id.write(feedback_vals)
+
+    @profiled
     @api.model
     def create(self, vals):
-        if 'customer_rating' in vals and 'customer_satisfaction' not in vals:
-            rating_to_satisfaction = {
-                '1': 'very_dissatisfied',
-                '2': 'dissatisfied',
-                '3': 'neutral',
-                '4': 'satisfied',
-                '5': 'very_satisfied'
-            }
-            vals['customer_satisfaction'] = rating_to_satisfaction.get(vals['customer_rating'])
-        return super(SaleOrder, self).create(vals)
+        feedback_vals = self._split_feedback_vals(vals)
+        order = super(SaleOrder, self).create(vals)
+        order._write_feedback(feedback_vals)
+        return order
 
+    @profiled
     def write(self, vals):
-        if 'customer_rating' in vals and 'customer_satisfaction' not in vals:
-            rating_to_satisfaction = {
-                '1': 'very_dissatisfied',
-                '2': 'dissatisfied',
-                '3': 'neutral',
-                '4': 'satisfied',
-                '5': 'very_satisfied'
-            }
-            vals['customer_satisfaction'] = rating_to_satisfaction.get(vals['customer_rating'])
-        return super(SaleOrder, self).write(vals)
-    
-     # Fields for 3 months reminder
-    reminder_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Reminder 3 Bulan?")
-    date_follow_up_3_months = fields.Date(string="Date Follow Up (3 Bulan)")
-    notif_follow_up_3_months = fields.Char(
-        string="Notif Follow Up (3 Bulan)", 
-        compute='_compute_notif_follow_up_3_months',
-        store=True
-    )
-     # Ubah field kategori untuk 3 bulan
-    category_3_months = fields.Many2many(
-        'feedback.classification', 
-        string='Reminder Tags (3 Bulan)',
-        relation='sale_order_feedback_3_months_rel',
-        column1='sale_order_id',
-        column2='feedback_classification_id',
-        help='Ini digunakan untuk mengklasifikasikan reminder yang diberikan oleh customer setelah 3 bulan.'
-    )
-
-    is_response_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Response? (3 Bulan)")
-    feedback_3_months = fields.Text(string="Feedback (3 Bulan)")
-    is_booking_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Booking? (3 Bulan)")
-    booking_date_3_months = fields.Date(string="Booking Date (3 Bulan)")
-    no_reminder_reason_3_months = fields.Text(string="Reason for No Reminder (3 Bulan)")
-
-    # Fields for 6 months reminder
-    reminder_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Reminder 6 Bulan?")
-    date_follow_up_6_months = fields.Date(string="Date Follow Up (6 Bulan)")
-    notif_follow_up_6_months = fields.Char(
-        string="Notif Follow Up (6 Bulan)", 
-        compute='_compute_notif_follow_up_6_months',
-        store=True
-    )
-     # Ubah field kategori untuk 6 bulan
-    category_6_months = fields.Many2many(
-        'feedback.classification', 
-        string='Reminder Tags (6 Bulan)',
-        relation='sale_order_feedback_6_months_rel',
-        column1='sale_order_id',
-        column2='feedback_classification_id',
-        help='Ini digunakan untuk mengklasifikasikan reminder yang diberikan oleh customer setelah 6 bulan.'
-    )
-
-    is_response_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Response? (6 Bulan)")
-    feedback_6_months = fields.Text(string="Feedback (6 Bulan)")
-    is_booking_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Booking? (6 Bulan)")
-    booking_date_6_months = fields.Date(string="Booking Date (6 Bulan)")
-    no_reminder_reason_6_months = fields.Text(string="Reason for No Reminder (6 Bulan)")
-
-    next_follow_up_3_months = fields.Date(
-        string="Next Reminder (3 Months)", 
-        compute='_compute_next_follow_up_3_months', 
-        store=True
-    )
-
-    next_follow_up_6_months = fields.Date(
-        string="Next Reminder (6 Months)", 
-        compute='_compute_next_follow_up_6_months', 
-        store=True
-    )
+        # Reminder yang sudah dijawab (yes/no) tidak perlu muncul lagi di antrian
+        answered_kinds = [kind for fname, kind in [
+            ('is_follow_up', '3_days'),
+            ('reminder_3_months', '3_months'),
+            ('reminder_6_months', '6_months'),
+        ] if vals.get(fname)]
+        feedback_vals = self._split_feedback_vals(vals)
+        if 'partner_id' in vals or 'partner_car_id' in vals:
+            # Pemilik lama juga perlu dihitung ulang RFM-nya
+            self.env['pitcar.rfm.change']._enqueue_order_owners(self)
+        res = True
+        if vals or not feedback_vals:
+            res = super(SaleOrder, self).write(vals)
+        self._write_feedback(feedback_vals)
+        if answered_kinds:
+            self.env['sale.order.follow.up']._mark_done(self, answered_kinds)
+        return res
 
     @api.depends('date_completed')
     def _compute_notif_follow_up_3_days(self):
@@ -354,6 +328,67 @@ class SaleOrder(models.Model):
             order.next_follow_up_6_months = self._compute_next_follow_up(order.date_completed, 180)
 
 
+    def _search_next_follow_up_3_days(self, operator, value):
+        return self._search_follow_up_queue('3_days', operator, value)
+
+    def _search_next_follow_up_3_months(self, operator, value):
+        return self._search_follow_up_queue('3_months', operator, value)
+
+    def _search_next_follow_up_6_months(self, operator, value):
+        return self._search_follow_up_queue('6_months', operator, value)
+
+    def _search_follow_up_due_date(self, operator, value):
+        return self._search_follow_up_queue(False, operator, value)
+
+    def _latest_car_orders_query(self, where, params):
+        # Order selesai terakhir per mobil, lewat index partner_car_id
+        return """
+            SELECT DISTINCT ON (so.partner_car_id) so.id
+              FROM res_partner_car car
+              JOIN sale_order so ON so.partner_car_id = car.id
+             WHERE so.date_completed IS NOT NULL
+               AND so.state IN ('sale', 'done')
+               AND {where}
+          ORDER BY so.partner_car_id, so.date_completed DESC, so.id DESC
+        """.format(where=where), params
+
+    @api.depends('partner_car_id.predicted_service_date', 'date_completed', 'state')
+    def _compute_car_next_service_date(self):
+        car_ids = tuple(self.partner_car_id.ids)
+        latest_ids = set()
+        if car_ids:
+            self.flush_model(['partner_car_id', 'date_completed', 'state'])
+            self.env.cr.execute(*self._latest_car_orders_query('car.id IN %s', [car_ids]))
+            latest_ids = {row[0] for row in self.env.cr.fetchall()}
+        for order in self:
+            is_latest = order._origin.id in latest_ids
+            order.car_next_service_date = is_latest and order.partner_car_id.predicted_service_date
+
+    def _search_car_next_service_date(self, operator, value):
+        if operator not in ('=', '<', '<=', '>', '>=') or not value:
+            raise exceptions.UserError(_("Unsupported search on next service: %s %s", operator, value))
+        self.env['res.partner.car'].flush_model(['predicted_service_date'])
+        self.flush_model(['partner_car_id', 'date_completed', 'state'])
+        query = self._latest_car_orders_query('car.predicted_service_date {} %s'.format(operator), [value])
+        return [('id', 'inselect', query)]
+
+    @profiled
+    @api.depends('follow_up_ids.due_date', 'follow_up_ids.state')
+    def _compute_follow_up_due_date(self):
+        for order in self:
+            due_dates = order.follow_up_ids.filtered(lambda f: f.state == 'pending').mapped('due_date')
+            order.follow_up_due_date = min(due_dates) if due_dates else False
+
+    # Pencarian tanggal reminder lewat index (due_date, state) di antrian,
+    # bukan scan seluruh tabel sale_order
+    def _search_follow_up_queue(self, kind, operator, value):
+        if value is False:
+            return [('date_completed', operator, False)]
+        domain = [('state', '=', 'pending'), ('due_date', operator, value)]
+        if kind:
+            domain.append(('kind', '=', kind))
+        return [('follow_up_ids', 'in', self.env['sale.order.follow.up']._search(domain))]
+
     def _compute_notif_follow_up(self, date_completed, days):
         try:
             if not date_completed:
@@ -380,11 +415,29 @@ class SaleOrder(models.Model):
             _logger.error(f"Error in _compute_next_follow_up: {str(e)}")
             return False
 
-    @api.depends('car_mechanic_id_new')
-    def _compute_generated_mechanic_team(self):
-        for order in self:
-            order.generated_mechanic_team = ', '.join(order.car_mechanic_id_new.mapped('name'))
-    
+    # Hanya bergantung pada partner_car_id, perubahan di mobil dikirim oleh pitcar.car.recompute
+    @profiled
+    @api.depends('partner_car_id')
+    def _compute_partner_car_details(self):
+        super(SaleOrder, self)._compute_partner_car_details()
+
+    # Total di task workshop disinkronkan sekali per transaksi (precommit),
+    # bukan setiap kali satu baris order diubah
+    @api.depends('order_line.price_subtotal', 'order_line.price_tax', 'order_line.price_total')
+    def _compute_amounts(self):
+        super(SaleOrder, self)._compute_amounts()
+        order_ids = [order_id for order_id in self._origin.ids if order_id]
+        if not order_ids:
+            return
+        pending = self.env.cr.precommit.data.setdefault('pitcar_task_order_total_ids', set())
+        if not pending:
+            self.env.cr.precommit.add(self._flush_task_order_totals)
+        pending.update(order_ids)
+
+    def _flush_task_order_totals(self):
+        order_ids = self.env.cr.precommit.data.pop('pitcar_task_order_total_ids', set())
+        self.env['project.task'].sudo()._sync_order_totals(list(order_ids))
+
     @api.onchange('partner_car_id')
     def _onchange_partner_car_id(self):
         for order in self:
@@ -403,37 +456,153 @@ class SaleOrder(models.Model):
                 }
             return 
     
+    @api.model
+    def _checkin_create_order(self, car_id, odometer=0.0, service_advisor_ids=None, car_arrival_time=None):
+        """Create the draft order of a car arriving at the workshop in one call.
+
+        The customer comes from the car, so the form onchanges are not needed.
+        """
+        car = self.env['res.partner.car'].browse(car_id).exists()
+        if not car:
+            raise exceptions.UserError(_("Car not found."))
+        order = self.create({
+            'partner_id': car.partner_id.id,
+            'partner_car_id': car.id,
+            'partner_car_odometer': odometer or 0.0,
+            'car_arrival_time': car_arrival_time or fields.Datetime.now(),
+            'service_advisor_id': [Command.set(service_advisor_ids or [])],
+        })
+        return {'id': order.id, 'name': order.name}
+
+    def _get_work_order_attachment_name(self):
+        # Nama attachment berubah setiap order atau barisnya berubah, jadi PDF lama tidak dipakai lagi
+        self.ensure_one()
+        last_change = max([self.write_date] + self.order_line.mapped('write_date'))
+        return 'WORK ORDER - %s (%s).pdf' % (self.name.replace('/', '_'), last_change.strftime('%Y%m%d%H%M%S%f'))
+
+    def _prefetch_work_order(self):
+        # Semua data yang dibaca template work order diambil per field untuk semua order sekaligus
+        lines = self.order_line
+        lines.mapped('product_id.display_name')
+        lines.mapped('tax_id.name')
+        lines.mapped('product_uom.name')
+        self.mapped('partner_id.name')
+        self.mapped('service_advisor_id.name')
+        self.mapped('partner_car_id.brand.name')
+        self.mapped('partner_car_id.brand_type.name')
+        self.mapped('partner_car_transmission.name')
+        self.mapped('car_mechanic_id.name')
+        self.mapped('pricelist_id.currency_id')
+        self.mapped('payment_term_id.note')
+
+    def _cleanup_work_order_attachments(self):
+        current = [order._get_work_order_attachment_name() for order in self]
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'sale.order'),
+            ('res_id', 'in', self.ids),
+            ('name', '=like', 'WORK ORDER - %'),
+            ('name', 'not in', current),
+        ]).unlink()
+
+    def action_print_work_order_batch(self):
+        batch = self.env['pitcar.work.order.batch'].create({'order_ids': [Command.set(self.ids)]})
+        return batch._start()
+
     # Copying car information from sales order to delivery data when sales confirmed
     # model : stock.picking
+    @profiled
     def _action_confirm(self):
         res = super(SaleOrder, self)._action_confirm()
-        for order in self:
-            if hasattr(order, 'picking_ids'):
+        if 'picking_ids' in self._fields:
+            vals_by_picking = {}
+            for order in self:
+                car_vals = order._prepare_car_context_vals()
                 for picking in order.picking_ids:
-                    picking.partner_car_id = order.partner_car_id
-                    picking.partner_car_odometer = order.partner_car_odometer
-                    picking.car_mechanic_id = order.car_mechanic_id
-                    picking.car_mechanic_id_new = order.car_mechanic_id_new
-                    picking.generated_mechanic_team = order.generated_mechanic_team
-                    picking.service_advisor_id = order.service_advisor_id  
-                    picking.car_arrival_time = order.car_arrival_time
+                    vals_by_picking[picking.id] = car_vals
+            self._propagate_car_context('stock.picking', vals_by_picking)
+        self.env['res.partner.car.odometer']._record_from_orders(self, 'confirm')
         return res
 
     # Copying car information from sales order to invoice data when invoice created
     # model : account.move
+    @profiled
     def _create_invoices(self, grouped=False, final=False):
+        batch_size = self._get_invoice_batch_size()
+        if batch_size and len(self) > batch_size and not self.env.context.get('pitcar_invoice_batch'):
+            # Invoicing besar diproses per chunk dan di-commit per chunk
+            moves = self.env['account.move']
+            for batch in split_every(batch_size, self.ids, self.browse):
+                moves |= batch.with_context(pitcar_invoice_batch=True)._create_invoices(grouped=grouped, final=final)
+                if not self.env.registry.in_test_mode():
+                    self.env.cr.commit()
+            return moves.with_env(self.env)
+
         res = super(SaleOrder, self)._create_invoices(grouped=grouped, final=final)
+        self.write({'date_completed': fields.Datetime.now()})
+        vals_by_invoice = {}
         for order in self:
-            order.date_completed = fields.Datetime.now()
+            invoice_vals = dict(
+                order._prepare_car_context_vals(),
+                date_sale_completed=order.date_completed,
+                date_sale_quotation=order.create_date,
+            )
             for invoice in order.invoice_ids:
-                invoice.date_sale_completed = order.date_completed
-                invoice.date_sale_quotation = order.create_date
-                invoice.partner_car_id = order.partner_car_id
-                invoice.partner_car_odometer = order.partner_car_odometer
-                invoice.car_mechanic_id = order.car_mechanic_id
-                invoice.car_mechanic_id_new = order.car_mechanic_id_new
-                invoice.generated_mechanic_team = order.generated_mechanic_team
-                invoice.service_advisor_id = order.service_advisor_id
-                invoice.car_arrival_time = order.car_arrival_time
+                vals_by_invoice[invoice.id] = invoice_vals
+        self._propagate_car_context('account.move', vals_by_invoice)
+        self.env['sale.order.follow.up']._enqueue_orders(self)
+        self.env['res.partner.car.odometer']._record_from_orders(self, 'invoice')
         return res
-    
\ No newline at end of file
+
+    def _prepare_car_context_vals(self):
+        # generated_mechanic_team tidak disalin, field itu dihitung ulang di dokumen tujuan
+        self.ensure_one()
+        return {
+            'partner_car_id': self.partner_car_id.id,
+            'partner_car_odometer': self.partner_car_odometer,
+            'car_mechanic_id': self.car_mechanic_id.id,
+            'car_mechanic_id_new': tuple(self.car_mechanic_id_new.ids),
+            'service_advisor_id': tuple(self.service_advisor_id.ids),
+            'car_arrival_time': self.car_arrival_time,
+        }
+
+    @api.model
+    def _get_invoice_batch_size(self):
+        batch_size = self.env.context.get('pitcar_invoice_batch_size') or \
+            self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.invoice_batch_size', 0)
+        try:
+            return int(batch_size)
+        except (TypeError, ValueError):
+            return 0
+
+    @api.model
+    def _propagate_car_context(self, model_name, vals_by_id):
+        """Write the car/mechanic context onto pickings or invoices.
+
+        Values equal to what the target already holds are skipped, and
+        targets ending up with the same changes share a single ``write``,
+        so tracking and dependent recomputes run once per group.
+        """
+        targets = self.env[model_name].browse(list(vals_by_id))
+        groups = defaultdict(list)
+        for target in targets:
+            changes = {}
+            for fname, value in vals_by_id[target.id].items():
+                field = target._fields[fname]
+                if field.type in ('many2many', 'one2many'):
+                    if set(target[fname].ids) != set(value):
+                        changes[fname] = tuple(value)
+                elif field.type == 'many2one':
+                    if target[fname].id != (value or False):
+                        changes[fname] = value or False
+                elif target[fname] != value:
+                    changes[fname] = value
+            if changes:
+                groups[tuple(sorted(changes.items()))].append(target.id)
+
+        for changes, target_ids in groups.items():
+            vals = {
+                fname: [Command.set(list(value))] if isinstance(value, tuple) else value
+                for fname, value in changes
+            }
+            self.env[model_name].browse(target_ids).write(vals)
+        return targets
@@ -0,0 +1,160 @@
+from odoo import models, fields, api
+
+RATING_TO_SATISFACTION = {
+    '1': 'very_dissatisfied',
+    '2': 'dissatisfied',
+    '3': 'neutral',
+    '4': 'satisfied',
+    '5': 'very_satisfied'
+}
+
+# Field di sale.order yang sebenarnya disimpan di sale.order.feedback
+FEEDBACK_FIELDS = (
+    'is_willing_to_feedback', 'no_feedback_reason', 'customer_rating', 'customer_satisfaction',
+    'customer_feedback', 'feedback_classification_ids', 'review_google', 'follow_instagram',
+    'complaint_action', 'complaint_status', 'show_complaint_action',
+    'is_follow_up', 'customer_feedback_follow_up', 'follow_up_evidence', 'no_follow_up_reason',
+    'reminder_3_months', 'date_follow_up_3_months', 'category_3_months', 'is_response_3_months',
+    'feedback_3_months', 'is_booking_3_months', 'booking_date_3_months', 'no_reminder_reason_3_months',
+    'reminder_6_months', 'date_follow_up_6_months', 'category_6_months', 'is_response_6_months',
+    'feedback_6_months', 'is_booking_6_months', 'booking_date_6_months', 'no_reminder_reason_6_months',
+)
+
+class SaleOrderFeedback(models.Model):
+    _name = 'sale.order.feedback'
+    _description = 'Sale Order Feedback and Reminders'
+    _rec_name = 'sale_order_id'
+
+    sale_order_id = fields.Many2one('sale.order', string="Sale Order", required=True, ondelete='cascade', index=True)
+
+    is_willing_to_feedback = fields.Selection([
+        ('yes', 'Yes'),
+        ('no', 'No')
+    ], string='Willing to Give Feedback?', help='Apakah customer bersedia memberikan feedback?')
+
+    no_feedback_reason = fields.Text(string='Reason for not giving feedback', help='Alasan customer tidak bersedia memberikan feedback')
+
+    customer_rating = fields.Selection([
+        ('1', '1'),
+        ('2', '2'),
+        ('3', '3'),
+        ('4', '4'),
+        ('5', '5')
+    ], string='Customer Rating',
+    help='Rating yang diberikan oleh customer terhadap layanan yang diberikan oleh Pitcar. Rating ini berdasarkan skala 1-5. 1 adalah rating terendah dan 5 adalah rating tertinggi.'
+    )
+
+    customer_satisfaction = fields.Selection([
+        ('very_dissatisfied', 'Very Dissatisfied (Sangat Tidak Puas / Komplain)'),
+        ('dissatisfied', 'Dissatisfied (Tidak Puas / Komplain)'),
+        ('neutral', 'Neutral (Cukup Puas)'),
+        ('satisfied', 'Satisfied (Puas)'),
+        ('very_satisfied', 'Very Satisfied (Sangat Puas)')
+    ], string='Customer Satisfaction', readonly=True)
+
+    customer_feedback = fields.Text(string='Customer Feedback')
+
+    feedback_classification_ids = fields.Many2many(
+        'feedback.classification',
+        string='Feedback Classification',
+        relation='sale_order_feedback_classification_rel',
+        column1='feedback_id',
+        column2='feedback_classification_id',
+        help='Ini digunakan untuk mengklasifikasikan feedback yang diberikan oleh customer. Misalnya, feedback yang diberikan oleh customer adalah tentang kualitas produk, maka kita bisa mengklasifikasikan feedback tersebut ke dalam kategori "Kualitas Produk"'
+    )
+
+    review_google = fields.Selection([
+        ('yes', 'Yes'),
+        ('no', 'No')
+    ],
+    string='Review Google',
+    help='Apakah customer bersedia memberikan review di Google?'
+    )
+
+    follow_instagram = fields.Selection([
+        ('yes', 'Yes'),
+        ('no', 'No')
+    ],
+    string='Follow Instagram',
+    help='Apakah customer bersedia mengikuti akun Instagram Pitcar?'
+    )
+
+    complaint_action = fields.Text(string="Complaint Action")
+
+    complaint_status = fields.Selection([
+        ('solved', 'Solved'),
+        ('not_solved', 'Not Solved')
+    ],
+    string='Complaint Status',
+    help='Status Komplain dari customer apakah berhasil ditangani atau tidak.'
+    )
+
+    show_complaint_action = fields.Boolean(compute='_compute_show_complaint_action', store=True)
+
+    # Follow up 3 hari
+    is_follow_up = fields.Selection([
+        ('yes', 'Yes'),
+        ('no', 'No')
+    ], string='Follow Up?', help='Apakah customer sudah di-follow up?')
+    customer_feedback_follow_up = fields.Text(string='Customer Feedback (Follow Up)')
+    follow_up_evidence = fields.Text(string='Description')
+    no_follow_up_reason = fields.Text(string='Reason for No Follow Up')
+
+    # Fields for 3 months reminder
+    reminder_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Reminder 3 Bulan?")
+    date_follow_up_3_months = fields.Date(string="Date Follow Up (3 Bulan)")
+    category_3_months = fields.Many2many(
+        'feedback.classification',
+        string='Reminder Tags (3 Bulan)',
+        relation='sale_order_feedback_category_3_months_rel',
+        column1='feedback_id',
+        column2='feedback_classification_id',
+        help='Ini digunakan untuk mengklasifikasikan reminder yang diberikan oleh customer setelah 3 bulan.'
+    )
+    is_response_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Response? (3 Bulan)")
+    feedback_3_months = fields.Text(string="Feedback (3 Bulan)")
+    is_booking_3_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Booking? (3 Bulan)")
+    booking_date_3_months = fields.Date(string="Booking Date (3 Bulan)")
+    no_reminder_reason_3_months = fields.Text(string="Reason for No Reminder (3 Bulan)")
+
+    # Fields for 6 months reminder
+    reminder_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Reminder 6 Bulan?")
+    date_follow_up_6_months = fields.Date(string="Date Follow Up (6 Bulan)")
+    category_6_months = fields.Many2many(
+        'feedback.classification',
+        string='Reminder Tags (6 Bulan)',
+        relation='sale_order_feedback_category_6_months_rel',
+        column1='feedback_id',
+        column2='feedback_classification_id',
+        help='Ini digunakan untuk mengklasifikasikan reminder yang diberikan oleh customer setelah 6 bulan.'
+    )
+    is_response_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Response? (6 Bulan)")
+    feedback_6_months = fields.Text(string="Feedback (6 Bulan)")
+    is_booking_6_months = fields.Selection([('yes', 'Yes'), ('no', 'No')], string="Booking? (6 Bulan)")
+    booking_date_6_months = fields.Date(string="Booking Date (6 Bulan)")
+    no_reminder_reason_6_months = fields.Text(string="Reason for No Reminder (6 Bulan)")
+
+    _sql_constraints = [
+        ('sale_order_uniq', 'unique (sale_order_id)', "An order can only have one feedback record !"),
+    ]
+
+    @api.depends('customer_rating')
+    def _compute_show_complaint_action(self):
+        for feedback in self:
+            feedback.show_complaint_action = feedback.customer_rating in ['1', '2']
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._set_satisfaction_from_rating(vals)
+        return super(SaleOrderFeedback, self).create(vals_list)
+
+    def write(self, vals):
+        self._set_satisfaction_from_rating(vals)
+        return super(SaleOrderFeedback, self).write(vals)
+
+    @api.model
+    def _set_satisfaction_from_rating(self, vals):
+        if 'customer_rating' in vals and 'customer_satisfaction' not in vals:
+            vals['customer_satisfaction'] = RATING_TO_SATISFACTION.get(vals['customer_rating'])
+        return vals
@@ -0,0 +1,372 @@
+from odoo import models, fields, api, tools, _
+from datetime import timedelta
+from .res_partner import normalize_phone
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Jenis reminder dan jarak harinya dari tanggal order selesai
+FOLLOW_UP_KINDS = {
+    '3_days': 3,
+    '3_months': 90,
+    '6_months': 180,
+}
+
+# Field di sale.order yang diisi setelah reminder terkirim / dijawab customer
+FOLLOW_UP_SENT_FIELDS = {
+    '3_days': ('is_follow_up', None),
+    '3_months': ('reminder_3_months', 'date_follow_up_3_months'),
+    '6_months': ('reminder_6_months', 'date_follow_up_6_months'),
+}
+FOLLOW_UP_RESPONSE_FIELDS = {
+    '3_months': 'is_response_3_months',
+    '6_months': 'is_response_6_months',
+}
+
+class SaleOrderFollowUp(models.Model):
+    _name = 'sale.order.follow.up'
+    _description = 'Sale Order Follow Up Queue'
+    _order = 'due_date, id'
+    _rec_name = 'sale_order_id'
+
+    sale_order_id = fields.Many2one(
+        'sale.order',
+        string="Sale Order",
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    partner_id = fields.Many2one(related='sale_order_id.partner_id', string="Customer")
+    partner_car_id = fields.Many2one(related='sale_order_id.partner_car_id', string="Serviced Car")
+    kind = fields.Selection([
+        ('3_days', '3 Days'),
+        ('3_months', '3 Months'),
+        ('6_months', '6 Months'),
+    ], string="Reminder", required=True)
+    due_date = fields.Date(string="Due Date", required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('cancel', 'Cancelled'),
+    ], string="Status", required=True, default='pending')
+
+    # Pengiriman otomatis lewat pitcar.reminder.gateway
+    dispatch_state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        # Terlalu lama lewat jatuh tempo, tidak dikirim otomatis (masih bisa dikirim manual)
+        ('expired', 'Expired'),
+    ], string="Dispatch", default='queued', readonly=True)
+    dispatch_attempts = fields.Integer(string="Attempts", readonly=True)
+    next_attempt_at = fields.Datetime(string="Next Attempt", readonly=True)
+    sent_at = fields.Datetime(string="Sent At", readonly=True)
+    gateway_message_id = fields.Char(string="Gateway Message", readonly=True, index='btree_not_null')
+    dispatch_error = fields.Text(string="Dispatch Error", readonly=True)
+
+    _sql_constraints = [
+        ('order_kind_due_uniq', 'unique (sale_order_id, kind, due_date)', "Follow up already queued for this order !"),
+    ]
+
+    def init(self):
+        # Filter "hari ini / terlambat / 7 hari" selalu memakai due_date + state
+        tools.create_index(self._cr, 'sale_order_follow_up_due_date_state_index',
+                           self._table, ['due_date', 'state'])
+        tools.create_index(self._cr, 'sale_order_follow_up_dispatch_index',
+                           self._table, ['dispatch_state', 'due_date'], where="state = 'pending'")
+
+    @api.model
+    def _enqueue_orders(self, orders):
+        """Queue every reminder kind for the given completed orders.
+
+        Pending entries whose due date no longer matches ``date_completed``
+        are cancelled so an order never has two open reminders of one kind.
+        Cancelled entries that match again are reactivated, the unique
+        constraint also covers them.
+        """
+        orders = orders.filtered('date_completed')
+        if not orders:
+            return self.browse()
+        existing = self.search([('sale_order_id', 'in', orders.ids)])
+        existing_by_key = {(rec.sale_order_id.id, rec.kind, rec.due_date): rec for rec in existing}
+
+        vals_list = []
+        wanted_keys = set()
+        for order in orders:
+            completed = fields.Date.to_date(order.date_completed)
+            for kind, days in FOLLOW_UP_KINDS.items():
+                key = (order.id, kind, completed + timedelta(days=days))
+                wanted_keys.add(key)
+                if key not in existing_by_key:
+                    vals_list.append({
+                        'sale_order_id': order.id,
+                        'kind': kind,
+                        'due_date': key[2],
+                    })
+
+        outdated = existing.filtered(
+            lambda rec: rec.state == 'pending' and (rec.sale_order_id.id, rec.kind, rec.due_date) not in wanted_keys
+        )
+        if outdated:
+            outdated.write({'state': 'cancel'})
+        reactivated = existing.filtered(
+            lambda rec: rec.state == 'cancel' and (rec.sale_order_id.id, rec.kind, rec.due_date) in wanted_keys
+        )
+        if reactivated:
+            reactivated.write({
+                'state': 'pending',
+                'dispatch_state': 'queued',
+                'dispatch_attempts': 0,
+                'next_attempt_at': False,
+                'dispatch_error': False,
+            })
+        return reactivated | self.create(vals_list)
+
+    @api.model
+    def _mark_done(self, orders, kinds):
+        pending = self.search([
+            ('sale_order_id', 'in', orders.ids),
+            ('kind', 'in', list(kinds)),
+            ('state', '=', 'pending'),
+        ])
+        if pending:
+            pending.write({'state': 'done'})
+        return pending
+
+    def action_open_sale_order(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'sale.order',
+            'res_id': self.sale_order_id.id,
+            'view_mode': 'form',
+        }
+
+    def _get_idempotency_key(self):
+        # Sama untuk setiap percobaan ulang dari baris antrian yang sama
+        return '%s-follow-up-%s' % (self.env.cr.dbname, self.id)
+
+    @api.model
+    def _get_dispatch_settings(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+
+        def get_int(key, default):
+            try:
+                return max(int(ICP.get_param(key, default)), 1)
+            except (TypeError, ValueError):
+                return default
+        return {
+            'max_per_run': get_int('pitcar_custom.reminder_max_per_run', 500),
+            'batch_size': get_int('pitcar_custom.reminder_batch_size', 50),
+            'rate_per_second': get_int('pitcar_custom.reminder_rate_per_second', 5),
+            'max_attempts': get_int('pitcar_custom.reminder_max_attempts', 5),
+            'retry_minutes': get_int('pitcar_custom.reminder_retry_minutes', 10),
+            'max_age_days': get_int('pitcar_custom.reminder_max_age_days', 30),
+        }
+
+    @api.model
+    def _claim_due(self, limit, max_age_days=30):
+        """Lock and mark up to ``limit`` due reminders as sending.
+
+        Reminders due more than ``max_age_days`` ago are never claimed.
+        """
+        self.flush_model()
+        today = fields.Date.context_today(self)
+        self.env.cr.execute("""
+            UPDATE sale_order_follow_up f
+               SET dispatch_state = 'sending', write_date = NOW() AT TIME ZONE 'UTC'
+             WHERE f.id IN (
+                    SELECT id FROM sale_order_follow_up
+                     WHERE state = 'pending'
+                       AND due_date <= %(today)s
+                       AND due_date >= %(oldest)s
+                       AND (dispatch_state = 'queued' OR dispatch_state IS NULL
+                            -- proses yang mati di tengah pengiriman, dikirim ulang dengan kunci yang sama
+                            OR (dispatch_state = 'sending' AND write_date < %(stale)s))
+                       AND (next_attempt_at IS NULL OR next_attempt_at <= NOW() AT TIME ZONE 'UTC')
+                  ORDER BY due_date, id
+                     LIMIT %(limit)s
+                       FOR UPDATE SKIP LOCKED)
+         RETURNING f.id
+        """, {
+            'today': today,
+            'oldest': today - timedelta(days=max_age_days),
+            'stale': fields.Datetime.now() - timedelta(hours=1),
+            'limit': limit,
+        })
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(['dispatch_state'])
+        return self.browse(sorted(ids))
+
+    def _prepare_messages(self):
+        """Render one message per follow up, reading all placeholders in one query."""
+        if not self:
+            return [], {}
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT f.id, f.kind, p.name, COALESCE(p.mobile, p.phone), so.name, so.date_completed,
+                   car.number_plate, brand.name, btype.name, car.predicted_service_date, company.name
+              FROM sale_order_follow_up f
+              JOIN sale_order so ON so.id = f.sale_order_id
+              JOIN res_partner p ON p.id = so.partner_id
+              JOIN res_company company ON company.id = so.company_id
+         LEFT JOIN res_partner_car car ON car.id = so.partner_car_id
+         LEFT JOIN res_partner_car_brand brand ON brand.id = car.brand
+         LEFT JOIN res_partner_car_type btype ON btype.id = car.brand_type
+             WHERE f.id IN %s
+        """, [tuple(self.ids)])
+        Template = self.env['pitcar.reminder.template']
+        bodies = Template._get_bodies()
+        messages, errors = [], {}
+        for (follow_up_id, kind, customer, phone, order, completed, plate, brand, brand_type,
+             next_service, company) in self.env.cr.fetchall():
+            phone = normalize_phone(phone)
+            if not phone:
+                errors[follow_up_id] = _("Customer has no phone number")
+                continue
+            if kind not in bodies:
+                errors[follow_up_id] = _("No active template for reminder %s", kind)
+                continue
+            messages.append({
+                'follow_up_id': follow_up_id,
+                'key': self.browse(follow_up_id)._get_idempotency_key(),
+                'phone': phone,
+                'body': Template._render(bodies[kind], {
+                    'customer': customer,
+                    'plate': plate or '',
+                    'brand': brand or '',
+                    'brand_type': brand_type or '',
+                    'car': ' '.join(filter(None, [brand, brand_type, plate])),
+                    'order': order,
+                    'last_service': completed.strftime('%d-%m-%Y') if completed else '',
+                    'next_service': next_service.strftime('%d-%m-%Y') if next_service else '',
+                    'company': company,
+                }),
+            })
+        return messages, errors
+
+    def _dispatch(self, settings):
+        """Send one batch through the gateway and write the results back in bulk."""
+        messages, errors = self._prepare_messages()
+        results = {}
+        if messages:
+            try:
+                results = self.env['pitcar.reminder.gateway']._send([
+                    {key: message[key] for key in ('key', 'phone', 'body')} for message in messages
+                ])
+            except Exception as e:
+                _logger.warning("Reminder gateway failed for %s messages", len(messages), exc_info=True)
+                results = {message['key']: (False, str(e)) for message in messages}
+
+        sent = {}
+        for message in messages:
+            success, value = results.get(message['key'], (False, _("No result from gateway")))
+            if success:
+                sent[message['follow_up_id']] = value or message['key']
+            else:
+                errors[message['follow_up_id']] = value
+        self._write_dispatch_results(sent, errors, settings)
+        return len(sent), len(errors)
+
+    @api.model
+    def _write_dispatch_results(self, sent, errors, settings):
+        now = fields.Datetime.now()
+        if sent:
+            self.env.cr.execute("""
+                UPDATE sale_order_follow_up f
+                   SET dispatch_state = 'sent', sent_at = %s, gateway_message_id = v.message_id,
+                       dispatch_error = NULL, dispatch_attempts = COALESCE(f.dispatch_attempts, 0) + 1
+                  FROM unnest(%s::int[], %s::varchar[]) AS v(id, message_id)
+                 WHERE f.id = v.id
+            """, [now, list(sent), list(sent.values())])
+        if errors:
+            # Backoff eksponensial: retry_minutes, 2x, 4x, ...
+            self.env.cr.execute("""
+                UPDATE sale_order_follow_up f
+                   SET dispatch_attempts = COALESCE(f.dispatch_attempts, 0) + 1,
+                       dispatch_error = v.error,
+                       dispatch_state = CASE WHEN COALESCE(f.dispatch_attempts, 0) + 1 >= %(max_attempts)s
+                                             THEN 'failed' ELSE 'queued' END,
+                       next_attempt_at = %(now)s + %(retry)s * POWER(2, COALESCE(f.dispatch_attempts, 0)) * INTERVAL '1 minute'
+                  FROM unnest(%(ids)s::int[], %(errors)s::text[]) AS v(id, error)
+                 WHERE f.id = v.id
+            """, {
+                'max_attempts': settings['max_attempts'],
+                'now': now,
+                'retry': settings['retry_minutes'],
+                'ids': list(errors),
+                'errors': [str(error) for error in errors.values()],
+            })
+        self.invalidate_model()
+
+        # Isi field reminder di sale.order per jenis, satu write per jenis
+        follow_ups = self.browse(list(sent))
+        today = fields.Date.context_today(self)
+        for kind, (sent_field, date_field) in FOLLOW_UP_SENT_FIELDS.items():
+            orders = follow_ups.filtered(lambda f: f.kind == kind).sale_order_id
+            if orders:
+                vals = {sent_field: 'yes'}
+                if date_field:
+                    vals[date_field] = today
+                orders.write(vals)
+
+    @api.model
+    def _cron_dispatch_reminders(self):
+        """Send due reminders in batches, throttled to the configured rate.
+
+        Each batch is committed on its own, so a crash only repeats the
+        current batch, and the gateway drops it by idempotency key.
+        """
+        settings = self._get_dispatch_settings()
+        total_sent = total_failed = 0
+        while total_sent + total_failed < settings['max_per_run']:
+            limit = min(settings['batch_size'], settings['max_per_run'] - total_sent - total_failed)
+            batch = self._claim_due(limit, settings['max_age_days'])
+            if not batch:
+                break
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            start = time.perf_counter()
+            sent, failed = batch._dispatch(settings)
+            total_sent += sent
+            total_failed += failed
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            # Throttle: jangan melebihi rate_per_second ke gateway
+            wait = len(batch) / float(settings['rate_per_second']) - (time.perf_counter() - start)
+            if wait > 0:
+                time.sleep(wait)
+        else:
+            # Masih ada sisa, jadwalkan run berikutnya tanpa menunggu interval cron
+            self.env.ref('pitcar_custom.ir_cron_dispatch_reminders')._trigger()
+        _logger.info("Reminder dispatch: %s sent, %s failed", total_sent, total_failed)
+        return total_sent, total_failed
+
+    @api.model
+    def _record_responses(self, message_ids):
+        """Mark reminders as answered, called by gateways on incoming replies."""
+        follow_ups = self.search([('gateway_message_id', 'in', list(message_ids))])
+        for kind, response_field in FOLLOW_UP_RESPONSE_FIELDS.items():
+            orders = follow_ups.filtered(lambda f: f.kind == kind).sale_order_id
+            if orders:
+                orders.write({response_field: 'yes'})
+        return follow_ups
+
+    def action_dispatch_now(self):
+        to_send = self.filtered(lambda f: f.state == 'pending' and f.dispatch_state in (False, 'queued', 'failed', 'expired'))
+        if not to_send:
+            return True
+        to_send.write({'dispatch_state': 'sending'})
+        to_send._dispatch(self._get_dispatch_settings())
+        return True
+
+    def action_retry_dispatch(self):
+        self.filtered(lambda f: f.dispatch_state == 'failed').write({
+            'dispatch_state': 'queued',
+            'dispatch_attempts': 0,
+            'next_attempt_at': False,
+            'dispatch_error': False,
+        })
+        return True
\ No newline at end of file
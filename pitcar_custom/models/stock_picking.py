@@ -2,7 +2,7 @@ from odoo import models, fields, api, _, exceptions
 # from dateutil.relativedelta import relativedelta
 
 class StockPicking(models.Model):
-    _inherit = 'stock.picking'
+    _inherit = ['stock.picking', 'pitcar.mechanic.team.mixin']
 
     # Field baru untuk Service Advisor yang merujuk ke model 'pitcar.service.advisor'
     service_advisor_id = fields.Many2many(
@@ -17,7 +17,7 @@ class StockPicking(models.Model):
         tracking=True,
         index=True,
     )
-    partner_car_odometer = fields.Float(string="Odometer", tracking=True)
+    partner_car_odometer = fields.Float(string="Odometer")
     car_mechanic_id = fields.Many2one('pitcar.mechanic', string="Mechanic (Old Input)", index=True)
     car_mechanic_id_new = fields.Many2many(
         'pitcar.mechanic.new',
@@ -53,11 +53,6 @@ class StockPicking(models.Model):
     #                 move.product_id.product_tmpl_id.update_first_receipt_date()
     #     return res
     
-    @api.depends('car_mechanic_id_new')
-    def _compute_generated_mechanic_team(self):
-        for order in self:
-            order.generated_mechanic_team = ', '.join(order.car_mechanic_id_new.mapped('name'))
-
     # Method untuk menandai service advisor yang terlibat dalam transaksi
     # Anda bisa menambahkan metode ini sesuai kebutuhan
     # def mark_service_advisors(self):
@@ -0,0 +1,168 @@
+from odoo import models, fields, api, _, exceptions, Command
+from odoo.tools import split_every
+from odoo.tools.pdf import merge_pdf
+import base64
+import io
+import logging
+import zipfile
+
+_logger = logging.getLogger(__name__)
+
+WORK_ORDER_REPORT = 'pitcar_custom.action_report_work_order'
+WORK_ORDER_REPORT_NAME = 'pitcar_custom.report_saleorder_workorder'
+
+
+class ReportSaleOrderWorkOrder(models.AbstractModel):
+    _name = 'report.pitcar_custom.report_saleorder_workorder'
+    _description = 'Work Order Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['sale.order'].browse(docids)
+        docs._prefetch_work_order()
+        return {
+            'doc_ids': docids,
+            'doc_model': 'sale.order',
+            'docs': docs,
+            'data': data,
+        }
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        res = super(IrActionsReport, self)._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        if res_ids and self._get_report(report_ref).report_name == WORK_ORDER_REPORT_NAME:
+            # Work order yang sudah berubah punya PDF baru, PDF lamanya dibuang
+            self.env['sale.order'].browse(res_ids)._cleanup_work_order_attachments()
+        return res
+
+
+class PitcarWorkOrderBatch(models.Model):
+    """Print many work orders as one download.
+
+    Orders are rendered in chunks (one wkhtmltopdf run per chunk); every
+    order's PDF is kept as an attachment named after its last change, so
+    unchanged orders are never rendered twice. Small batches are printed
+    right away, large ones by the cron in the background.
+    """
+    _name = 'pitcar.work.order.batch'
+    _description = 'Work Order Batch Print'
+    _order = 'id desc'
+
+    name = fields.Char(string="Name", required=True, readonly=True,
+                       default=lambda self: _("Work Orders %s", fields.Date.context_today(self)))
+    order_ids = fields.Many2many('sale.order', string="Orders", readonly=True)
+    order_count = fields.Integer(string="Orders", compute='_compute_order_count')
+    output_format = fields.Selection([
+        ('pdf', 'Single PDF'),
+        ('zip', 'ZIP'),
+    ], string="Output", required=True, default='pdf')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string="Status", required=True, default='queued', readonly=True)
+    rendered_count = fields.Integer(string="Rendered", readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string="File", readonly=True)
+    error = fields.Text(string="Error", readonly=True)
+
+    @api.depends('order_ids')
+    def _compute_order_count(self):
+        for batch in self:
+            batch.order_count = len(batch.order_ids)
+
+    @api.model
+    def _get_sync_limit(self):
+        limit = self.env['ir.config_parameter'].sudo().get_param('pitcar_custom.work_order_sync_limit', 20)
+        try:
+            return int(limit)
+        except (TypeError, ValueError):
+            return 20
+
+    def _start(self):
+        self.ensure_one()
+        if self.order_count <= self._get_sync_limit():
+            self._process()
+            return self.action_download()
+        self.env.ref('pitcar_custom.ir_cron_work_order_batch')._trigger()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+        }
+
+    def _process(self, chunk_size=25, commit=False):
+        report = self.env.ref(WORK_ORDER_REPORT)
+        for batch in self:
+            try:
+                for chunk in split_every(chunk_size, batch.order_ids.ids):
+                    # PDF order yang belum berubah diambil dari attachment, sisanya dirender sekali jalan
+                    self.env['ir.actions.report']._render_qweb_pdf(report, list(chunk))
+                    batch.rendered_count += len(chunk)
+                    if commit and not self.env.registry.in_test_mode():
+                        self.env.cr.commit()
+                batch._build_output()
+                batch.state = 'done'
+            except Exception as e:
+                if not commit:
+                    raise
+                self.env.cr.rollback()
+                _logger.exception("Work order batch %s failed", batch.id)
+                batch.write({'state': 'failed', 'error': str(e)})
+            if commit and not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+
+    def _build_output(self):
+        self.ensure_one()
+        orders = self.order_ids
+        names = {order.id: order._get_work_order_attachment_name() for order in orders}
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'sale.order'),
+            ('res_id', 'in', orders.ids),
+            ('name', 'in', list(names.values())),
+        ])
+        by_order = {attachment.res_id: attachment for attachment in attachments}
+        missing = [order.name for order in orders if order.id not in by_order]
+        if missing:
+            raise exceptions.UserError(_("Work orders could not be rendered: %s", ', '.join(missing)))
+
+        if self.output_format == 'zip':
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for order in orders:
+                    archive.writestr('%s.pdf' % order.name.replace('/', '_'), by_order[order.id].raw)
+            content, filename, mimetype = buffer.getvalue(), '%s.zip' % self.name, 'application/zip'
+        else:
+            content = merge_pdf([by_order[order.id].raw for order in orders])
+            filename, mimetype = '%s.pdf' % self.name, 'application/pdf'
+
+        self.attachment_id = self.env['ir.attachment'].create({
+            'name': filename,
+            'datas': base64.b64encode(content),
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    @api.model
+    def _cron_process_batches(self):
+        batches = self.search([('state', '=', 'queued')], order='id')
+        batches._process(commit=True)
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise exceptions.UserError(_("The work orders are still being rendered."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def action_retry(self):
+        self.filtered(lambda batch: batch.state == 'failed').write({'state': 'queued', 'error': False})
+        self.env.ref('pitcar_custom.ir_cron_work_order_batch')._trigger()
+        return True
@@ -0,0 +1,6 @@
+from . import test_plate_lookup
+from . import test_count_queries
+from . import test_service_prediction
+from . import test_checkin
+from . import test_export
+from . import test_query_budgets
\ No newline at end of file
@@ -0,0 +1,83 @@
+import logging
+import time
+
+from odoo import Command
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PitcarCase(TransactionCase):
+    """Catalogue, customer and synthetic-data helpers shared by the module tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.brand = cls.env['res.partner.car.brand'].create({'name': 'Test Brand'})
+        cls.brand_type = cls.env['res.partner.car.type'].create({'name': 'Test Type', 'brand': cls.brand.id})
+        cls.transmission = cls.env['res.partner.car.transmission'].create({'name': 'Test Transmission'})
+        cls.customer_tag = cls.env['res.partner.category'].create({'name': 'Test Customers'})
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Test Customer',
+            'phone': '081234567890',
+            'category_id': [Command.set(cls.customer_tag.ids)],
+        })
+
+    @classmethod
+    def _car_vals(cls, count, prefix='TEST'):
+        return [{
+            'number_plate': '%s%07d' % (prefix, i),
+            'brand': cls.brand.id,
+            'brand_type': cls.brand_type.id,
+            'transmission': cls.transmission.id,
+            'partner_id': cls.customer.id,
+            'color': 'Black',
+            'year': '2020',
+            'engine_type': 'petrol',
+        } for i in range(1, count + 1)]
+
+    def _insert_synthetic_cars(self, car_count, prefix='BENCH'):
+        """Insert ``car_count`` cars in SQL, for data volumes the ORM cannot create quickly."""
+        self.env.flush_all()
+        self.env.cr.execute("""
+            INSERT INTO res_partner_car
+                (name, number_plate, brand, brand_type, transmission, partner_id,
+                 color, year, engine_type, create_uid, create_date, write_uid, write_date)
+            SELECT %(prefix)s || lpad(g::text, 7, '0'),
+                   %(prefix)s || lpad(g::text, 7, '0'),
+                   %(brand)s, %(brand_type)s, %(transmission)s, %(partner)s,
+                   'Black', '2020', 'petrol',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM generate_series(1, %(count)s) AS g
+        """, {
+            'prefix': prefix,
+            'brand': self.brand.id,
+            'brand_type': self.brand_type.id,
+            'transmission': self.transmission.id,
+            'partner': self.customer.id,
+            'uid': self.env.uid,
+            'count': car_count,
+        })
+        self.env.cr.execute("ANALYZE res_partner_car")
+
+    def _timed(self, func, samples):
+        timings = []
+        for arg in samples:
+            self.env.invalidate_all()
+            start = time.perf_counter()
+            func(arg)
+            timings.append((time.perf_counter() - start) * 1000.0)
+        return {
+            'samples': len(timings),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings) if timings else 0.0, 3),
+        }
\ No newline at end of file
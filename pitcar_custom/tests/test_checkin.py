@@ -0,0 +1,147 @@
+import json
+import logging
+import random
+
+from odoo.tests import HttpCase, tagged
+
+from .common import PitcarCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestCheckin(PitcarCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.car = cls.env['res.partner.car'].create(cls._car_vals(1, prefix='CHK'))
+
+    def test_lookup(self):
+        Car = self.env['res.partner.car']
+        Car._checkin_lookup('chk 0000001')
+        self.env.invalidate_all()
+        # Satu query plat (exact match), satu query join mobil + customer + brand + type
+        with self.assertQueryCount(2):
+            cars = Car._checkin_lookup('chk 0000001')
+        self.assertEqual([car['id'] for car in cars], self.car.ids)
+        self.assertEqual(cars[0]['customer']['id'], self.customer.id)
+        self.assertEqual(cars[0]['brand_type']['name'], self.brand_type.name)
+
+    def test_create_order_and_summary(self):
+        SaleOrder = self.env['sale.order']
+        result = SaleOrder._checkin_create_order(self.car.id, 12000)
+        order = SaleOrder.browse(result['id'])
+        self.assertEqual(order.partner_id, self.customer)
+        self.assertEqual(order.partner_car_odometer, 12000)
+        summary = self.car._checkin_summary()
+        self.assertEqual([visit['id'] for visit in summary['last_visits']], order.ids)
+
+
+# Query per request: sesi, user dan savepoint test cursor + query handler
+ROUTE_QUERY_BUDGETS = {
+    'lookup': 12,
+    'summary': 14,
+    'order': 45,
+}
+
+
+@tagged('post_install', '-at_install')
+class TestCheckinRoutes(HttpCase, PitcarCase):
+    """JSON-RPC calls to the ``/pitcar/checkin/*`` routes through the test client."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.car, cls.busy_car = cls.env['res.partner.car'].create(cls._car_vals(2, prefix='RTE'))
+        SaleOrder = cls.env['sale.order']
+        for _i in range(10):
+            SaleOrder._checkin_create_order(cls.busy_car.id, 5000)
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate('admin', 'admin')
+
+    def _call(self, route, **params):
+        """Post a JSON-RPC call to ``route``, return its result and query count."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.cr.sql_log_count
+        response = self.url_open(route, data=json.dumps({
+            'jsonrpc': '2.0', 'method': 'call', 'id': 1, 'params': params,
+        }), headers={'Content-Type': 'application/json'})
+        queries = self.cr.sql_log_count - before
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertNotIn('error', payload, payload.get('error'))
+        return payload['result'], queries
+
+    def test_lookup_route(self):
+        self._call('/pitcar/checkin/lookup', plate='rte 0000001')
+        cars, queries = self._call('/pitcar/checkin/lookup', plate='rte 0000001')
+        self.assertEqual([car['id'] for car in cars], self.car.ids)
+        self.assertEqual(cars[0]['customer']['id'], self.customer.id)
+        self.assertLessEqual(queries, ROUTE_QUERY_BUDGETS['lookup'])
+
+    def test_summary_route(self):
+        self._call('/pitcar/checkin/car/%d' % self.car.id)
+        summary, queries = self._call('/pitcar/checkin/car/%d' % self.car.id)
+        self.assertEqual(summary['id'], self.car.id)
+        self.assertEqual(summary['last_visits'], [])
+        self.assertLessEqual(queries, ROUTE_QUERY_BUDGETS['summary'])
+        # Riwayat servis yang panjang tidak menambah query
+        busy, busy_queries = self._call('/pitcar/checkin/car/%d' % self.busy_car.id, visit_limit=5)
+        self.assertEqual(len(busy['last_visits']), 5)
+        self.assertEqual(busy_queries, queries)
+        missing, _queries = self._call('/pitcar/checkin/car/%d' % (self.busy_car.id + 1000))
+        self.assertEqual(missing, {'error': 'not_found'})
+
+    def test_order_route(self):
+        result, queries = self._call('/pitcar/checkin/order', car_id=self.car.id, odometer=12000)
+        order = self.env['sale.order'].browse(result['id'])
+        self.assertEqual(result['name'], order.name)
+        self.assertEqual(order.partner_id, self.customer)
+        self.assertEqual(order.partner_car_odometer, 12000)
+        self.assertLessEqual(queries, ROUTE_QUERY_BUDGETS['order'])
+
+
+@tagged('post_install', '-at_install', '-standard', 'pitcar_benchmark')
+class TestCheckinBenchmark(PitcarCase):
+    """Queries and p50/p99 of the check-in routes' handlers over 500k cars.
+
+    The routes in ``controllers/checkin.py`` only parse arguments and
+    call these model methods, so the query counts are the routes' counts.
+    Run with ``--test-tags pitcar_benchmark``.
+    """
+    car_count = 500000
+    samples = 50
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        func()
+        return self.env.cr.sql_log_count - before
+
+    def test_checkin_benchmark(self):
+        self._insert_synthetic_cars(self.car_count)
+        Car = self.env['res.partner.car']
+        SaleOrder = self.env['sale.order']
+        rng = random.Random(42)
+        plates = ['BENCH%07d' % rng.randint(1, self.car_count) for _i in range(self.samples)]
+        car_ids = [Car._search_number_plate(plate, limit=1)[0] for plate in plates]
+        advisor_ids = self.env['pitcar.service.advisor'].search([], limit=1).ids
+        result = {
+            'car_count': self.car_count,
+            'queries': {
+                'lookup': self._count_queries(lambda: Car._checkin_lookup(plates[0])),
+                'summary': self._count_queries(lambda: Car.browse(car_ids[0])._checkin_summary()),
+                'create_order': self._count_queries(
+                    lambda: SaleOrder._checkin_create_order(car_ids[0], 1000, advisor_ids)),
+            },
+            'lookup': self._timed(Car._checkin_lookup, plates),
+            'summary': self._timed(lambda car_id: Car.browse(car_id)._checkin_summary(), car_ids),
+            'create_order': self._timed(
+                lambda car_id: SaleOrder._checkin_create_order(car_id, 1000, advisor_ids), car_ids),
+        }
+        _logger.info("Check-in benchmark: %s", result)
+        self.assertLessEqual(result['queries']['lookup'], 2)
\ No newline at end of file
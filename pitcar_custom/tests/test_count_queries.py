@@ -0,0 +1,67 @@
+from odoo import Command
+
+from ..models.count_mixin import _COUNT_CACHE
+from .common import PitcarCase
+
+# Counter yang harus dihitung sekaligus untuk satu list view
+COUNT_CHECKS = [
+    ('res.partner.car.brand', ['car_count', 'brand_type_count']),
+    ('res.partner.car.type', ['car_count']),
+    ('res.partner.category', ['partner_count']),
+    ('product.tag', ['product_ids_count']),
+    ('crm.tag', ['crm_lead_ids_count']),
+]
+
+
+class TestCountQueries(PitcarCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(_COUNT_CACHE.clear)
+
+    def _records(self, model_name, size):
+        vals = {'brand': self.brand.id} if model_name == 'res.partner.car.type' else {}
+        return self.env[model_name].create([
+            {'name': 'Count Test %s %s' % (size, i), **vals} for i in range(size)
+        ])
+
+    def _read_queries(self, records, fnames):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        records.read(fnames)
+        return self.env.cr.sql_log_count - before
+
+    def test_counters_do_not_grow_with_rows(self):
+        for model_name, fnames in COUNT_CHECKS:
+            with self.subTest(model=model_name):
+                small = self._records(model_name, 5)
+                large = self._records(model_name, 50)
+                # Pemanasan: cache parameter dan access rights
+                self._read_queries(small, fnames)
+                expected = self._read_queries(small, fnames)
+                self.env.invalidate_all()
+                with self.assertQueryCount(expected):
+                    large.read(fnames)
+
+    def test_cached_counts_follow_record_rules(self):
+        self.env['ir.config_parameter'].sudo().set_param('pitcar_custom.count_cache_ttl', 60)
+        company_a = self.env.company
+        company_b = self.env['res.company'].create({'name': 'Count Test Company'})
+        tag = self.env['res.partner.category'].create({'name': 'Count Test Tag'})
+        self.env['res.partner'].create([{
+            'name': 'Count Test %s' % company.name,
+            'phone': '0811111111%s' % index,
+            'company_id': company.id,
+            'category_id': [Command.set(tag.ids)],
+        } for index, company in enumerate(company_a | company_b)])
+        user = self.env['res.users'].create({
+            'name': 'Count Test User',
+            'login': 'count_test_user',
+            'company_id': company_a.id,
+            'company_ids': [Command.set(company_a.ids)],
+            'groups_id': [Command.set(self.env.ref('base.group_user').ids)],
+        })
+
+        self.assertEqual(tag._count_related('res.partner', 'category_id')[tag.id], 2)
+        self.assertEqual(tag.with_user(user)._count_related('res.partner', 'category_id')[tag.id], 1)
\ No newline at end of file
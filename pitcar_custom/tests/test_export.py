@@ -0,0 +1,82 @@
+import csv
+import io
+import logging
+import time
+import tracemalloc
+
+from odoo.tests import tagged
+
+from .common import PitcarCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestExport(PitcarCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cars = cls.env['res.partner.car'].create(cls._car_vals(3, prefix='EXP'))
+        cls.orders = cls.env['sale.order'].create([
+            {'partner_id': car.partner_id.id, 'partner_car_id': car.id} for car in cars
+        ])
+
+    def test_csv_in_batches(self):
+        Export = self.env['pitcar.export']
+        domain = [('id', 'in', self.orders.ids)]
+        chunks = list(Export._stream_csv('sale_order', domain, batch_size=2))
+        # Header + batch pertama, batch kedua
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+        self.assertEqual(rows[0], Export._get_export_headers('sale_order'))
+        self.assertEqual([row[0] for row in rows[1:]], self.orders.mapped('name'))
+        self.assertEqual({row[6] for row in rows[1:]}, {'EXP0000001', 'EXP0000002', 'EXP0000003'})
+
+
+@tagged('post_install', '-at_install', '-standard', 'pitcar_benchmark')
+class TestExportBenchmark(PitcarCase):
+    """Throughput and peak Python memory of the streaming CSV order export.
+
+    1M copies of an order are inserted in SQL and the CSV is consumed
+    chunk by chunk, as the export route does. Run with
+    ``--test-tags pitcar_benchmark``.
+    """
+    row_count = 1000000
+    batch_size = 5000
+
+    def test_export_benchmark(self):
+        car = self.env['res.partner.car'].create(self._car_vals(1, prefix='EXP'))
+        self.env['sale.order'].create({'partner_id': car.partner_id.id, 'partner_car_id': car.id})
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_name = 'sale_order' AND column_name NOT IN ('id', 'name')
+        """)
+        columns = ', '.join('"%s"' % row[0] for row in self.env.cr.fetchall())
+        self.env.cr.execute("""
+            INSERT INTO sale_order (name, {columns})
+            SELECT 'BENCH' || lpad(g::text, 7, '0'), {columns}
+              FROM (SELECT * FROM sale_order ORDER BY id DESC LIMIT 1) AS template
+        CROSS JOIN generate_series(1, %s) AS g
+        """.format(columns=columns), [self.row_count])
+        self.env.cr.execute("ANALYZE sale_order")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = chunks = 0
+        for chunk in self.env['pitcar.export']._stream_csv('sale_order', [], batch_size=self.batch_size):
+            size += len(chunk)
+            chunks += 1
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result = {
+            'row_count': self.row_count,
+            'chunks': chunks,
+            'megabytes': round(size / 1024.0 / 1024.0, 1),
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.row_count / seconds) if seconds else 0,
+            'peak_memory_mb': round(peak / 1024.0 / 1024.0, 1),
+        }
+        _logger.info("Export benchmark: %s", result)
+        self.assertGreaterEqual(chunks, self.row_count // self.batch_size)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import logging
+import random
+
+from odoo.tests import tagged
+
+from .common import PitcarCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestPlateLookup(PitcarCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cars = cls.env['res.partner.car'].create(cls._car_vals(20, prefix='B'))
+
+    def test_exact_plate_as_typed(self):
+        car = self.cars[11]
+        result = self.env['res.partner.car'].name_search('b 0000012', limit=8)
+        self.assertEqual([row[0] for row in result], car.ids)
+
+    def test_plate_prefix(self):
+        result = self.env['res.partner.car'].name_search('b00000', limit=8)
+        self.assertEqual(len(result), 8)
+        self.assertEqual(result[0][0], self.cars[0].id)
+
+    def test_exact_operator_skips_prefix(self):
+        Car = self.env['res.partner.car']
+        self.assertFalse(Car.name_search('b00000', operator='=', limit=8))
+        result = Car.name_search('b 0000012', operator='=', limit=8)
+        self.assertEqual([row[0] for row in result], self.cars[11].ids)
+
+    def test_plate_lookup_queries(self):
+        Car = self.env['res.partner.car']
+        self.env.flush_all()
+        self.env.invalidate_all()
+        # Exact match berhenti di query pertama, tanpa ilike
+        with self.assertQueryCount(1):
+            Car._search_number_plate('B0000012', limit=8)
+
+
+@tagged('post_install', '-at_install', '-standard', 'pitcar_benchmark')
+class TestPlateLookupBenchmark(PitcarCase):
+    """p50/p99 of ``name_search`` on 500k plates as typed at the front desk.
+
+    Run with ``--test-tags pitcar_benchmark``.
+    """
+    car_count = 500000
+    samples = 200
+
+    def test_plate_lookup_benchmark(self):
+        self._insert_synthetic_cars(self.car_count)
+        rng = random.Random(42)
+        numbers = [rng.randint(1, self.car_count) for _i in range(self.samples)]
+        Car = self.env['res.partner.car']
+        result = {
+            'car_count': self.car_count,
+            'exact': self._timed(lambda n: Car.name_search('bench %07d' % n, limit=8), numbers),
+            'prefix': self._timed(lambda n: Car.name_search('bench %05d' % (n // 100), limit=8), numbers),
+        }
+        _logger.info("Plate lookup benchmark: %s", result)
+        self.assertTrue(Car._search_number_plate('bench %07d' % numbers[0], limit=1))
\ No newline at end of file
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import odoo
+from odoo import fields, Command
+from odoo.tools import config
+
+from .common import PitcarCase
+from .test_count_queries import COUNT_CHECKS
+
+# Filter reminder di search view sale.order
+REMINDER_FILTERS = {
+    'reminder_3_days': lambda today: [('next_follow_up_3_days', '=', today)],
+    'reminder_3_months': lambda today: [('next_follow_up_3_months', '=', today)],
+    'reminder_6_months': lambda today: [('next_follow_up_6_months', '=', today)],
+    'reminder_overdue': lambda today: [('follow_up_due_date', '<', today)],
+}
+
+# Batas atas jumlah query: base + per_record * jumlah record, sedikit di atas
+# hitungan sebenarnya agar query N+1 langsung gagal.
+# Naikkan hanya jika query tambahan memang disengaja.
+QUERY_BUDGETS = {
+    'car_create': (12, 1),
+    'order_create': (30, 6),
+    'order_confirm': (40, 6),
+    'order_invoice': (50, 10),
+    'count_reads': (18, 0),
+    'reminder_filters': (6, 0),
+}
+
+SCALES = (1, 10, 50)
+
+
+class TestQueryBudgets(PitcarCase):
+    """Query counts of the module's overrides at several scales.
+
+    Each scenario must stay within ``base + per_record * n`` queries
+    from ``QUERY_BUDGETS``. Wall-clock timings are written to
+    ``$PITCAR_BENCHMARK_OUTPUT`` or ``<data_dir>/pitcar_benchmarks/<db>-<version>.json``
+    to compare module versions.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product = cls.env['product.product'].create({
+            'name': 'Test Service',
+            'type': 'service',
+            'invoice_policy': 'order',
+            'list_price': 100.0,
+        })
+        cls.advisor = cls.env['pitcar.service.advisor'].create({'user_id': cls.env.user.id})
+        cls.module_version = cls.env['ir.module.module'].search(
+            [('name', '=', 'pitcar_custom')]).latest_version or 'unknown'
+        cls.timings = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.timings:
+            cls._write_timings()
+        super().tearDownClass()
+
+    @classmethod
+    def _write_timings(cls):
+        path = os.environ.get('PITCAR_BENCHMARK_OUTPUT') or os.path.join(
+            config['data_dir'], 'pitcar_benchmarks', '%s-%s.json' % (cls.env.cr.dbname, cls.module_version))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as output:
+            json.dump({
+                'database': cls.env.cr.dbname,
+                'module_version': cls.module_version,
+                'odoo_version': odoo.release.version,
+                'date': fields.Datetime.to_string(fields.Datetime.now()),
+                'timings_ms': cls.timings,
+            }, output, indent=2, sort_keys=True)
+
+    @contextmanager
+    def _budget(self, scenario, scale):
+        base, per_record = QUERY_BUDGETS[scenario]
+        self.env.invalidate_all()
+        with self.assertQueryCount(base + per_record * scale):
+            start = time.perf_counter()
+            yield
+            elapsed = (time.perf_counter() - start) * 1000.0
+        self.timings.setdefault(scenario, {})[str(scale)] = round(elapsed, 3)
+
+    def _create_orders(self, cars):
+        return self.env['sale.order'].create([{
+            'partner_id': car.partner_id.id,
+            'partner_car_id': car.id,
+            'partner_car_odometer': 1000.0,
+            'service_advisor_id': [Command.set(self.advisor.ids)],
+            'order_line': [Command.create({'product_id': self.product.id, 'product_uom_qty': 1.0})],
+        } for car in cars])
+
+    def test_order_flow(self):
+        Car = self.env['res.partner.car']
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                car_vals = self._car_vals(scale, prefix='Q%s' % scale)
+                with self._budget('car_create', scale):
+                    cars = Car.create(car_vals)
+                with self._budget('order_create', scale):
+                    orders = self._create_orders(cars)
+                with self._budget('order_confirm', scale):
+                    orders.action_confirm()
+                # Tanpa commit per chunk, berapa pun invoice_batch_size
+                with self._budget('order_invoice', scale):
+                    orders.with_context(pitcar_invoice_batch=True)._create_invoices()
+                self.assertTrue(all(orders.mapped('date_completed')))
+
+    def test_count_reads(self):
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                with self._budget('count_reads', scale):
+                    for model_name, fnames in COUNT_CHECKS:
+                        self.env[model_name].search([], limit=scale).read(fnames)
+
+    def test_reminder_filters(self):
+        SaleOrder = self.env['sale.order']
+        today = fields.Date.context_today(SaleOrder)
+        with self._budget('reminder_filters', 1):
+            for domain in REMINDER_FILTERS.values():
+                SaleOrder.search(domain(today), limit=80)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import logging
+import time
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import PitcarCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestServicePredictionFilter(PitcarCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.context_today(cls.env['sale.order'])
+        cls.due_car, cls.later_car = cls.env['res.partner.car'].create(cls._car_vals(2, prefix='DUE'))
+        cls.due_car.predicted_service_date = cls.today + timedelta(days=3)
+        cls.later_car.predicted_service_date = cls.today + timedelta(days=60)
+        cls.old_order = cls._create_completed_order(cls.due_car, days_ago=200)
+        cls.last_order = cls._create_completed_order(cls.due_car, days_ago=100)
+        cls.later_order = cls._create_completed_order(cls.later_car, days_ago=100)
+
+    @classmethod
+    def _create_completed_order(cls, car, days_ago):
+        order = cls.env['sale.order'].create({'partner_id': car.partner_id.id, 'partner_car_id': car.id})
+        order.write({
+            'state': 'sale',
+            'date_completed': fields.Datetime.now() - timedelta(days=days_ago),
+        })
+        return order
+
+    def _search_due(self, date_from, date_to):
+        return self.env['sale.order'].search([
+            ('car_next_service_date', '>=', date_from),
+            ('car_next_service_date', '<=', date_to),
+        ])
+
+    def test_only_latest_order_of_due_car(self):
+        self.assertEqual(self._search_due(self.today, self.today + timedelta(days=7)), self.last_order)
+
+    def test_overdue_cars_are_bounded(self):
+        self.due_car.predicted_service_date = self.today - timedelta(days=30)
+        self.assertFalse(self._search_due(self.today, self.today + timedelta(days=7)))
+
+    def test_compute_matches_search(self):
+        orders = self.old_order | self.last_order | self.later_order
+        self.assertEqual(orders.mapped('car_next_service_date'), [
+            False, self.due_car.predicted_service_date, self.later_car.predicted_service_date])
+
+
+@tagged('post_install', '-at_install', '-standard', 'pitcar_benchmark')
+class TestServicePredictionBenchmark(PitcarCase):
+    """Wall time of the nightly service prediction over 500k cars.
+
+    Run with ``--test-tags pitcar_benchmark``.
+    """
+    car_count = 500000
+    readings_per_car = 4
+
+    def test_service_prediction_benchmark(self):
+        self._insert_synthetic_cars(self.car_count)
+        self.env.cr.execute("""
+            INSERT INTO res_partner_car_odometer
+                (car_id, reading_date, odometer, source, create_uid, create_date, write_uid, write_date)
+            SELECT c.id,
+                   NOW() AT TIME ZONE 'UTC' - (r * 90 + c.id %% 30) * INTERVAL '1 day',
+                   (%(readings)s - r) * (1500 + c.id %% 4000),
+                   'manual', %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM res_partner_car c
+        CROSS JOIN generate_series(0, %(readings)s - 1) AS r
+             WHERE c.number_plate LIKE 'BENCH%%'
+        """, {'readings': self.readings_per_car, 'uid': self.env.uid})
+        self.env.cr.execute("ANALYZE res_partner_car_odometer")
+        start = time.perf_counter()
+        updated = self.env['res.partner.car']._cron_predict_service()
+        result = {
+            'car_count': self.car_count,
+            'updated': updated,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        _logger.info("Service prediction benchmark: %s", result)
+        self.assertTrue(updated)
\ No newline at end of file
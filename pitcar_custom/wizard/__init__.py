@@ -1 +1,2 @@
-from . import sale_make_invoice_advance
\ No newline at end of file
+from . import sale_make_invoice_advance
+from . import car_import
\ No newline at end of file
@@ -0,0 +1,291 @@
+import base64
+import csv
+import io
+import logging
+import time
+from datetime import date
+
+from odoo import api, fields, models, _, exceptions, Command
+from odoo.tools import split_every
+
+from ..models.car_catalogue import normalize_catalogue_name as _normalize_name
+from ..models.res_partner import normalize_phone
+from ..models.res_partner_car import ENGINE_TYPES, normalize_number_plate
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+_logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('number_plate', 'brand', 'brand_type', 'transmission', 'year', 'color', 'engine_type')
+OPTIONAL_COLUMNS = ('frame_number', 'engine_number', 'customer_name', 'customer_phone')
+
+
+class PitcarCarImport(models.TransientModel):
+    """Bulk import of customer cars from CSV or XLSX.
+
+    Rows are read one by one from the file, brands, types and
+    transmissions are resolved through in-memory dictionaries, and cars
+    are created ``chunk_size`` at a time with a commit after every chunk.
+    Rows that cannot be imported are collected in a reject report.
+    """
+    _name = 'pitcar.car.import'
+    _description = 'Import Customer Cars'
+
+    file = fields.Binary(string="File", required=True)
+    filename = fields.Char(string="File Name")
+    chunk_size = fields.Integer(string="Rows per Commit", default=1000, required=True)
+    create_missing_types = fields.Boolean(string="Create Missing Brands and Types", default=True)
+    customer_tag_ids = fields.Many2many(
+        'res.partner.category',
+        string="Tags for New Customers",
+        help="Customers that are not found by phone are created with these tags. "
+             "Leave empty to reject rows of unknown customers.",
+    )
+    partner_id = fields.Many2one(
+        'res.partner',
+        string="Default Customer",
+        help="Owner of rows without customer columns, e.g. a fleet customer.",
+    )
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    imported_count = fields.Integer(string="Imported", readonly=True)
+    rejected_count = fields.Integer(string="Rejected", readonly=True)
+    rows_per_second = fields.Float(string="Rows per Second", readonly=True, digits=(16, 1))
+    reject_file = fields.Binary(string="Reject Report", readonly=True, attachment=False)
+    reject_filename = fields.Char(string="Reject Report Name", readonly=True)
+
+    def _read_rows(self):
+        """Yield ``{column: value}`` dicts without loading the whole file."""
+        self.ensure_one()
+        content = base64.b64decode(self.file)
+        filename = (self.filename or '').lower()
+        if filename.endswith(('.xlsx', '.xlsm')):
+            if load_workbook is None:
+                raise exceptions.UserError(_("Reading XLSX files requires the openpyxl library."))
+            workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+        else:
+            rows = csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig', newline=''))
+        header = next(rows, None)
+        if not header:
+            raise exceptions.UserError(_("The file is empty."))
+        columns = [str(column or '').strip().lower().replace(' ', '_') for column in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise exceptions.UserError(_("Missing columns: %s", ', '.join(missing)))
+        for row in rows:
+            if not any(value not in (None, '') for value in row):
+                continue
+            yield {
+                column: str(value).strip() if value is not None else ''
+                for column, value in zip(columns, row)
+            }
+
+    def _load_catalogue(self):
+        # Salinan, brand/type yang dibuat selama import ditambahkan ke dict ini
+        catalogue = self.env['pitcar.car.catalogue']._get_catalogue()
+        return dict(catalogue['brands']), dict(catalogue['types']), dict(catalogue['transmissions'])
+
+    def action_import(self):
+        self.ensure_one()
+        if self.chunk_size <= 0:
+            raise exceptions.UserError(_("Rows per commit must be positive."))
+        start = time.perf_counter()
+        brands, types, transmissions = self._load_catalogue()
+        engine_types = {}
+        for value, label in ENGINE_TYPES:
+            engine_types[value] = value
+            engine_types[label.lower()] = value
+        seen_plates = set()
+        rejects = []
+        imported = 0
+
+        for chunk in split_every(self.chunk_size, self._read_rows()):
+            rows = []
+            for row in chunk:
+                row['number_plate'] = normalize_number_plate(row.get('number_plate'))
+                error = self._check_row(row, engine_types, transmissions, seen_plates)
+                if error:
+                    rejects.append((row, error))
+                    continue
+                seen_plates.add(row['number_plate'])
+                rows.append(row)
+
+            rows = self._reject_existing_plates(rows, rejects)
+            rows = self._resolve_brand_types(rows, brands, types, rejects)
+            rows = self._resolve_customers(rows, rejects)
+            imported += self._create_cars(rows, transmissions, engine_types, rejects)
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            _logger.info("Car import: %s rows imported, %s rejected", imported, len(rejects))
+
+        elapsed = time.perf_counter() - start
+        vals = {
+            'state': 'done',
+            'imported_count': imported,
+            'rejected_count': len(rejects),
+            'rows_per_second': (imported + len(rejects)) / elapsed if elapsed else 0.0,
+            'reject_file': False,
+            'reject_filename': False,
+        }
+        if rejects:
+            vals['reject_file'] = base64.b64encode(self._render_rejects(rejects))
+            vals['reject_filename'] = 'car_import_rejects.csv'
+        self.write(vals)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _check_row(self, row, engine_types, transmissions, seen_plates):
+        if not row['number_plate']:
+            return _("Number plate is empty")
+        if row['number_plate'] in seen_plates:
+            return _("Number plate repeated in the file")
+        for column in REQUIRED_COLUMNS:
+            if not row.get(column):
+                return _("Column %s is empty", column)
+        year = row['year'].split('.')[0]
+        if not year.isdigit() or not 1900 <= int(year) <= date.today().year:
+            return _("Invalid year %s", row['year'])
+        row['year'] = year
+        if row['engine_type'].lower() not in engine_types:
+            return _("Unknown engine type %s", row['engine_type'])
+        if _normalize_name(row['transmission']) not in transmissions:
+            return _("Unknown transmission %s", row['transmission'])
+        if not row.get('customer_phone') and not self.partner_id:
+            return _("Customer phone is empty")
+        return False
+
+    def _reject_existing_plates(self, rows, rejects):
+        if not rows:
+            return rows
+        self.env.cr.execute(
+            "SELECT number_plate FROM res_partner_car WHERE number_plate IN %s",
+            [tuple(row['number_plate'] for row in rows)],
+        )
+        existing = {row[0] for row in self.env.cr.fetchall()}
+        kept = []
+        for row in rows:
+            if row['number_plate'] in existing:
+                rejects.append((row, _("Number plate already registered")))
+            else:
+                kept.append(row)
+        return kept
+
+    def _resolve_brand_types(self, rows, brands, types, rejects):
+        """Set ``brand_id``/``brand_type_id`` on rows, creating missing ones in bulk."""
+        missing_brands = {
+            _normalize_name(row['brand']): row['brand'] for row in rows
+            if _normalize_name(row['brand']) not in brands
+        }
+        if missing_brands and self.create_missing_types:
+            created = self.env['res.partner.car.brand'].create([
+                {'name': name} for name in missing_brands.values()
+            ])
+            brands.update(zip(missing_brands, created.ids))
+
+        missing_types = {}
+        for row in rows:
+            brand_id = brands.get(_normalize_name(row['brand']))
+            key = (brand_id, _normalize_name(row['brand_type']))
+            if brand_id and key not in types:
+                missing_types.setdefault(key, row['brand_type'])
+        if missing_types and self.create_missing_types:
+            created = self.env['res.partner.car.type'].create([
+                {'name': name, 'brand': brand_id} for (brand_id, _key), name in missing_types.items()
+            ])
+            types.update(zip(missing_types, created.ids))
+
+        kept = []
+        for row in rows:
+            row['brand_id'] = brands.get(_normalize_name(row['brand']))
+            row['brand_type_id'] = types.get((row['brand_id'], _normalize_name(row['brand_type'])))
+            if not row['brand_id']:
+                rejects.append((row, _("Unknown brand %s", row['brand'])))
+            elif not row['brand_type_id']:
+                rejects.append((row, _("Unknown type %s for brand %s", row['brand_type'], row['brand'])))
+            else:
+                kept.append(row)
+        return kept
+
+    def _resolve_customers(self, rows, rejects):
+        """Match customers on the normalized phone, one search per chunk."""
+        phones = {normalize_phone(row.get('customer_phone')) for row in rows} - {''}
+        partners = {}
+        if phones:
+            for partner in self.env['res.partner'].search_read(
+                    [('phone_normalized', 'in', list(phones))], ['phone_normalized'], order='id'):
+                partners.setdefault(partner['phone_normalized'], partner['id'])
+
+        missing = {}
+        for row in rows:
+            phone = normalize_phone(row.get('customer_phone'))
+            if phone and phone not in partners:
+                missing.setdefault(phone, row.get('customer_name') or phone)
+        if missing and self.customer_tag_ids:
+            created = self.env['res.partner'].create([{
+                'name': name,
+                'phone': phone,
+                'category_id': [Command.set(self.customer_tag_ids.ids)],
+            } for phone, name in missing.items()])
+            partners.update(zip(missing, created.ids))
+
+        kept = []
+        for row in rows:
+            phone = normalize_phone(row.get('customer_phone'))
+            row['partner_id'] = partners.get(phone) if phone else self.partner_id.id
+            if row['partner_id']:
+                kept.append(row)
+            else:
+                rejects.append((row, _("Customer with phone %s not found", row.get('customer_phone'))))
+        return kept
+
+    def _create_cars(self, rows, transmissions, engine_types, rejects):
+        vals_list = [{
+            'number_plate': row['number_plate'],
+            'brand': row['brand_id'],
+            'brand_type': row['brand_type_id'],
+            'transmission': transmissions[_normalize_name(row['transmission'])],
+            'year': row['year'],
+            'color': row['color'],
+            'engine_type': engine_types[row['engine_type'].lower()],
+            'frame_number': row.get('frame_number') or False,
+            'engine_number': row.get('engine_number') or False,
+            'partner_id': row['partner_id'],
+        } for row in rows]
+        if not vals_list:
+            return 0
+        Car = self.env['res.partner.car']
+        try:
+            with self.env.cr.savepoint():
+                Car.create(vals_list)
+            return len(vals_list)
+        except Exception:
+            # Cari baris yang gagal satu per satu, baris lain tetap diimport
+            self.env.invalidate_all()
+        created = 0
+        for row, vals in zip(rows, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    Car.create(vals)
+                created += 1
+            except Exception as e:
+                self.env.invalidate_all()
+                rejects.append((row, str(e)))
+        return created
+
+    @api.model
+    def _render_rejects(self, rejects):
+        output = io.StringIO()
+        columns = list(REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+        writer = csv.writer(output)
+        writer.writerow(columns + ['error'])
+        for row, error in rejects:
+            writer.writerow([row.get(column, '') for column in columns] + [error])
+        return output.getvalue().encode('utf-8')